@@ -0,0 +1,39 @@
+"""Compara os backends de atividade (PyDriller x git log em streaming).
+
+Uso: ``python -m benchmarks.bench_activity_backends --commits 20000``
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from repo_miner.activity import analyze_activity
+
+from .synthetic import make_repo
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=5000)
+    parser.add_argument("--authors", type=int, default=50)
+    parser.add_argument("--since-days", type=int, default=365)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="repo_miner_bench_") as tmp:
+        repo = make_repo(Path(tmp) / "repo", commits=args.commits, authors=args.authors, span_days=args.since_days - 1)
+        results = {}
+        for backend in ("pydriller", "git"):
+            t0 = time.perf_counter()
+            results[backend] = analyze_activity(str(repo), since_days=args.since_days, backend=backend)
+            elapsed = time.perf_counter() - t0
+            print(f"{backend:>10}: {elapsed:8.2f}s  ({results[backend]['commits_total']} commits)")
+        same = results["pydriller"] == results["git"]
+        print("métricas idênticas:", same)
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
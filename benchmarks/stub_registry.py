@@ -0,0 +1,178 @@
+"""Servidor HTTP local que imita o PyPI (JSON e Simple) e o OSV para benchmarks sem rede.
+
+Cada pacote ``pkgN`` tem as versões ``1.0.0``, ``1.1.0`` e ``2.0.0``; um em cada
+``vuln_every`` pacotes tem uma vulnerabilidade em todas as versões abaixo de ``2.0.0``.
+Com ``graph_size``, ``pkgN`` declara em ``requires_dist`` os pacotes ``pkg(2N+1)`` e
+``pkg(2N+2)`` (abaixo de ``graph_size``), formando uma árvore binária a partir de ``pkg0``
+para o modo transitivo. A latência e a taxa de respostas 429 são configuráveis, e as respostas 429 são
+sorteadas com semente fixa para que as execuções sejam reproduzíveis. O servidor roda
+em um processo separado, para que o tempo medido seja o do cliente.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List
+
+from repo_miner import deps, osv
+
+VERSIONS = ("1.0.0", "1.1.0", "2.0.0")
+
+
+class StubRegistry(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, latency: float = 0.0, rate_429: float = 0.0, vuln_every: int = 10, seed: int = 0, graph_size: int = 0
+    ):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.graph_size = graph_size
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.vuln_every = max(1, vuln_every)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"requests": 0, "throttled": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def throttle(self) -> bool:
+        with self._lock:
+            self.counts["requests"] += 1
+            hit = self._random.random() < self.rate_429
+            if hit:
+                self.counts["throttled"] += 1
+            return hit
+
+    def requires_dist(self, name: str) -> List[str]:
+        m = re.search(r"(\d+)$", name)
+        if not m:
+            return []
+        n = int(m.group(1))
+        return [f"pkg{k}>=1.0" for k in (2 * n + 1, 2 * n + 2) if k < self.graph_size]
+
+    def vuln_id(self, name: str, version: str) -> str:
+        m = re.search(r"(\d+)$", name)
+        if m and int(m.group(1)) % self.vuln_every == 0 and version != VERSIONS[-1]:
+            return f"STUB-{name}"
+        return ""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubRegistry
+    protocol_version = "HTTP/1.1"  # keep-alive, como os servidores reais
+    # cabeçalhos e corpo saem em escritas separadas; sem TCP_NODELAY cada resposta espera o ACK atrasado (~40ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: Dict, content_type: str = "application/json") -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _pre(self) -> bool:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.throttle():
+            self._send(429, {"message": "too many requests"})
+            return False
+        return True
+
+    def do_GET(self) -> None:
+        if self.path == "/_stats":
+            return self._send(200, self.server.counts)
+        if not self._pre():
+            return
+        m = re.match(r"^/pypi/([^/]+)/json$", self.path)
+        if m:
+            releases = {v: [{"filename": f"{m.group(1)}-{v}.tar.gz"}] for v in VERSIONS}
+            info = {"name": m.group(1), "version": VERSIONS[-1], "requires_dist": self.server.requires_dist(m.group(1))}
+            return self._send(200, {"info": info, "releases": releases})
+        m = re.match(r"^/pypi/([^/]+)/([^/]+)/json$", self.path)
+        if m:
+            info = {"name": m.group(1), "version": m.group(2), "requires_dist": self.server.requires_dist(m.group(1))}
+            return self._send(200, {"info": info})
+        m = re.match(r"^/simple/([^/]+)/$", self.path)
+        if m:
+            files = [{"filename": f"{m.group(1)}-{v}.tar.gz", "yanked": False} for v in VERSIONS]
+            return self._send(200, {"name": m.group(1), "versions": list(VERSIONS), "files": files},
+                              content_type="application/vnd.pypi.simple.v1+json")
+        m = re.match(r"^/v1/vulns/STUB-(.+)$", self.path)
+        if m:
+            return self._send(200, {"id": f"STUB-{m.group(1)}", "summary": "vulnerabilidade sintética",
+                                    "aliases": [], "severity": []})
+        self._send(404, {"message": "not found"})
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self._pre():
+            return
+        if self.path != "/v1/querybatch":
+            return self._send(404, {"message": "not found"})
+        results = []
+        for q in json.loads(body or b"{}").get("queries") or []:
+            vid = self.server.vuln_id(q["package"]["name"], q.get("version") or "")
+            results.append({"vulns": [{"id": vid}]} if vid else {})
+        self._send(200, {"results": results})
+
+
+def _serve(conn, latency: float, rate_429: float, vuln_every: int, seed: int, graph_size: int) -> None:
+    server = StubRegistry(latency=latency, rate_429=rate_429, vuln_every=vuln_every, seed=seed, graph_size=graph_size)
+    conn.send(server.server_address[1])
+    conn.close()
+    server.serve_forever()
+
+
+class RegistryProcess:
+    """Servidor em execução em outro processo (não disputa o GIL com o código medido)."""
+
+    def __init__(self, process: multiprocessing.Process, port: int):
+        self.process = process
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        with urllib.request.urlopen(self.base_url + "/_stats") as r:
+            return json.loads(r.read())
+
+
+@contextmanager
+def stub_registry(
+    latency: float = 0.0, rate_429: float = 0.0, vuln_every: int = 10, seed: int = 0, graph_size: int = 0
+) -> Iterator[RegistryProcess]:
+    """Sobe o servidor em um processo filho e aponta os endpoints do PyPI/OSV do ``repo_miner`` para ele."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=_serve, args=(child, latency, rate_429, vuln_every, seed, graph_size), name="stub-registry", daemon=True
+    )
+    process.start()
+    registry = RegistryProcess(process, parent.recv())
+    base = registry.base_url
+    saved = (deps.PYPI_BASE, deps.PYPI_RELEASE_BASE, deps.PYPI_SIMPLE_BASE, osv.OSV_QUERYBATCH_URL, osv.OSV_VULN_URL)
+    deps.PYPI_BASE = base + "/pypi/{name}/json"
+    deps.PYPI_RELEASE_BASE = base + "/pypi/{name}/{version}/json"
+    deps.PYPI_SIMPLE_BASE = base + "/simple/{name}/"
+    osv.OSV_QUERYBATCH_URL = base + "/v1/querybatch"
+    osv.OSV_VULN_URL = base + "/v1/vulns/{id}"
+    try:
+        yield registry
+    finally:
+        deps.PYPI_BASE, deps.PYPI_RELEASE_BASE, deps.PYPI_SIMPLE_BASE, osv.OSV_QUERYBATCH_URL, osv.OSV_VULN_URL = saved
+        process.terminate()
+        process.join()
@@ -0,0 +1,225 @@
+"""Suíte de benchmarks reproduzível: atividade, resolução de dependências e exportação.
+
+Tudo roda localmente: os repositórios são gerados com ``git fast-import`` e o PyPI/OSV
+são simulados por :mod:`benchmarks.stub_registry` (com latência e respostas 429).
+
+Uso::
+
+    python -m benchmarks.suite --out bench.json                      # roda e compara com baseline.json
+    python -m benchmarks.suite --quick --only deps                   # só os casos de dependências, tamanhos reduzidos
+    python -m benchmarks.suite --out bench.json --save-baseline      # grava os resultados como nova baseline
+
+O código de saída é 1 se algum caso ficar mais lento que a baseline além do limite
+(``--threshold``, ou o valor de ``thresholds`` no arquivo da baseline para o caso).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from repo_miner.activity import analyze_activity
+from repo_miner.deps import analyze_dependencies
+from repo_miner.exporters import export_csv, export_json, export_ndjson
+from repo_miner.timeseries import analyze_activity_windows
+
+from .stub_registry import stub_registry
+from .synthetic import make_project, make_repo
+
+BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+Case = Callable[["Workspace"], ContextManager[Callable[[], Any]]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    def register(fn: Case) -> Case:
+        CASES[name] = contextmanager(fn)
+        return fn
+    return register
+
+
+class Workspace:
+    """Diretório temporário da execução, com os repositórios sintéticos reaproveitados entre casos."""
+
+    def __init__(self, root: Path, quick: bool = False):
+        self.root = root
+        self.quick = quick
+        self._repos: Dict[int, Path] = {}
+
+    def size(self, full: int, quick: int) -> int:
+        return quick if self.quick else full
+
+    def repo(self, commits: int) -> Path:
+        if commits not in self._repos:
+            self._repos[commits] = make_repo(self.root / f"repo-{commits}", commits=commits, authors=200, span_days=730)
+        return self._repos[commits]
+
+
+@case("activity_git")
+def _activity_git(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    repo = str(ws.repo(ws.size(20000, 2000)))
+    yield lambda: analyze_activity(repo, since_days=730, backend="git")
+
+
+@case("activity_pydriller")
+def _activity_pydriller(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    repo = str(ws.repo(ws.size(2000, 300)))
+    yield lambda: analyze_activity(repo, since_days=730, backend="pydriller")
+
+
+@case("activity_windows")
+def _activity_windows(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    repo = str(ws.repo(ws.size(20000, 2000)))
+    yield lambda: analyze_activity_windows(repo, windows=(30, 90, 365), series="monthly", since_days=730, backend="git")
+
+
+def _deps_case(packages: int) -> Case:
+    def run(ws: Workspace) -> Iterator[Callable[[], Any]]:
+        project = make_project(ws.root / f"project-{packages}", packages=packages)
+        with stub_registry(latency=0.005, rate_429=0.02):
+            yield lambda: analyze_dependencies(project, cache=None)
+    return run
+
+
+for _n in (10, 100, 1000):
+    case(f"deps_resolve_{_n}")(_deps_case(_n))
+
+
+@case("deps_transitive_1000")
+def _deps_transitive(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    # um único pacote direto que puxa uma árvore binária de 1023 nós (profundidade 9)
+    project = ws.root / "project-transitive"
+    project.mkdir(exist_ok=True)
+    (project / "requirements.txt").write_text("pkg0==2.0.0\n", encoding="utf-8")
+    with stub_registry(latency=0.005, rate_429=0.02, graph_size=ws.size(1023, 127)):
+        yield lambda: analyze_dependencies(project, cache=None, transitive=True)
+
+
+def _rows(n: int) -> Iterator[Dict[str, Any]]:
+    for i in range(n):
+        yield {
+            "name": f"pkg{i}", "current_version": "1.0.0", "latest_version": "2.0.0", "is_outdated": True,
+            "vulnerabilities": [{"id": f"STUB-pkg{i}", "summary": "ção"}] if i % 10 == 0 else [],
+        }
+
+
+@case("export_csv")
+def _export_csv(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    n = ws.size(100000, 10000)
+    yield lambda: export_csv(_rows(n), ws.root / "out.csv")
+
+
+@case("export_ndjson")
+def _export_ndjson(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    n = ws.size(100000, 10000)
+    yield lambda: export_ndjson(_rows(n), ws.root / "out.ndjson")
+
+
+@case("export_json")
+def _export_json(ws: Workspace) -> Iterator[Callable[[], Any]]:
+    packages = list(_rows(ws.size(100000, 10000)))
+    yield lambda: export_json({"packages": packages}, ws.root / "out.json")
+
+
+def run_cases(names: List[str], repeat: int = 3, quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Executa cada caso ``repeat`` vezes (após o preparo, fora da medição) e resume os tempos."""
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="repo_miner_bench_") as tmp:
+        ws = Workspace(Path(tmp), quick=quick)
+        for name in names:
+            with CASES[name](ws) as fn:
+                runs = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    fn()
+                    runs.append(round(time.perf_counter() - t0, 4))
+            results[name] = {"median_s": round(statistics.median(runs), 4), "min_s": min(runs), "runs": runs}
+            print(f"{name:>22}: {results[name]['median_s']:8.3f}s (mín. {results[name]['min_s']:.3f}s)", flush=True)
+    return results
+
+
+def _environment(quick: bool) -> Dict[str, Any]:
+    git = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "git": git,
+        "quick": quick,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> List[Tuple[str, Optional[float], float, Optional[float], str]]:
+    """Compara as medianas com a baseline: (caso, baseline, atual, razão, situação)."""
+    base_cases = baseline.get("cases") or {}
+    limits = baseline.get("thresholds") or {}
+    rows = []
+    for name, res in results.items():
+        base = (base_cases.get(name) or {}).get("median_s")
+        if not base:
+            rows.append((name, None, res["median_s"], None, "novo"))
+            continue
+        ratio = res["median_s"] / base
+        limit = limits.get(name, threshold)
+        status = "regressão" if ratio > 1 + limit else "melhora" if ratio < 1 - limit else "ok"
+        rows.append((name, base, res["median_s"], round(ratio, 3), status))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, help="Arquivo JSON com os resultados")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Lentidão tolerada (0.25 = 25%%)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Tamanhos reduzidos (smoke test)")
+    parser.add_argument("--only", default="", help="Prefixos dos casos, separados por vírgula (ex.: activity,deps)")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados em --baseline")
+    args = parser.parse_args(argv)
+
+    prefixes = [p for p in args.only.split(",") if p]
+    names = [n for n in CASES if not prefixes or n.startswith(tuple(prefixes))]
+    results = run_cases(names, repeat=max(1, args.repeat), quick=args.quick)
+    report = {"environment": _environment(args.quick), "cases": results}
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"resultados salvos em {args.out}")
+
+    if args.save_baseline:
+        previous = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        report["thresholds"] = previous.get("thresholds", {})
+        report["cases"] = {**(previous.get("cases") or {}), **results}
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"baseline salva em {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"sem baseline em {args.baseline}; use --save-baseline para criar")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if bool((baseline.get("environment") or {}).get("quick")) != args.quick:
+        print("aviso: baseline e execução usam tamanhos diferentes (--quick)")
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n{'caso':>22} {'baseline':>9} {'atual':>9} {'razão':>7}  situação")
+    for name, base, cur, ratio, status in rows:
+        base_s = f"{base:.3f}" if base is not None else "-"
+        ratio_s = f"{ratio:.2f}" if ratio is not None else "-"
+        print(f"{name:>22} {base_s:>9} {cur:>9.3f} {ratio_s:>7}  {status}")
+    return 1 if any(r[4] == "regressão" for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
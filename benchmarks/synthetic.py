@@ -0,0 +1,78 @@
+"""Gerador de repositórios Git sintéticos para benchmarks (via ``git fast-import``)."""
+from __future__ import annotations
+
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Optional
+
+
+def _data(text: str) -> bytes:
+    raw = text.encode("utf-8")
+    return b"data %d\n" % len(raw) + raw + b"\n"
+
+
+def make_repo(
+    path: Path,
+    commits: int = 1000,
+    authors: int = 20,
+    merge_every: int = 10,
+    span_days: int = 365,
+    end: Optional[float] = None,
+) -> Path:
+    """Cria em ``path`` um repositório com ``commits`` commits na branch ``main``.
+
+    Os commits se espalham uniformemente pelos últimos ``span_days`` dias (até ``end``,
+    padrão: agora), alternando entre ``authors`` autores. A cada ``merge_every`` commits,
+    um commit em uma branch lateral é integrado por um merge (0 desativa os merges).
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    subprocess.run(["git", "-C", str(path), "symbolic-ref", "HEAD", "refs/heads/main"], check=True)
+
+    end = time.time() - 60 if end is None else end
+    start = end - span_days * 86400
+    step = (end - start) / max(1, commits)
+    out: List[bytes] = []
+    mark = 0
+    prev = None
+    for i in range(commits):
+        ts = int(start + i * step)
+        author = i % max(1, authors)
+        ident = f"Dev {author} <dev{author}@example.com> {ts} +0000"
+        is_merge = bool(merge_every) and prev is not None and i % merge_every == 0
+        side = None
+        if is_merge:
+            mark += 1
+            side = mark
+            out.append(b"commit refs/heads/side\nmark :%d\n" % side)
+            out.append(f"author {ident}\ncommitter {ident}\n".encode("utf-8"))
+            out.append(_data(f"side work {i}"))
+            out.append(b"from :%d\n" % prev)
+            out.append(b"M 100644 inline side.txt\n" + _data(f"side {i}"))
+        mark += 1
+        out.append(b"commit refs/heads/main\nmark :%d\n" % mark)
+        out.append(f"author {ident}\ncommitter {ident}\n".encode("utf-8"))
+        out.append(_data(f"Merge branch 'side' ({i})" if is_merge else f"change {i}"))
+        if prev is not None:
+            out.append(b"from :%d\n" % prev)
+        if side is not None:
+            out.append(b"merge :%d\n" % side)
+        out.append(b"M 100644 inline file%d.txt\n" % (i % 50) + _data(f"content {i}"))
+        prev = mark
+    subprocess.run(["git", "-C", str(path), "fast-import", "--quiet"], input=b"".join(out), check=True)
+    return path
+
+
+def make_project(path: Path, packages: int = 100, outdated_every: int = 3) -> Path:
+    """Cria em ``path`` um projeto com ``requirements.txt`` de ``packages`` pacotes ``pkgN``.
+
+    Um em cada ``outdated_every`` pacotes fica fixado na versão mais nova do registro
+    simulado (``2.0.0``); os demais ficam em ``1.0.0`` (desatualizados).
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    lines = [f"pkg{i}=={'2.0.0' if i % outdated_every == 0 else '1.0.0'}" for i in range(packages)]
+    (path / "requirements.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
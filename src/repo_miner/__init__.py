@@ -1,5 +1,11 @@
+__version__ = "0.1.0"
+
 __all__ = [
     "activity",
+    "cache",
     "deps",
     "exporters",
+    "osv",
+    "resolver",
+    "transport",
 ]
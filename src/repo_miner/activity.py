@@ -1,17 +1,473 @@
+import codecs
+import fnmatch
+import heapq
+import multiprocessing
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
-try:
-    # PyDriller < 2.0
-    from pydriller import RepositoryMining
-except ImportError:  # pragma: no cover - exercised in envs with newer PyDriller
-    # PyDriller >= 2.0 renamed RepositoryMining -> Repository with same traverse_commits API
-    from pydriller import Repository as RepositoryMining
+from . import profiling
+from .sketches import HyperLogLog, SpaceSaving
 
+# separadores de campo/registro do formato passado ao `git log`
+_FIELD_SEP = "\x1f"
+_RECORD_SEP = "\x1e"
+_GIT_LOG_FORMAT = _FIELD_SEP.join(["%H", "%ct", "%ae", "%an", "%P", "%B"]) + _RECORD_SEP
+# mensagens do git para repositório ainda sem commits
+_EMPTY_REPO_ERRORS = ("does not have any commits", "bad default revision", "unknown revision", "bad revision 'HEAD'")
+# refs percorridas por ``--all-refs``: branches locais e remotas e tags (sem stash, notes, PRs)
+ALL_REFS = ("refs/heads/*", "refs/remotes/*", "refs/tags/*")
 
-def analyze_activity(repo_path: str, since_days: int = 365) -> Dict[str, Any]:
+
+class CommitRecord(NamedTuple):
+    """Dados mínimos de um commit usados nas métricas de atividade."""
+
+    sha: str
+    committed_at: datetime
+    author: str
+    is_merge: bool
+
+
+def _author_ident(email, name) -> str:
+    return (email or name or "").strip() or "unknown"
+
+
+def _is_merge(parents_count: int, msg: str) -> bool:
+    return parents_count > 1 or "merge" in (msg or "").lower()
+
+
+def _repository_mining():
+    """Classe de travessia do PyDriller, importada só quando o backend ``pydriller`` é usado.
+
+    PyDriller (e o GitPython que ele carrega) custa mais de 100 ms de importação; o backend
+    ``git`` e os comandos sem histórico não pagam esse custo.
+    """
+    mining = globals().get("RepositoryMining")
+    if mining is None:
+        try:
+            # PyDriller < 2.0
+            from pydriller import RepositoryMining as mining
+        except ImportError:  # pragma: no cover - exercised in envs with newer PyDriller
+            # PyDriller >= 2.0 renamed RepositoryMining -> Repository with same traverse_commits API
+            from pydriller import Repository as mining
+        globals()["RepositoryMining"] = mining
+    return mining
+
+
+def __getattr__(name: str):
+    if name == "RepositoryMining":
+        return _repository_mining()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _pydriller_records(repo_path: str, since: datetime, to: datetime) -> Iterator[CommitRecord]:
+    for commit in _repository_mining()(path_to_repo=repo_path, since=since, to=to).traverse_commits():
+        cdate = commit.committer_date
+        if cdate.tzinfo is None:
+            cdate = cdate.replace(tzinfo=timezone.utc)
+        parents = getattr(commit, "parents", None) or []
+        is_merge = bool(getattr(commit, "merge", False)) or _is_merge(len(parents), commit.msg)
+        yield CommitRecord(getattr(commit, "hash", ""), cdate, _author_ident(commit.author.email, commit.author.name), is_merge)
+
+
+def _split_git_record(raw: str) -> Tuple[CommitRecord, List[str]]:
+    sha, ts, email, name, parents, msg = raw.lstrip("\n").split(_FIELD_SEP, 5)
+    parents = parents.split()
+    record = CommitRecord(
+        sha,
+        datetime.fromtimestamp(int(ts), timezone.utc),
+        _author_ident(email, name),
+        _is_merge(len(parents), msg),
+    )
+    return record, parents
+
+
+def _parse_git_record(raw: str) -> CommitRecord:
+    return _split_git_record(raw)[0]
+
+
+def iter_git_log(
+    repo_path: str, args: Iterable[str], chunk_size: int = 1 << 16, fmt: str = _GIT_LOG_FORMAT
+) -> Iterator[str]:
+    """Executa ``git log`` com o formato de registros do módulo e produz cada registro bruto.
+
+    A saída é lida aos pedaços de um único pipe, sem carregar o histórico inteiro na memória.
+    ``fmt`` troca o formato; os registros continuam separados por ``_RECORD_SEP``.
+    """
+    cmd = ["git", "-C", repo_path, "log", f"--format={fmt}", *args]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            buffer += decoder.decode(chunk)
+            *records, buffer = buffer.split(_RECORD_SEP)
+            for raw in records:
+                if raw.strip():
+                    yield raw
+        buffer += decoder.decode(b"", final=True)
+        if buffer.strip():
+            yield buffer
+        stderr = proc.stderr.read().decode("utf-8", errors="replace")
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+        proc.stderr.close()
+    if returncode != 0:
+        # repositório sem commits: mesmo comportamento do PyDriller (nenhum commit)
+        if any(msg in stderr for msg in _EMPTY_REPO_ERRORS):
+            return
+        raise RuntimeError(f"git log falhou em {repo_path}: {stderr.strip()}")
+
+
+def _git_records(repo_path: str, since: datetime, to: datetime, revs: Sequence[str] = ("HEAD",)) -> Iterator[CommitRecord]:
+    # --reverse: mesma ordem do PyDriller (mais antigo primeiro), que decide os empates no top 5
+    args = [*revs, "--reverse", f"--since={since.isoformat()}", f"--until={to.isoformat()}"]
+    for raw in iter_git_log(repo_path, args):
+        yield _parse_git_record(raw)
+
+
+def list_refs(repo_path: str, patterns: Iterable[str]) -> List[Tuple[str, str]]:
+    """(nome curto, sha do commit) das branches, branches remotas e tags que casam com ``patterns``.
+
+    Cada padrão (glob do ``fnmatch``) é comparado com o nome completo (``refs/heads/main``)
+    e com o curto (``main``, ``origin/main``, ``v1.0``). Tags anotadas levam ao commit
+    apontado; refs simbólicas (``origin/HEAD``) e tags de outros objetos são ignoradas.
+    """
+    patterns = list(patterns)
+    fmt = "%(refname)%09%(refname:short)%09%(objecttype)%09%(objectname)%09%(*objecttype)%09%(*objectname)%09%(symref)"
+    r = subprocess.run(
+        ["git", "-C", repo_path, "for-each-ref", f"--format={fmt}", "refs/heads", "refs/remotes", "refs/tags"],
+        capture_output=True, text=True,
+    )
+    if r.returncode != 0:
+        raise RuntimeError(f"git for-each-ref falhou em {repo_path}: {r.stderr.strip()}")
+    refs = []
+    for line in r.stdout.splitlines():
+        full, short, otype, sha, peeled_type, peeled, symref = line.split("\t")
+        if symref or not any(fnmatch.fnmatchcase(full, p) or fnmatch.fnmatchcase(short, p) for p in patterns):
+            continue
+        if peeled_type:
+            otype, sha = peeled_type, peeled
+        if otype == "commit":
+            refs.append((short, sha))
+    return refs
+
+
+def _git_ref_records(
+    repo_path: str, since: datetime, to: datetime, refs: Sequence[Tuple[str, str]]
+) -> Iterator[Tuple[CommitRecord, int]]:
+    """Commits da união de ``refs``, cada um uma única vez, com a máscara das refs que o alcançam.
+
+    O ``git log`` percorre todas as pontas de uma vez em ``--topo-order`` (filhos antes dos
+    pais): o bit ``i`` começa na ponta da ref ``i`` e cada commit repassa a sua máscara
+    aos pais, então saber a que refs um commit pertence não custa outra travessia. Só os
+    commits ainda não vistos ficam no mapa de máscaras pendentes.
+    """
+    pending: Dict[str, int] = {}
+    for bit, (_, sha) in enumerate(refs):
+        pending[sha] = pending.get(sha, 0) | (1 << bit)
+    args = [*dict.fromkeys(pending), "--topo-order", f"--since={since.isoformat()}", f"--until={to.isoformat()}"]
+    for raw in iter_git_log(repo_path, args):
+        rec, parents = _split_git_record(raw)
+        mask = pending.pop(rec.sha, 0)
+        for parent in parents:
+            pending[parent] = pending.get(parent, 0) | mask
+        yield rec, mask
+
+
+BACKENDS: Dict[str, Callable[[str, datetime, datetime], Iterator[CommitRecord]]] = {
+    "pydriller": _pydriller_records,
+    "git": _git_records,
+}
+
+
+@dataclass
+class ActivityPartial:
+    """Agregado parcial e combinável das métricas de atividade de um trecho do histórico.
+
+    Guarda só o que é preciso para reconstruir o resultado exato: contagem e último commit
+    por autor, merges, histograma dos intervalos (em dias) entre commits consecutivos do
+    trecho e os commits extremos, que ligam um trecho ao seguinte.
+    """
+
+    commits: int = 0
+    merges: int = 0
+    author_counts: Dict[str, int] = field(default_factory=dict)
+    author_last: Dict[str, datetime] = field(default_factory=dict)
+    interval_counts: Dict[int, int] = field(default_factory=dict)
+    first: Optional[datetime] = None
+    last: Optional[datetime] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[CommitRecord]) -> "ActivityPartial":
+        part = cls()
+        commit_dates = []
+        for rec in records:
+            cdate = rec.committed_at
+            commit_dates.append(cdate)
+            ident = rec.author
+            part.author_counts[ident] = part.author_counts.get(ident, 0) + 1
+
+            prev = part.author_last.get(ident)
+            if prev is None or cdate > prev:
+                part.author_last[ident] = cdate
+            if rec.is_merge:
+                part.merges += 1
+
+        commit_dates.sort()
+        part.commits = len(commit_dates)
+        for i in range(1, len(commit_dates)):
+            days = (commit_dates[i] - commit_dates[i - 1]).days
+            part.interval_counts[days] = part.interval_counts.get(days, 0) + 1
+        if commit_dates:
+            part.first, part.last = commit_dates[0], commit_dates[-1]
+        return part
+
+    def merge(self, other: "ActivityPartial") -> "ActivityPartial":
+        """Combina com o trecho seguinte (``other`` deve vir depois no tempo)."""
+        if other.commits == 0:
+            return self
+        if self.commits and other.first is not None:
+            days = (other.first - self.last).days
+            self.interval_counts[days] = self.interval_counts.get(days, 0) + 1
+            self.first = min(self.first, other.first)
+            self.last = max(self.last, other.last)
+        else:
+            self.first, self.last = other.first, other.last
+        self.commits += other.commits
+        self.merges += other.merges
+        for ident, c in other.author_counts.items():
+            self.author_counts[ident] = self.author_counts.get(ident, 0) + c
+        for ident, dt in other.author_last.items():
+            prev = self.author_last.get(ident)
+            if prev is None or dt > prev:
+                self.author_last[ident] = dt
+        for days, c in other.interval_counts.items():
+            self.interval_counts[days] = self.interval_counts.get(days, 0) + c
+        return self
+
+    def finalize(self, now: datetime) -> Dict[str, Any]:
+        """Produz o dicionário de métricas de :func:`analyze_activity`."""
+        if self.last is not None:
+            days_since_last = (now - self.last).days
+        else:
+            days_since_last = 999999
+
+        median_days_between_commits = _histogram_median(self.interval_counts)
+
+        top_authors = [
+            {"author": a, "commits": c}
+            for a, c in sorted(self.author_counts.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        ]
+
+        recent_sorted = sorted(self.author_last.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        recent_authors = [
+            {
+                "author": a,
+                "days_since_last_commit": (now - dt).days,
+                "commits": self.author_counts.get(a, 0),
+            }
+            for a, dt in recent_sorted
+        ]
+
+        return {
+            "commits_total": self.commits,
+            "authors_total": len(self.author_counts),
+            "days_since_last_commit": days_since_last,
+            "median_days_between_commits": median_days_between_commits,
+            "merge_commits": self.merges,
+            "top_authors": top_authors,
+            "recent_authors": recent_authors,
+        }
+
+
+def _histogram_median(counts: Dict[int, int]) -> int:
+    """Mediana de um histograma de intervalos; equivale a ``sorted(intervals)[len(intervals) // 2]``."""
+    target, seen = sum(counts.values()) // 2, 0
+    for days in sorted(counts):
+        seen += counts[days]
+        if seen > target:
+            return days
+    return 0
+
+
+class StreamingActivity:
+    """Agregador de memória limitada para históricos enormes (modo ``streaming``).
+
+    Cada commit é consumido uma vez, sem guardar a lista de datas:
+
+    - intervalos entre commits vão para um histograma por dia, cujo tamanho é limitado
+      pelo número de valores distintos (no máximo a janela em dias); a mediana é exata
+      desde que os commits cheguem ordenados;
+    - a ordenação por data é refeita por um buffer de ``reorder`` commits (heap). Um
+      commit deslocado por mais que isso conta como intervalo de 0 dias;
+    - ``top_authors`` vem de um Space-Saving com ``top_k`` contadores: cada contagem é
+      superestimada em no máximo ``commits_total / top_k``;
+    - ``authors_total`` vem de um HyperLogLog (erro padrão ~1,6%);
+    - ``recent_authors`` é exato: só os ``recent`` autores com commit mais recente são
+      mantidos, e um autor removido só volta ao topo com um commit novo. O campo
+      ``commits`` desses autores usa a estimativa do Space-Saving.
     """
-    Coleta métricas simples de atividade do repositório usando PyDriller.
+
+    def __init__(self, top_k: int = 256, recent: int = 64, reorder: int = 10_000):
+        self.reorder = max(1, reorder)
+        self.recent = max(5, recent)
+        self.commits = 0
+        self.merges = 0
+        self.out_of_order = 0
+        self.interval_counts: Dict[int, int] = {}
+        self.authors = HyperLogLog()
+        self.top = SpaceSaving(top_k)
+        self.author_last: Dict[str, datetime] = {}
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+        self._buffer: List = []
+        self._seq = 0
+
+    def add(self, rec: CommitRecord) -> None:
+        heapq.heappush(self._buffer, (rec.committed_at, self._seq, rec))
+        self._seq += 1
+        if len(self._buffer) > self.reorder:
+            self._consume(heapq.heappop(self._buffer)[2])
+
+    def _consume(self, rec: CommitRecord) -> None:
+        cdate = rec.committed_at
+        self.commits += 1
+        if rec.is_merge:
+            self.merges += 1
+        self.authors.add(rec.author)
+        self.top.add(rec.author)
+
+        prev = self.author_last.get(rec.author)
+        if prev is None or cdate > prev:
+            self.author_last[rec.author] = cdate
+            if len(self.author_last) > self.recent:
+                oldest = min(self.author_last, key=self.author_last.get)
+                del self.author_last[oldest]
+
+        if self.last is None:
+            self.first = self.last = cdate
+            return
+        if cdate < self.last:  # chegou depois de sair do buffer de reordenação
+            self.out_of_order += 1
+            days = 0
+        else:
+            days = (cdate - self.last).days
+            self.last = cdate
+        self.interval_counts[days] = self.interval_counts.get(days, 0) + 1
+
+    def finalize(self, now: datetime) -> Dict[str, Any]:
+        """Esvazia o buffer e produz o mesmo dicionário de :func:`analyze_activity`."""
+        while self._buffer:
+            self._consume(heapq.heappop(self._buffer)[2])
+        recent_sorted = sorted(self.author_last.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        return {
+            "commits_total": self.commits,
+            "authors_total": len(self.authors) if self.commits else 0,
+            "days_since_last_commit": (now - self.last).days if self.last is not None else 999999,
+            "median_days_between_commits": _histogram_median(self.interval_counts),
+            "merge_commits": self.merges,
+            "top_authors": [{"author": a, "commits": c} for a, c in self.top.top(5)],
+            "recent_authors": [
+                {"author": a, "days_since_last_commit": (now - dt).days, "commits": self.top.estimate(a)}
+                for a, dt in recent_sorted
+            ],
+        }
+
+
+def aggregate_activity(records: Iterable[CommitRecord], now: datetime, streaming: bool = False) -> Dict[str, Any]:
+    """Calcula as métricas de :func:`analyze_activity` a partir dos registros de commits."""
+    if not streaming:
+        return ActivityPartial.from_records(records).finalize(now)
+    acc = StreamingActivity()
+    for rec in records:
+        acc.add(rec)
+    return acc.finalize(now)
+
+
+_open_lock = None
+
+
+def _init_shard_worker(lock) -> None:
+    global _open_lock
+    _open_lock = lock
+
+
+def _serialized_open(records: Iterator[CommitRecord]) -> Iterator[CommitRecord]:
+    # o PyDriller grava no .git/config ao abrir o repositório; processos abrindo ao mesmo
+    # tempo disputariam o config.lock, então só a abertura (primeiro registro) é serializada
+    it = iter(records)
+    if _open_lock is None:
+        yield from it
+        return
+    with _open_lock:
+        head = next(it, None)
+    if head is not None:
+        yield head
+        yield from it
+
+
+def _mine_shard(repo_path: str, backend: str, start: datetime, end: datetime, first: bool, last: bool) -> ActivityPartial:
+    # os limites internos são filtrados aqui (intervalo semiaberto [start, end)) para que cada
+    # commit caia em exatamente um trecho; os externos ficam com o git, como na leitura serial
+    pad = timedelta(seconds=1)
+    records = BACKENDS[backend](repo_path, start if first else start - pad, end if last else end + pad)
+    if backend == "pydriller":
+        records = _serialized_open(records)
+    return ActivityPartial.from_records(
+        rec for rec in records
+        if (first or rec.committed_at >= start) and (last or rec.committed_at < end)
+    )
+
+
+def _shard_bounds(since: datetime, now: datetime, shards: int) -> List[datetime]:
+    step = (now - since) / shards
+    return [since + step * i for i in range(shards)] + [now]
+
+
+def analyze_activity_sharded(
+    repo_path: str, since: datetime, now: datetime, backend: str = "pydriller", workers: int = 2, shards_per_worker: int = 4
+) -> Dict[str, Any]:
+    """Divide a janela ``[since, now]`` em trechos minerados em processos separados.
+
+    Cada processo devolve um :class:`ActivityPartial`; os parciais são combinados em ordem
+    cronológica e o resultado é idêntico ao da leitura serial. São criados
+    ``shards_per_worker`` trechos por processo para equilibrar janelas com atividade desigual.
+    """
+    shards = max(1, workers * shards_per_worker)
+    bounds = _shard_bounds(since, now, shards)
+    lock = multiprocessing.Lock()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker, initargs=(lock,)) as pool:
+        futures = [
+            pool.submit(_mine_shard, repo_path, backend, bounds[i], bounds[i + 1], i == 0, i == shards - 1)
+            for i in range(shards)
+        ]
+        total = ActivityPartial()
+        for fut in futures:
+            total.merge(fut.result())
+    return total.finalize(now)
+
+
+def analyze_activity(
+    repo_path: str,
+    since_days: int = 365,
+    backend: str = "pydriller",
+    incremental: bool = False,
+    index_dir: Optional[Path] = None,
+    workers: int = 1,
+    streaming: bool = False,
+    refs: Optional[Sequence[str]] = None,
+    per_ref: bool = False,
+) -> Dict[str, Any]:
+    """
+    Coleta métricas simples de atividade do repositório.
 
     - commits_total: total de commits na janela
     - authors_total: número de autores distintos
@@ -20,66 +476,91 @@ def analyze_activity(repo_path: str, since_days: int = 365) -> Dict[str, Any]:
     - merge_commits: número de merges
     - top_authors: lista dos 5 autores com mais commits (ordenados)
     - recent_authors: lista dos 5 autores com commits mais recentes (com dias desde o último commit do autor)
+
+    ``backend`` escolhe como o histórico é lido: ``pydriller`` (objetos ``Commit`` completos)
+    ou ``git`` (um único ``git log`` em streaming, bem mais rápido em repositórios grandes).
+    Com ``incremental=True``, os commits vêm de um índice persistente por repositório
+    (:class:`~repo_miner.commit_index.CommitIndex`), que só lê do git o que entrou desde a
+    última execução. Com ``workers > 1``, a janela é dividida em trechos minerados em
+    paralelo por processos separados (ver :func:`analyze_activity_sharded`). Com
+    ``streaming=True``, a memória fica limitada independentemente do tamanho do histórico,
+    ao custo de contagens de autores aproximadas (ver :class:`StreamingActivity`).
+
+    Por padrão só o histórico do HEAD é lido. ``refs`` (padrões de :func:`list_refs`, ex.:
+    :data:`ALL_REFS`) percorre a união das refs escolhidas numa única travessia do backend
+    ``git``, contando cada commit uma vez; o resultado ganha ``refs`` com os nomes
+    encontrados e, com ``per_ref=True``, ``per_ref`` com as métricas de cada ref.
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend inválido: {backend!r} (use {', '.join(BACKENDS)})")
+    if streaming and workers > 1:
+        raise ValueError("streaming não pode ser combinado com workers > 1")
+    if per_ref and not refs:
+        raise ValueError("per_ref requer refs")
+    if refs:
+        if backend != "git":
+            raise ValueError("refs requer o backend git")
+        if incremental or workers > 1 or (per_ref and streaming):
+            raise ValueError("refs não pode ser combinado com incremental, workers > 1 ou per_ref com streaming")
     now = datetime.now(timezone.utc)
     since = now - timedelta(days=since_days)
+    if refs:
+        return _analyze_refs(repo_path, since, now, refs, per_ref=per_ref, streaming=streaming)
+    with profiling.span("activity.traverse", "activity", backend=backend, incremental=incremental, workers=workers):
+        if workers > 1 and not incremental:
+            metrics = analyze_activity_sharded(repo_path, since, now, backend=backend, workers=workers)
+        else:
+            records = iter_records(repo_path, since, now, backend=backend, incremental=incremental, index_dir=index_dir)
+            metrics = aggregate_activity(records, now, streaming=streaming)
+    profiling.count("commits_seen", metrics["commits_total"])
+    return metrics
 
-    commit_dates = []
-    author_counts = {}
-    author_last_commit = {}
-    merge_commits = 0
 
-    for commit in RepositoryMining(path_to_repo=repo_path, since=since, to=now).traverse_commits():
-        cdate = commit.committer_date
-        if cdate.tzinfo is None:
-            cdate = cdate.replace(tzinfo=timezone.utc)
-        commit_dates.append(cdate)
-        ident = (commit.author.email or commit.author.name or "").strip() or "unknown"
-        author_counts[ident] = author_counts.get(ident, 0) + 1
+def _analyze_refs(
+    repo_path: str, since: datetime, now: datetime, patterns: Sequence[str], per_ref: bool = False, streaming: bool = False
+) -> Dict[str, Any]:
+    refs = list_refs(repo_path, patterns)
+    if not refs:
+        raise ValueError(f"nenhuma ref corresponde a {', '.join(patterns)}")
+    names = [name for name, _ in refs]
+    with profiling.span("activity.traverse", "activity", backend="git", refs=len(refs), per_ref=per_ref):
+        if not per_ref:
+            # git log deduplica os commits alcançáveis por mais de uma ponta
+            records = _git_records(repo_path, since, now, revs=list(dict.fromkeys(sha for _, sha in refs)))
+            metrics = aggregate_activity(records, now, streaming=streaming)
+        else:
+            rows = list(_git_ref_records(repo_path, since, now, refs))
+            rows.reverse()  # mais antigo primeiro, como na leitura do HEAD
+            by_ref: List[List[CommitRecord]] = [[] for _ in refs]
+            for rec, mask in rows:
+                while mask:
+                    low = mask & -mask
+                    by_ref[low.bit_length() - 1].append(rec)
+                    mask ^= low
+            metrics = aggregate_activity((rec for rec, _ in rows), now)
+            metrics["per_ref"] = {name: aggregate_activity(recs, now) for name, recs in zip(names, by_ref)}
+    profiling.count("commits_seen", metrics["commits_total"])
+    metrics["refs"] = names
+    return metrics
 
-        prev = author_last_commit.get(ident)
-        if prev is None or cdate > prev:
-            author_last_commit[ident] = cdate
-        if getattr(commit, "merge", False) or (getattr(commit, "parents", None) and len(commit.parents) > 1):
-            merge_commits += 1
-        elif "merge" in (commit.msg or "").lower():
-            merge_commits += 1
-
-    commit_dates.sort()
-    commits_total = len(commit_dates)
-    authors_total = len(author_counts)
-
-    if commit_dates:
-        days_since_last = (now - commit_dates[-1]).days
-    else:
-        days_since_last = 999999
-
-    intervals = []
-    for i in range(1, len(commit_dates)):
-        intervals.append((commit_dates[i] - commit_dates[i - 1]).days)
-    median_days_between_commits = 0 if not intervals else sorted(intervals)[len(intervals) // 2]
-
-    top_authors = [
-        {"author": a, "commits": c}
-        for a, c in sorted(author_counts.items(), key=lambda kv: kv[1], reverse=True)[:5]
-    ]
-
-    recent_sorted = sorted(author_last_commit.items(), key=lambda kv: kv[1], reverse=True)[:5]
-    recent_authors = [
-        {
-            "author": a,
-            "days_since_last_commit": (now - dt).days,
-            "commits": author_counts.get(a, 0),
-        }
-        for a, dt in recent_sorted
-    ]
-
-    return {
-        "commits_total": commits_total,
-        "authors_total": authors_total,
-        "days_since_last_commit": days_since_last,
-        "median_days_between_commits": median_days_between_commits,
-        "merge_commits": merge_commits,
-        "top_authors": top_authors,
-        "recent_authors": recent_authors,
-    }
+
+def iter_records(
+    repo_path: str,
+    since: datetime,
+    now: datetime,
+    backend: str = "pydriller",
+    incremental: bool = False,
+    index_dir: Optional[Path] = None,
+) -> Iterator[CommitRecord]:
+    """Commits de ``[since, now]`` lidos pelo ``backend`` ou, com ``incremental``, pelo índice persistente."""
+    if not incremental:
+        yield from BACKENDS[backend](repo_path, since, now)
+        return
+    from .commit_index import CommitIndex
+
+    index = CommitIndex(repo_path, index_dir)
+    try:
+        index.update()
+        yield from index.records(since, now)
+    finally:
+        index.close()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import itertools
+import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .activity import analyze_activity
+from .deps import MANIFEST_FILES, build_report, collect_packages
+from .mirrors import MirrorCache, is_remote
+from .resolver import ConcurrentResolver
+from .score import maintenance_score
+from .vulndb import VulnDB, normalize_name
+
+
+def read_targets(lines: Iterable[str]) -> List[str]:
+    """Caminhos/URLs da frota, um por linha; ignora linhas vazias, comentários (#) e repetidos."""
+    targets = (line.strip() for line in lines)
+    return list(dict.fromkeys(t for t in targets if t and not t.startswith("#")))
+
+
+def load_checkpoint(out: Path) -> Set[str]:
+    """Repositórios já concluídos em uma execução anterior gravada em ``out``.
+
+    O próprio JSONL de saída é o checkpoint: linhas com erro ou truncadas (processo
+    interrompido no meio da escrita) são descartadas para que esses repositórios sejam
+    refeitos, e o arquivo é regravado só com as linhas válidas.
+    """
+    if not out.exists():
+        return set()
+    done: Dict[str, str] = {}
+    with out.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(row, dict) and row.get("repo") and "error" not in row:
+                done[row["repo"]] = line if line.endswith("\n") else line + "\n"
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text("".join(done.values()), encoding="utf-8")
+    tmp.replace(out)
+    return set(done)
+
+
+def _scan_repo(target: str, since_days: int, backend: str) -> Dict:
+    """Etapa local (sem rede) de um repositório: atividade + pacotes declarados.
+
+    Roda nos processos do pool; a resolução de versões/vulnerabilidades fica no processo
+    principal, que mantém o memo compartilhado da frota.
+    """
+    try:
+        if not is_remote(target):
+            activity = analyze_activity(repo_path=target, since_days=since_days, backend=backend)
+            packages = list(collect_packages(Path(target)).values())
+        else:
+            mirrors = MirrorCache()
+            mirror = mirrors.mirror(target)
+            activity = analyze_activity(repo_path=str(mirror), since_days=since_days, backend=backend)
+            with mirrors.manifest_tree(target, MANIFEST_FILES, mirror=mirror) as path:
+                packages = list(collect_packages(path).values())
+        return {"repo": target, "activity": activity, "packages": packages}
+    except Exception as e:
+        return {"repo": target, "error": f"{type(e).__name__}: {e}"}
+
+
+class FleetResolver:
+    """Resolve cada nome e cada par (pacote, versão) uma única vez para toda a frota.
+
+    As respostas ficam em memória durante o lote; repositórios seguintes que declaram os
+    mesmos pacotes só consultam o que ainda não foi visto.
+    """
+
+    def __init__(self, resolver: Optional[ConcurrentResolver] = None, vulndb: Optional[VulnDB] = None):
+        self.resolver = resolver
+        self.vulndb = vulndb
+        self.latest: Dict[str, Optional[str]] = {}
+        self.vulns: Dict[Tuple[str, str], List[Dict]] = {}
+
+    @property
+    def online(self) -> bool:
+        return self.resolver is not None or self.vulndb is not None
+
+    def _fetch(self, names: List[str], pairs: List[Tuple[str, str]]) -> Dict:
+        """Consulta e memoriza ``names``/``pairs``; devolve os erros, que não são memorizados.
+
+        Uma consulta que falhou é refeita no próximo repositório que declarar o pacote.
+        """
+        if self.vulndb is not None:
+            latest = {n: self.vulndb.latest_version(n) for n in names}
+            vulns = {p: self.vulndb.vulnerabilities(*p) for p in pairs}
+            errors: Dict = {}
+        else:
+            latest, vulns, errors = self.resolver.resolve(pairs + [(n, None) for n in names], latest_for=names)
+        for name in names:
+            if name not in errors:
+                self.latest[normalize_name(name)] = latest.get(name)
+        for name, ver in pairs:
+            if (name, ver) not in errors and vulns.get((name, ver), []) is not None:
+                self.vulns[(normalize_name(name), ver)] = vulns.get((name, ver), [])
+        return errors
+
+    def report(self, by_name: Dict[str, Dict[str, Optional[str]]]) -> Dict:
+        if not self.online:
+            return build_report(by_name, {}, {}, resolved=False)
+        names = list(dict.fromkeys(m["name"] for m in by_name.values() if normalize_name(m["name"]) not in self.latest))
+        pairs = list(dict.fromkeys(
+            (m["name"], m["version"]) for m in by_name.values()
+            if m.get("version") and (normalize_name(m["name"]), m["version"]) not in self.vulns
+        ))
+        errors = self._fetch(names, pairs) if names or pairs else {}
+        latest_by_name = {m["name"]: self.latest.get(normalize_name(m["name"])) for m in by_name.values()}
+        # pares ausentes do memo são os que falharam: ficam None (resultado desconhecido)
+        vulns_by_pair = {
+            (m["name"], m["version"]): self.vulns.get((normalize_name(m["name"]), m["version"]))
+            for m in by_name.values() if m.get("version")
+        }
+        return build_report(by_name, latest_by_name, vulns_by_pair, errors=errors)
+
+
+def run_batch(
+    targets: Iterable[str],
+    out: Path,
+    jobs: int = 4,
+    since_days: int = 365,
+    backend: str = "git",
+    fleet: Optional[FleetResolver] = None,
+    on_result: Optional[Callable[[Dict], None]] = None,
+) -> Dict[str, int]:
+    """Analisa uma frota de repositórios e grava um objeto JSON por repositório em ``out``.
+
+    A parte local (clone, histórico, manifestos) roda em ``jobs`` processos reaproveitados
+    entre repositórios; cada resultado é resolvido contra o memo da frota e escrito no
+    JSONL assim que o repositório termina. Repositórios já presentes em ``out`` são
+    pulados, então um lote interrompido continua de onde parou.
+    """
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fleet = fleet or FleetResolver()
+    targets = read_targets(targets)
+    done = load_checkpoint(out)
+    todo = iter([t for t in targets if t not in done])
+    stats = {"total": len(targets), "skipped": sum(1 for t in targets if t in done), "ok": 0, "failed": 0}
+    jobs = max(1, jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as pool, out.open("a", encoding="utf-8") as f:
+        inflight: Set = set()
+        while True:
+            # janela limitada: não enfileira a frota inteira de uma vez
+            for target in itertools.islice(todo, 2 * jobs - len(inflight)):
+                inflight.add(pool.submit(_scan_repo, target, since_days, backend))
+            if not inflight:
+                break
+            finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                row = _finish(fut.result(), fleet)
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                f.flush()
+                stats["failed" if "error" in row else "ok"] += 1
+                if on_result:
+                    on_result(row)
+    return stats
+
+
+def _finish(scan: Dict, fleet: FleetResolver) -> Dict:
+    if "error" in scan:
+        return scan
+    try:
+        by_name = {p["name"].lower(): p for p in scan["packages"]}
+        deps = fleet.report(by_name)
+    except Exception as e:
+        return {"repo": scan["repo"], "error": f"{type(e).__name__}: {e}"}
+    return {
+        "repo": scan["repo"],
+        "activity": scan["activity"],
+        "dependencies": deps,
+        "maintenance_score": maintenance_score(scan["activity"], deps),
+    }
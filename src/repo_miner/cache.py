@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from . import profiling
+
+# TTL padrão (segundos) por origem dos dados
+DEFAULT_TTLS: Dict[str, int] = {
+    "pypi": 6 * 3600,
+    "osv": 3600,
+}
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DB_NAME = "http-cache.sqlite3"
+# acessos (accessed_at) acumulados em memória e gravados em lote: a cada N acertos ou a cada N segundos
+_TOUCH_BATCH = 256
+_TOUCH_INTERVAL = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+def default_cache_dir() -> Path:
+    """Diretório base de cache (``$XDG_CACHE_HOME/repo-miner`` ou ``~/.cache/repo-miner``)."""
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "repo-miner"
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    source: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+class CachedResponse:
+    """Resposta servida do cache, com a mesma interface usada de ``requests.Response``."""
+
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.status_code = status_code
+        self.content = body
+        self.headers: Dict[str, str] = {}
+        self.from_cache = True
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+
+class HttpCache:
+    """Cache persistente (SQLite) de respostas HTTP com TTL por origem e despejo LRU.
+
+    Entradas vencidas continuam guardadas para revalidação condicional
+    (``If-None-Match``/``If-Modified-Since``) e só são removidas por :meth:`prune`
+    ou quando o tamanho total passa de ``max_bytes``.
+
+    O tamanho total é somado uma vez e depois mantido a cada gravação; a tabela só é
+    percorrida quando o limite é ultrapassado. Os acessos de leitura, que definem a
+    ordem LRU, são gravados em lote (e sempre antes de um despejo).
+    """
+
+    def __init__(self, directory: Optional[Path] = None, ttls: Optional[Dict[str, int]] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / DB_NAME
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._total: Optional[int] = None
+        self._touched: Dict[str, float] = {}
+        self._touched_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched_locked()
+            self._conn.close()
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        profiling.count(f"cache_{counter}")
+
+    def ttl(self, source: str) -> int:
+        return self.ttls.get(source, min(self.ttls.values()))
+
+    def is_fresh(self, entry: CacheEntry, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return now - entry.stored_at < self.ttl(entry.source)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, source, body, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= _TOUCH_BATCH or time.monotonic() - self._touched_flush >= _TOUCH_INTERVAL:
+                self._flush_touched_locked()
+                self._conn.commit()
+        return CacheEntry(*row)
+
+    def _flush_touched_locked(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in self._touched.items()]
+            )
+            self._touched.clear()
+        self._touched_flush = time.monotonic()
+
+    def _total_locked(self) -> int:
+        if self._total is None:
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self._total
+
+    def put(self, key: str, source: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            total = self._total_locked()
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, source, body, etag, last_modified, stored_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, body, etag, last_modified, now, now, len(body)),
+            )
+            self._touched.pop(key, None)
+            self._total = total + len(body) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict_locked(self.max_bytes)
+            self._conn.commit()
+
+    def refresh(self, key: str) -> None:
+        """Marca a entrada como revalidada agora (resposta 304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            self._conn.commit()
+
+    def _evict_locked(self, max_bytes: int) -> int:
+        # soma de novo: outro processo pode ter gravado no mesmo arquivo desde a última contagem
+        self._flush_touched_locked()
+        self._total = None
+        total = self._total_locked()
+        removed = 0
+        if total <= max_bytes:
+            return removed
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            if total <= max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self._total = total
+        return removed
+
+    def prune(self, max_bytes: Optional[int] = None, expired: bool = True) -> int:
+        """Remove entradas vencidas (se ``expired``) e aplica o limite de tamanho. Retorna o total removido."""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            self._flush_touched_locked()
+            if expired:
+                for source in {r[0] for r in self._conn.execute("SELECT DISTINCT source FROM entries")}:
+                    cur = self._conn.execute(
+                        "DELETE FROM entries WHERE source = ? AND stored_at <= ?", (source, now - self.ttl(source))
+                    )
+                    removed += cur.rowcount
+            removed += self._evict_locked(self.max_bytes if max_bytes is None else max_bytes)
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict:
+        now = time.time()
+        by_source: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            rows = self._conn.execute("SELECT source, stored_at, size FROM entries").fetchall()
+        for source, stored_at, size in rows:
+            s = by_source.setdefault(source, {"entries": 0, "bytes": 0, "expired": 0})
+            s["entries"] += 1
+            s["bytes"] += size
+            if now - stored_at >= self.ttl(source):
+                s["expired"] += 1
+        return {
+            "path": str(self.path),
+            "entries": sum(s["entries"] for s in by_source.values()),
+            "bytes": sum(s["bytes"] for s in by_source.values()),
+            "max_bytes": self.max_bytes,
+            "sources": by_source,
+        }
+
+
+def cached_get(cache: Optional[HttpCache], source: str, key: str, request: Callable[[Dict[str, str]], object]):
+    """Executa um GET consultando o cache antes.
+
+    ``request`` recebe cabeçalhos extras (condicionais) e deve devolver a resposta.
+    Entradas frescas não tocam a rede; entradas vencidas são revalidadas com
+    ETag/Last-Modified e, se o servidor responder 304, servidas do cache.
+    """
+    if cache is None:
+        return request({})
+    entry = cache.get(key)
+    if entry is not None and cache.is_fresh(entry):
+        cache.count("hits")
+        return CachedResponse(entry.body)
+    headers: Dict[str, str] = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    r = request(headers)
+    if r.status_code == 304 and entry is not None:
+        cache.count("revalidated")
+        cache.refresh(key)
+        return CachedResponse(entry.body)
+    cache.count("misses")
+    if r.status_code == 200:
+        resp_headers = getattr(r, "headers", None) or {}
+        cache.put(key, source, r.content, resp_headers.get("ETag"), resp_headers.get("Last-Modified"))
+    return r
+
+
+def get_json(cache: Optional[HttpCache], key: str):
+    """Lê um valor JSON guardado com :func:`put_json`, se ainda estiver fresco."""
+    if cache is None:
+        return None
+    entry = cache.get(key)
+    if entry is None or not cache.is_fresh(entry):
+        return None
+    cache.count("hits")
+    return json.loads(entry.body.decode("utf-8"))
+
+
+def put_json(cache: Optional[HttpCache], source: str, key: str, value) -> None:
+    """Guarda um resultado já processado (ex.: IDs do OSV por pacote), sem revalidação."""
+    if cache is None:
+        return
+    cache.put(key, source, json.dumps(value, separators=(",", ":")).encode("utf-8"))
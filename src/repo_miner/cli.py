@@ -1,76 +1,403 @@
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import typer
 from rich.console import Console
 from rich.table import Table
 
-from .activity import analyze_activity
-from .deps import analyze_dependencies
-import subprocess
-import tempfile
+from .activity import ALL_REFS, BACKENDS, analyze_activity
+from .batch import FleetResolver, run_batch
+from .cache import DEFAULT_TTLS, HttpCache
+from .manifests import is_tracked_manifest
+from .mirrors import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES as DEFAULT_MIRROR_BYTES, MirrorCache, is_remote
+from . import profiling
+from .deps import MANIFEST_FILES, PYPI_APIS, analyze_dependencies, resolve_dependencies, summarize_packages
+from .resolver import ConcurrentResolver
+from .score import maintenance_score
+from .stages import StageTimeout, run_stages
+from .timeseries import SERIES, analyze_activity_windows
+from .transitive import DEFAULT_MAX_DEPTH
+from .transport import DEFAULT_CONCURRENCY
+from .vulndb import VulnDB, default_db_path, import_osv_zip
+import sys
+import time
+from contextlib import ExitStack
 from urllib.parse import urlparse
-from .exporters import export_json, export_csv
+from .hotspots import COLUMNS as HOTSPOT_COLUMNS, DEFAULT_TOP as DEFAULT_HOTSPOTS, SORT_KEYS as HOTSPOT_SORTS, analyze_hotspots
+from .exporters import CsvWriter, NdjsonWriter, export_csv, export_json, export_ndjson, tee_rows
 
 app = typer.Typer(help="Ferramenta CLI para minerar repositórios e avaliar saúde de manutenção")
+cache_app = typer.Typer(help="Gerencia o cache local de respostas do PyPI/OSV")
+app.add_typer(cache_app, name="cache")
+db_app = typer.Typer(help="Banco local de vulnerabilidades/versões para uso sem rede")
+app.add_typer(db_app, name="db")
 console = Console()
 
 
+def _check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        console.print(f"--backend inválido: {backend}. Use {' ou '.join(BACKENDS)}.", style="red")
+        raise typer.Exit(code=1)
+
+
+def _parse_windows(windows: Optional[str]) -> Tuple[int, ...]:
+    if not windows:
+        return ()
+    try:
+        days = tuple(int(w) for w in windows.split(",") if w.strip())
+    except ValueError:
+        days = ()
+    if not days or min(days) < 1:
+        console.print(f"--windows inválido: {windows}. Use dias separados por vírgula, ex.: 30,90,365.", style="red")
+        raise typer.Exit(code=1)
+    return days
+
+
+def _check_streaming(streaming: bool, workers: int) -> None:
+    if streaming and workers > 1:
+        console.print("--streaming não pode ser combinado com --workers > 1.", style="red")
+        raise typer.Exit(code=1)
+
+
+def _check_windows(windows: Optional[str], series: Optional[str], streaming: bool, workers: int) -> None:
+    # janelas e séries são calculadas numa única leitura sequencial, com contagens exatas
+    if (windows or series) and (streaming or workers > 1):
+        option = "--streaming" if streaming else "--workers > 1"
+        console.print(f"--windows/--series não podem ser combinados com {option}.", style="red")
+        raise typer.Exit(code=1)
+
+
+def _check_pypi_api(pypi_api: str) -> None:
+    if pypi_api not in PYPI_APIS:
+        console.print(f"--pypi-api inválida: {pypi_api}. Use {' ou '.join(PYPI_APIS)}.", style="red")
+        raise typer.Exit(code=1)
+
+
+def _open_vulndb(db: Optional[Path], offline: bool) -> Optional[VulnDB]:
+    # com --offline, o banco padrão é usado automaticamente se já tiver sido importado
+    if db is None:
+        if not offline or not default_db_path().exists():
+            return None
+        db = default_db_path()
+    try:
+        return VulnDB(db)
+    except FileNotFoundError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=1)
+
+
+def _local_repo(
+    stack: ExitStack, repo: str, history: bool = True, files: bool = True, recursive: bool = False
+) -> Tuple[Optional[str], Optional[str]]:
+    """Caminhos locais (histórico, manifestos) para ``repo``; URLs passam pelo cache de espelhos.
+
+    O histórico é lido direto do espelho bare. Os manifestos vêm de um diretório temporário
+    só com esses arquivos (lidos com ``git cat-file``), removido quando ``stack`` fecha;
+    sem ``history``, nenhum espelho é criado e basta um clone raso sem blobs.
+    """
+    if not is_remote(repo):
+        return repo, repo
+    try:
+        mirrors = MirrorCache()
+        with profiling.span("repo.fetch", "git", url=repo, history=history, files=files):
+            mirror = mirrors.mirror(repo) if history else None
+            wanted = is_tracked_manifest if recursive else MANIFEST_FILES
+            tree = stack.enter_context(mirrors.manifest_tree(repo, wanted, mirror=mirror)) if files else None
+    except RuntimeError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=1)
+    return (str(mirror) if mirror else None), (str(tree) if tree else None)
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="Mostra ao final o tempo por etapa/consulta, contadores e pico de memória"),
+    trace_out: Optional[Path] = typer.Option(None, help="Grava um trace JSON do Chrome/Perfetto com as etapas da execução"),
+):
+    if not (profile or trace_out):
+        return
+    profiler = profiling.start()
+    command = ExitStack()
+    command.enter_context(profiler.span(f"command.{ctx.invoked_subcommand}", "command"))
+
+    def finish() -> None:
+        command.close()
+        profiling.stop()
+        if trace_out:
+            profiler.write_trace(trace_out)
+            console.print(f"Trace salvo em {trace_out}")
+        if profile:
+            _print_profile(profiler.summary())
+
+    ctx.call_on_close(finish)
+
+
+def _print_profile(summary: dict) -> None:
+    table = Table(title="Perfil de execução")
+    table.add_column("Span")
+    table.add_column("Chamadas", justify="right")
+    table.add_column("Total (s)", justify="right")
+    table.add_column("Máx. (s)", justify="right")
+    for s in summary["spans"]:
+        table.add_row(s["name"], str(s["calls"]), f"{s['total_s']:.3f}", f"{s['max_s']:.3f}")
+    console.print(table)
+    counters = Table(title="Contadores")
+    counters.add_column("Contador")
+    counters.add_column("Valor", justify="right")
+    for name, value in sorted(summary["counters"].items()):
+        counters.add_row(name, str(value))
+    if summary["peak_rss_bytes"] is not None:
+        counters.add_row("peak_rss_mb", f"{summary['peak_rss_bytes'] / 1e6:.1f}")
+    console.print(counters)
+
+
+def _open_cache(cache_dir: Optional[Path], no_cache: bool, pypi_ttl: int, osv_ttl: int) -> Optional[HttpCache]:
+    if no_cache:
+        return None
+    return HttpCache(cache_dir, ttls={"pypi": pypi_ttl, "osv": osv_ttl})
+
+
+# opções que o serviço (repo-miner serve) respeita, por comando; as demais são recusadas com --server
+_SERVER_OPTIONS = {
+    "activity": ("repo", "since_days", "json_out", "incremental", "server"),
+    "deps": ("repo", "json_out", "csv_out", "ndjson_out", "offline", "auto_clone", "recursive", "server"),
+    "analyze": ("repo", "since_days", "json_out", "ndjson_out", "incremental", "timeout", "recursive", "server"),
+}
+
+
+def _check_server(ctx: typer.Context, server: Optional[str]) -> None:
+    """Recusa, com --server, toda opção informada que o serviço não repassaria à análise."""
+    if not server:
+        return
+    supported = _SERVER_OPTIONS[ctx.command.name]
+    for name in ctx.params:
+        source = ctx.get_parameter_source(name)
+        if name not in supported and source is not None and source.name != "DEFAULT":
+            console.print(f"--{name.replace('_', '-')} não é suportado com --server.", style="red")
+            raise typer.Exit(code=1)
+
+
+def _run_remote(server: str, kind: str, params: dict, timeout: Optional[float] = None):
+    from .service import run_remote  # http.client só é carregado quando o comando delega
+
+    try:
+        return run_remote(server, kind, params, timeout=timeout)
+    except TimeoutError:
+        console.print(f"Tempo esgotado aguardando o serviço em {server}", style="red")
+    except OSError as e:
+        console.print(f"Serviço indisponível em {server}: {e}", style="red")
+    except RuntimeError as e:
+        console.print(f"O serviço não concluiu o job: {e}", style="red")
+    raise typer.Exit(code=1)
+
+
 @app.command()
 def activity(
-    repo: str = typer.Argument(..., help="Caminho local do repositório Git (ou URL clonada previamente)"),
+    ctx: typer.Context,
+    repo: str = typer.Argument(..., help="Caminho local ou URL do repositório Git (URLs usam o cache de espelhos)"),
     since_days: int = typer.Option(365, help="Janela de análise em dias"),
     json_out: Optional[Path] = typer.Option(None, help="Arquivo para salvar JSON"),
+    backend: Optional[str] = typer.Option(
+        None, help="Leitura do histórico: 'pydriller' (padrão) ou 'git' (git log em streaming, mais rápido; padrão com --all-refs/--refs)",
+    ),
+    incremental: bool = typer.Option(False, help="Usar índice persistente de commits; só lê o que entrou desde a última execução"),
+    index_dir: Optional[Path] = typer.Option(None, help="Diretório dos índices (padrão: ~/.cache/repo-miner/activity-index)"),
+    workers: int = typer.Option(1, min=1, help="Processos para minerar a janela em paralelo (divide o período em trechos)"),
+    streaming: bool = typer.Option(False, help="Memória limitada: top de autores e total de autores aproximados (ver README)"),
+    windows: Optional[str] = typer.Option(None, help="Janelas em dias, ex.: 30,90,365 (uma única leitura do histórico)"),
+    series: Optional[str] = typer.Option(None, help="Série temporal das métricas: 'monthly' ou 'weekly' (últimos --since-days)"),
+    all_refs: bool = typer.Option(False, help="Percorre todas as branches (locais e remotas) e tags numa única travessia"),
+    refs: Optional[str] = typer.Option(None, help="Refs a percorrer, separadas por vírgula; aceita globs, ex.: main,release/*"),
+    per_ref: bool = typer.Option(False, help="Métricas também por ref, na mesma travessia; requer --all-refs ou --refs"),
+    server: Optional[str] = typer.Option(None, envvar="REPO_MINER_SERVER", help="Delegar ao serviço local (repo-miner serve): socket Unix ou host:porta"),
 ):
     """Analisa a atividade de commits/merges do repositório."""
-    metrics = analyze_activity(repo_path=repo, since_days=since_days)
+    _check_streaming(streaming, workers)
+    _check_windows(windows, series, streaming, workers)
+    _check_server(ctx, server)
+    ref_patterns = _parse_refs(all_refs, refs, per_ref, backend, incremental, workers, streaming, bool(windows or series))
+    # só o backend git percorre várias refs: é o padrão quando elas são pedidas
+    backend = backend or ("git" if ref_patterns else "pydriller")
+    _check_backend(backend)
+    window_days = _parse_windows(windows)
+    if series is not None and series not in SERIES:
+        console.print(f"--series inválido: {series}. Use {' ou '.join(SERIES)}.", style="red")
+        raise typer.Exit(code=1)
+    if server:
+        metrics = _run_remote(server, "activity", {"repo": repo, "since_days": since_days})
+    else:
+        metrics = _activity_metrics(
+            repo, since_days, backend, incremental, index_dir, workers, streaming, window_days, series, ref_patterns, per_ref,
+        )
 
     if json_out:
         export_json(metrics, json_out)
         console.print(f"JSON salvo em {json_out}")
         return
 
+    if window_days or series:
+        _print_periods(metrics)
+        return
+
     # Tabela amigável
     table = Table(title="Atividade do Repositório")
     table.add_column("Métrica")
     table.add_column("Valor")
     for k, v in metrics.items():
-        table.add_row(k, str(v))
+        if k == "per_ref":
+            continue
+        table.add_row(k, ", ".join(v) if k == "refs" else str(v))
+    console.print(table)
+    if per_ref:
+        _print_periods(metrics)
+
+
+def _parse_refs(
+    all_refs: bool, refs: Optional[str], per_ref: bool, backend: Optional[str], incremental: bool, workers: int, streaming: bool,
+    periods: bool,
+) -> Tuple[str, ...]:
+    patterns = (ALL_REFS if all_refs else ()) + tuple(r.strip() for r in (refs or "").split(",") if r.strip())
+    problem = None
+    if per_ref and not patterns:
+        problem = "--per-ref requer --all-refs ou --refs."
+    elif patterns and backend not in (None, "git"):
+        problem = f"--all-refs/--refs usam o backend git e não funcionam com --backend {backend}."
+    elif patterns and (incremental or workers > 1 or periods or (per_ref and streaming)):
+        problem = "--all-refs/--refs não podem ser combinados com --incremental, --workers > 1, --windows/--series ou --per-ref com --streaming."
+    if problem:
+        console.print(problem, style="red")
+        raise typer.Exit(code=1)
+    return patterns
+
+
+def _activity_metrics(
+    repo: str, since_days: int, backend: str, incremental: bool, index_dir: Optional[Path], workers: int,
+    streaming: bool, window_days: Tuple[int, ...], series: Optional[str], refs: Tuple[str, ...] = (), per_ref: bool = False,
+) -> dict:
+    with ExitStack() as stack:
+        repo_path, _ = _local_repo(stack, repo, files=False)
+        if window_days or series:
+            return analyze_activity_windows(
+                repo_path, windows=window_days, series=series, since_days=since_days, backend=backend,
+                incremental=incremental, index_dir=index_dir,
+            )
+        try:
+            return analyze_activity(
+                repo_path=repo_path, since_days=since_days, backend=backend, incremental=incremental, index_dir=index_dir,
+                workers=workers, streaming=streaming, refs=refs or None, per_ref=per_ref,
+            )
+        except ValueError as e:  # ex.: nenhuma ref corresponde aos padrões
+            console.print(str(e), style="red")
+            raise typer.Exit(code=1)
+
+
+def _print_periods(metrics: dict) -> None:
+    columns = ["commits_total", "authors_total", "merge_commits", "median_days_between_commits"]
+    sections = [("Janela (dias)", "windows", list((metrics.get("windows") or {}).items()))]
+    sections.append(("Período", "series", [(row["period"], row) for row in metrics.get("series") or []]))
+    sections.append(("Ref", "per_ref", list((metrics.get("per_ref") or {}).items())))
+    for label, key, rows in sections:
+        if key not in metrics:
+            continue
+        table = Table(title=f"Atividade por {label.split()[0].lower()}")
+        table.add_column(label)
+        for col in columns:
+            table.add_column(col)
+        for name, row in rows:
+            table.add_row(name, *(str(row[c]) for c in columns))
+        console.print(table)
+
+
+@app.command()
+def hotspots(
+    repo: str = typer.Argument(..., help="Caminho local ou URL do repositório Git (URLs usam o cache de espelhos)"),
+    since_days: int = typer.Option(365, help="Janela de análise em dias"),
+    top: int = typer.Option(DEFAULT_HOTSPOTS, min=1, help="Quantos arquivos listar"),
+    sort: str = typer.Option("churn", help="Ordenação: 'churn' (linhas adicionadas + removidas), 'commits' ou 'authors'"),
+    backend: str = typer.Option("git", help="Leitura do histórico: 'git' (git log --numstat em streaming, padrão) ou 'pydriller'"),
+    include_deleted: bool = typer.Option(False, help="Inclui arquivos que não existem mais no HEAD"),
+    json_out: Optional[Path] = typer.Option(None, help="Arquivo para salvar JSON"),
+    csv_out: Optional[Path] = typer.Option(None, help="Arquivo para salvar CSV (um arquivo do repositório por linha)"),
+):
+    """Arquivos mais alterados na janela: churn, commits e autores distintos por caminho."""
+    _check_backend(backend)
+    if sort not in HOTSPOT_SORTS:
+        console.print(f"--sort inválido: {sort}. Use {', '.join(HOTSPOT_SORTS)}.", style="red")
+        raise typer.Exit(code=1)
+    with ExitStack() as stack:
+        # URLs: o espelho é bare e sem blobs; o primeiro --numstat busca os blobs da janela
+        repo_path, _ = _local_repo(stack, repo, files=False)
+        result = analyze_hotspots(
+            repo_path, since_days=since_days, top=top, sort=sort, backend=backend, include_deleted=include_deleted,
+        )
+
+    if json_out:
+        export_json(result, json_out)
+        console.print(f"JSON salvo em {json_out}")
+    if csv_out:
+        export_csv(result["hotspots"], csv_out, fieldnames=HOTSPOT_COLUMNS)
+        console.print(f"CSV salvo em {csv_out}")
+    if json_out or csv_out:
+        return
+
+    table = Table(title=f"Hotspots ({result['commits_total']} commits, {result['files_total']} arquivos alterados)")
+    for col in HOTSPOT_COLUMNS:
+        table.add_column(col)
+    for row in result["hotspots"]:
+        table.add_row(*(str(row[c]) for c in HOTSPOT_COLUMNS))
     console.print(table)
 
 
 @app.command()
 def deps(
+    ctx: typer.Context,
     repo: str = typer.Argument(".", help="Caminho local ou URL https://github.com/org/repo para detecção de dependências"),
     json_out: Optional[Path] = typer.Option(None, help="Arquivo para salvar JSON"),
     csv_out: Optional[Path] = typer.Option(None, help="Arquivo para salvar CSV"),
+    ndjson_out: Optional[Path] = typer.Option(None, help="Arquivo NDJSON (um pacote por linha), gravado em streaming"),
     offline: bool = typer.Option(False, help="Não consultar rede (apenas parse)"),
-    auto_clone: bool = typer.Option(True, help="Clonar automaticamente URL remota (depth=1) se caminho for HTTP(S)")
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, min=1, help="Máximo de requisições simultâneas por servidor (PyPI/OSV)"),
+    auto_clone: bool = typer.Option(True, help="Buscar automaticamente os manifestos de URL remota (sem baixar o restante do repositório)"),
+    cache_dir: Optional[Path] = typer.Option(None, help="Diretório do cache HTTP (padrão: ~/.cache/repo-miner)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Não usar o cache HTTP local"),
+    pypi_ttl: int = typer.Option(DEFAULT_TTLS["pypi"], help="Validade (s) das respostas do PyPI no cache"),
+    osv_ttl: int = typer.Option(DEFAULT_TTLS["osv"], help="Validade (s) das respostas do OSV no cache"),
+    pypi_api: str = typer.Option("json", help="API do PyPI: 'json' (projeto completo) ou 'simple' (índice PEP 691, mais leve)"),
+    db: Optional[Path] = typer.Option(None, help="Banco offline (repo-miner db import); responde sem rede"),
+    recursive: bool = typer.Option(False, help="Varre todos os subprojetos (monorepo), incluindo lockfiles"),
+    transitive: bool = typer.Option(False, help="Inclui as dependências das dependências (requires_dist do PyPI)"),
+    max_depth: int = typer.Option(DEFAULT_MAX_DEPTH, min=0, help="Profundidade máxima do grafo com --transitive"),
+    graph_out: Optional[Path] = typer.Option(None, help="Grava o grafo de dependências (lista de adjacência) em JSON; requer --transitive"),
+    server: Optional[str] = typer.Option(None, envvar="REPO_MINER_SERVER", help="Delegar ao serviço local (repo-miner serve): socket Unix ou host:porta"),
 ):
     """Analisa dependências: desatualizadas e vulnerabilidades (OSV)."""
-    target_path = Path(repo)
-    if repo.startswith("http://") or repo.startswith("https://"):
+    _check_pypi_api(pypi_api)
+    _check_transitive(transitive, offline, graph_out)
+    _check_server(ctx, server)
+    if is_remote(repo):
         if not auto_clone:
             console.print("URL remota detectada. Use --auto-clone ou forneça caminho local previamente clonado.", style="red")
             raise typer.Exit(code=1)
         parsed = urlparse(repo)
         parts = [p for p in parsed.path.split("/") if p]
-        if len(parts) < 2:
+        if parsed.scheme in ("http", "https") and len(parts) < 2:
             console.print("URL não representa repositório (faltando segmento de projeto). Use formato https://github.com/org/repo", style="red")
             raise typer.Exit(code=1)
-        tmpdir = Path(tempfile.mkdtemp(prefix="repo_miner_clone_"))
-        console.print(f"Clonando repositório em {tmpdir} ...")
-        try:
-            subprocess.run(["git", "clone", "--depth", "1", repo, str(tmpdir)], check=True, capture_output=True)
-        except Exception as e:
-            console.print(f"Falha ao clonar: {e}", style="red")
-            raise typer.Exit(code=1)
-        target_path = tmpdir
-    report = analyze_dependencies(target_path, offline=offline)
+    if server:
+        report = _run_remote(server, "deps", {"repo": repo, "offline": offline, "recursive": recursive})
+    else:
+        report = _local_dependencies(
+            repo, offline, concurrency, cache_dir, no_cache, pypi_ttl, osv_ttl, pypi_api, db, recursive,
+            transitive, max_depth, json_out, csv_out, ndjson_out, graph_out,
+        )
+        if report is None:
+            return
+
     # aviso se nenhum manifesto encontrado
     if report.get("summary", {}).get("packages_total") == 0:
-        report["warning"] = "Nenhum arquivo requirements.txt ou pyproject.toml encontrado no caminho informado." 
+        report["warning"] = _NO_MANIFEST_WARNING
 
     if json_out:
         export_json(report, json_out)
@@ -78,38 +405,179 @@ def deps(
     if csv_out:
         export_csv(report.get("packages", []), csv_out)
         console.print(f"CSV salvo em {csv_out}")
+    if ndjson_out:
+        export_ndjson(report.get("packages", []), ndjson_out)
+        console.print(f"NDJSON salvo em {ndjson_out}")
 
-    if not (json_out or csv_out):
+    if graph_out:
+        _export_graph(report.get("graph"), graph_out)
+
+    if not (json_out or csv_out or ndjson_out or graph_out):
         console.print(json.dumps(report, indent=2, ensure_ascii=False))
+    _check_unknown(report.get("summary", {}))
+
+
+def _check_unknown(summary: dict) -> None:
+    # consultas que falharam não podem passar por "sem vulnerabilidades" num CI
+    unknown = summary.get("unknown_total", 0)
+    if unknown:
+        console.print(
+            f"{unknown} pacote(s) sem resultado: a consulta ao PyPI/OSV falhou (ver o campo error). O relatório está incompleto.",
+            style="red",
+        )
+        raise typer.Exit(code=2)
+
+
+def _check_transitive(transitive: bool, offline: bool, graph_out: Optional[Path]) -> None:
+    if transitive and offline:
+        console.print("--transitive consulta os metadados do PyPI e não funciona com --offline.", style="red")
+        raise typer.Exit(code=1)
+    if graph_out and not transitive:
+        console.print("--graph-out requer --transitive.", style="red")
+        raise typer.Exit(code=1)
+
+
+def _export_graph(graph: Optional[dict], graph_out: Path) -> None:
+    export_json(graph or {}, graph_out)
+    console.print(f"Grafo salvo em {graph_out} ({(graph or {}).get('nodes_total', 0)} nós)")
+
+
+_NO_MANIFEST_WARNING = "Nenhum arquivo requirements.txt ou pyproject.toml encontrado no caminho informado."
+
+
+def _local_dependencies(
+    repo: str, offline: bool, concurrency: int, cache_dir: Optional[Path], no_cache: bool, pypi_ttl: int, osv_ttl: int,
+    pypi_api: str, db: Optional[Path], recursive: bool, transitive: bool, max_depth: int,
+    json_out: Optional[Path], csv_out: Optional[Path], ndjson_out: Optional[Path], graph_out: Optional[Path],
+) -> Optional[dict]:
+    """Relatório de dependências calculado neste processo; ``None`` se já foi gravado em streaming."""
+    with ExitStack() as stack:
+        _, files = _local_repo(stack, repo, history=False, recursive=recursive)
+        target_path = Path(files)
+        vulndb = _open_vulndb(db, offline)
+        cache = None if offline or vulndb else _open_cache(cache_dir, no_cache, pypi_ttl, osv_ttl)
+        options = dict(
+            offline=offline, concurrency=concurrency, cache=cache, pypi_api=pypi_api, vulndb=vulndb, recursive=recursive
+        )
+        if transitive:
+            options.update(transitive=True, max_depth=max_depth)
+        if (csv_out or ndjson_out) and not json_out:
+            # só arquivos linha a linha: os pacotes vão direto para o disco, sem montar o relatório
+            writers = []
+            try:
+                if ndjson_out:
+                    writers.append(NdjsonWriter(ndjson_out))
+                if csv_out:
+                    writers.append(CsvWriter(csv_out))
+                rows, graph = resolve_dependencies(target_path, **options)
+                summary = summarize_packages(tee_rows(rows, writers))
+            finally:
+                for w in writers:
+                    w.close()
+            if graph_out:
+                _export_graph(graph, graph_out)
+            if ndjson_out:
+                console.print(f"NDJSON salvo em {ndjson_out}")
+            if csv_out:
+                console.print(f"CSV salvo em {csv_out}")
+            result = {"summary": summary}
+            if summary["packages_total"] == 0:
+                result["warning"] = _NO_MANIFEST_WARNING
+            console.print(json.dumps(result, ensure_ascii=False), soft_wrap=True)
+            _check_unknown(summary)
+            return None
+        return analyze_dependencies(target_path, **options)
 
 
 @app.command()
 def analyze(
-    repo: str = typer.Argument(".", help="Caminho do repositório/projeto"),
+    ctx: typer.Context,
+    repo: str = typer.Argument(".", help="Caminho ou URL do repositório/projeto"),
     since_days: int = typer.Option(365, help="Janela de atividade (dias)"),
     json_out: Optional[Path] = typer.Option(None, help="Arquivo para salvar JSON"),
+    ndjson_out: Optional[Path] = typer.Option(None, help="Grava os pacotes em NDJSON (streaming); o JSON traz só o resumo"),
+    backend: str = typer.Option("pydriller", help="Leitura do histórico: 'pydriller' ou 'git' (git log em streaming, mais rápido)"),
+    incremental: bool = typer.Option(False, help="Usar índice persistente de commits; só lê o que entrou desde a última execução"),
+    index_dir: Optional[Path] = typer.Option(None, help="Diretório dos índices (padrão: ~/.cache/repo-miner/activity-index)"),
+    workers: int = typer.Option(1, min=1, help="Processos para minerar a janela em paralelo (divide o período em trechos)"),
+    streaming: bool = typer.Option(False, help="Memória limitada: top de autores e total de autores aproximados (ver README)"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, min=1, help="Máximo de requisições simultâneas por servidor (PyPI/OSV)"),
+    cache_dir: Optional[Path] = typer.Option(None, help="Diretório do cache HTTP (padrão: ~/.cache/repo-miner)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Não usar o cache HTTP local"),
+    pypi_ttl: int = typer.Option(DEFAULT_TTLS["pypi"], help="Validade (s) das respostas do PyPI no cache"),
+    osv_ttl: int = typer.Option(DEFAULT_TTLS["osv"], help="Validade (s) das respostas do OSV no cache"),
+    pypi_api: str = typer.Option("json", help="API do PyPI: 'json' (projeto completo) ou 'simple' (índice PEP 691, mais leve)"),
+    db: Optional[Path] = typer.Option(None, help="Banco offline (repo-miner db import); responde sem rede"),
+    timeout: Optional[float] = typer.Option(None, min=0, help="Prazo (s) para as duas etapas, que rodam em paralelo"),
+    recursive: bool = typer.Option(False, help="Varre todos os subprojetos (monorepo), incluindo lockfiles"),
+    transitive: bool = typer.Option(False, help="Inclui as dependências das dependências (requires_dist do PyPI)"),
+    max_depth: int = typer.Option(DEFAULT_MAX_DEPTH, min=0, help="Profundidade máxima do grafo com --transitive"),
+    server: Optional[str] = typer.Option(None, envvar="REPO_MINER_SERVER", help="Delegar ao serviço local (repo-miner serve): socket Unix ou host:porta"),
 ):
     """Executa análise combinada (atividade + dependências) e fornece um score simples."""
-    activity = analyze_activity(repo_path=repo, since_days=since_days)
-    deps = analyze_dependencies(Path(repo))
+    _check_backend(backend)
+    _check_pypi_api(pypi_api)
+    _check_streaming(streaming, workers)
+    _check_server(ctx, server)
+    if server:
+        result = _run_remote(server, "analyze", {"repo": repo, "since_days": since_days, "recursive": recursive}, timeout=timeout)
+        if ndjson_out:
+            deps = result["dependencies"]
+            export_ndjson(deps.pop("packages", []), ndjson_out)
+            deps["packages_ndjson"] = str(ndjson_out)
+        _print_analysis(result, json_out)
+        _check_unknown(result["dependencies"].get("summary", {}))
+        return
+    vulndb = _open_vulndb(db, offline=False)
+    cache = None if vulndb else _open_cache(cache_dir, no_cache, pypi_ttl, osv_ttl)
+    options = dict(concurrency=concurrency, cache=cache, pypi_api=pypi_api, vulndb=vulndb, recursive=recursive)
+    if transitive:
+        options.update(transitive=True, max_depth=max_depth)
+
+    with ExitStack() as stack:
+        repo_path, files = _local_repo(stack, repo, recursive=recursive)
 
-    # Score simples: 0-100 baseado em atividade e desatualização
-    commits = activity.get("commits_total", 0)
-    days_since_last = activity.get("days_since_last_commit", 9999)
-    outdated = sum(1 for p in deps.get("packages", []) if p.get("is_outdated"))
+        def activity_stage():
+            return analyze_activity(
+                repo_path=repo_path, since_days=since_days, backend=backend, incremental=incremental, index_dir=index_dir,
+                workers=workers, streaming=streaming,
+            )
+
+        def deps_stage():
+            if ndjson_out:
+                with NdjsonWriter(ndjson_out) as writer:
+                    rows, graph = resolve_dependencies(Path(files), **options)
+                    summary = summarize_packages(tee_rows(rows, [writer]))
+                result = {"summary": summary, "packages_ndjson": str(ndjson_out)}
+                if graph is not None:
+                    result["graph"] = graph
+                return result
+            return analyze_dependencies(Path(files), **options)
+
+        # histórico (CPU/disco) e dependências (rede) rodam ao mesmo tempo, sob o mesmo prazo
+        started = time.perf_counter()
+        try:
+            results, timings = run_stages({"activity": activity_stage, "dependencies": deps_stage}, timeout=timeout)
+        except StageTimeout as e:
+            console.print(f"Tempo esgotado: {e}", style="red")
+            raise typer.Exit(code=1)
+    activity, deps = results["activity"], results["dependencies"]
+    timings = {f"{name}_s": secs for name, secs in timings.items()}
+    timings["total_s"] = round(time.perf_counter() - started, 3)
 
-    score = 50
-    score += min(30, commits // 10)
-    score += max(0, 20 - min(20, days_since_last))
-    score -= min(30, outdated * 5)
-    score = max(0, min(100, score))
+    score = maintenance_score(activity, deps)
 
     result = {
         "activity": activity,
         "dependencies": deps,
         "maintenance_score": score,
+        "timings": timings,
     }
+    _print_analysis(result, json_out)
+    _check_unknown(deps.get("summary", {}))
+
 
+def _print_analysis(result: dict, json_out: Optional[Path]) -> None:
     if json_out:
         export_json(result, json_out)
         console.print(f"JSON salvo em {json_out}")
@@ -117,5 +585,139 @@ def analyze(
         console.print(json.dumps(result, indent=2, ensure_ascii=False))
 
 
+@app.command()
+def batch(
+    targets: Optional[Path] = typer.Argument(None, help="Arquivo com um caminho/URL de repositório por linha (padrão: stdin)"),
+    out: Path = typer.Option(..., help="Saída JSONL (um objeto por repositório); também serve de checkpoint"),
+    jobs: int = typer.Option(4, min=1, help="Processos analisando repositórios em paralelo"),
+    since_days: int = typer.Option(365, help="Janela de atividade (dias)"),
+    backend: str = typer.Option("git", help="Leitura do histórico: 'git' (padrão, mais rápido) ou 'pydriller'"),
+    offline: bool = typer.Option(False, help="Não consultar rede (apenas parse)"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, min=1, help="Máximo de requisições simultâneas por servidor (PyPI/OSV)"),
+    cache_dir: Optional[Path] = typer.Option(None, help="Diretório do cache HTTP (padrão: ~/.cache/repo-miner)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Não usar o cache HTTP local"),
+    pypi_ttl: int = typer.Option(DEFAULT_TTLS["pypi"], help="Validade (s) das respostas do PyPI no cache"),
+    osv_ttl: int = typer.Option(DEFAULT_TTLS["osv"], help="Validade (s) das respostas do OSV no cache"),
+    pypi_api: str = typer.Option("json", help="API do PyPI: 'json' (projeto completo) ou 'simple' (índice PEP 691, mais leve)"),
+    db: Optional[Path] = typer.Option(None, help="Banco offline (repo-miner db import); responde sem rede"),
+):
+    """Analisa uma frota de repositórios (atividade + dependências) e grava JSONL incrementalmente."""
+    _check_backend(backend)
+    _check_pypi_api(pypi_api)
+    if targets is None or str(targets) == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = targets.read_text(encoding="utf-8").splitlines()
+    vulndb = _open_vulndb(db, offline)
+    resolver = None
+    if vulndb is None and not offline:
+        cache = _open_cache(cache_dir, no_cache, pypi_ttl, osv_ttl)
+        resolver = ConcurrentResolver(concurrency=concurrency, cache=cache, pypi_api=pypi_api)
+    stats = run_batch(
+        lines, out, jobs=jobs, since_days=since_days, backend=backend,
+        fleet=FleetResolver(resolver=resolver, vulndb=vulndb),
+    )
+    console.print(
+        f"{stats['ok']} repositórios analisados, {stats['failed']} com erro, "
+        f"{stats['skipped']} já concluídos em {out}"
+    )
+
+
+@app.command()
+def serve(
+    socket_path: Optional[Path] = typer.Option(None, "--socket", help="Socket Unix do serviço (padrão: ~/.cache/repo-miner/serve.sock)"),
+    port: Optional[int] = typer.Option(None, min=0, help="Escutar em TCP nesta porta em vez do socket Unix"),
+    host: str = typer.Option("127.0.0.1", help="Endereço TCP (com --port); fora do loopback exige --token"),
+    token: Optional[str] = typer.Option(None, envvar="REPO_MINER_SERVER_TOKEN", help="Segredo exigido em toda requisição (clientes usam REPO_MINER_SERVER_TOKEN)"),
+    workers: int = typer.Option(4, min=1, help="Jobs executados em paralelo"),
+    result_ttl: float = typer.Option(300, min=0, help="Validade (s) dos resultados guardados por HEAD/manifestos"),
+    index_dir: Optional[Path] = typer.Option(None, help="Diretório dos índices (padrão: ~/.cache/repo-miner/activity-index)"),
+    offline: bool = typer.Option(False, help="Não consultar rede (apenas parse)"),
+    concurrency: int = typer.Option(DEFAULT_CONCURRENCY, min=1, help="Máximo de requisições simultâneas por servidor (PyPI/OSV)"),
+    cache_dir: Optional[Path] = typer.Option(None, help="Diretório do cache HTTP (padrão: ~/.cache/repo-miner)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Não usar o cache HTTP local"),
+    pypi_ttl: int = typer.Option(DEFAULT_TTLS["pypi"], help="Validade (s) das respostas do PyPI no cache"),
+    osv_ttl: int = typer.Option(DEFAULT_TTLS["osv"], help="Validade (s) das respostas do OSV no cache"),
+    pypi_api: str = typer.Option("json", help="API do PyPI: 'json' (projeto completo) ou 'simple' (índice PEP 691, mais leve)"),
+    db: Optional[Path] = typer.Option(None, help="Banco offline (repo-miner db import); responde sem rede"),
+):
+    """Serviço local com caches quentes; activity/deps/analyze delegam a ele com --server."""
+    from .service import AnalysisService, default_socket_path, describe, make_server
+
+    _check_pypi_api(pypi_api)
+    vulndb = _open_vulndb(db, offline)
+    resolver = None
+    if vulndb is None and not offline:
+        cache = _open_cache(cache_dir, no_cache, pypi_ttl, osv_ttl)
+        resolver = ConcurrentResolver(concurrency=concurrency, cache=cache, pypi_api=pypi_api)
+    service = AnalysisService(
+        workers=workers, resolver=resolver, vulndb=vulndb, result_ttl=result_ttl, index_dir=index_dir
+    )
+    address = ("tcp", (host, port)) if port is not None else ("unix", str(socket_path or default_socket_path()))
+    try:
+        server = make_server(address, service, token=token)
+    except (OSError, RuntimeError) as e:
+        console.print(f"Não foi possível iniciar o serviço: {e}", style="red")
+        service.close()
+        raise typer.Exit(code=1)
+    where = describe(("unix", server.server_address) if address[0] == "unix" else ("tcp", server.server_address[:2]))
+    console.print(f"repo-miner serve escutando em {where} (Ctrl+C para encerrar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+@cache_app.command("stats")
+def cache_stats(
+    cache_dir: Optional[Path] = typer.Option(None, help="Diretório do cache HTTP (padrão: ~/.cache/repo-miner)"),
+):
+    """Mostra o número de entradas e o tamanho do cache por origem."""
+    stats = HttpCache(cache_dir).stats()
+    stats["mirrors"] = MirrorCache().stats()
+    console.print(json.dumps(stats, indent=2, ensure_ascii=False), soft_wrap=True)
+
+
+@cache_app.command("prune")
+def cache_prune(
+    cache_dir: Optional[Path] = typer.Option(None, help="Diretório do cache HTTP (padrão: ~/.cache/repo-miner)"),
+    max_mb: Optional[int] = typer.Option(None, min=0, help="Tamanho máximo após a limpeza (MB); remove as entradas menos usadas"),
+    pypi_ttl: int = typer.Option(DEFAULT_TTLS["pypi"], help="Validade (s) das respostas do PyPI no cache"),
+    osv_ttl: int = typer.Option(DEFAULT_TTLS["osv"], help="Validade (s) das respostas do OSV no cache"),
+    mirror_max_mb: int = typer.Option(DEFAULT_MIRROR_BYTES // (1024 * 1024), min=0, help="Tamanho máximo dos espelhos de repositórios (MB)"),
+    mirror_max_days: float = typer.Option(DEFAULT_MAX_AGE_DAYS, min=0, help="Remove espelhos sem uso há mais de N dias"),
+):
+    """Remove entradas vencidas e aplica o limite de tamanho do cache."""
+    cache = HttpCache(cache_dir, ttls={"pypi": pypi_ttl, "osv": osv_ttl})
+    removed = cache.prune(max_bytes=None if max_mb is None else max_mb * 1024 * 1024)
+    console.print(f"{removed} entradas removidas de {cache.path}")
+    mirrors = MirrorCache(max_bytes=mirror_max_mb * 1024 * 1024, max_age_days=mirror_max_days)
+    console.print(f"{mirrors.evict()} espelhos removidos de {mirrors.directory}")
+
+
+@db_app.command("import")
+def db_import(
+    osv_zip: Path = typer.Option(..., exists=True, dir_okay=False, help="Exportação all.zip do OSV (ecossistema PyPI)"),
+    pypi_snapshot: Optional[Path] = typer.Option(None, exists=True, dir_okay=False, help="JSON {pacote: [versões]} ou {pacote: última}"),
+    db: Optional[Path] = typer.Option(None, help="Arquivo do banco (padrão: ~/.cache/repo-miner/vulndb.sqlite3)"),
+):
+    """Importa dumps do OSV/PyPI para consultas de dependências sem rede."""
+    target = db or default_db_path()
+    stats = import_osv_zip(osv_zip, target, pypi_snapshot=pypi_snapshot)
+    console.print(f"Banco salvo em {target}: {stats['vulns']} vulnerabilidades, {stats['releases']} versões")
+
+
+@db_app.command("stats")
+def db_stats(
+    db: Optional[Path] = typer.Option(None, help="Arquivo do banco (padrão: ~/.cache/repo-miner/vulndb.sqlite3)"),
+):
+    """Mostra o conteúdo do banco offline."""
+    vulndb = _open_vulndb(db or default_db_path(), offline=True)
+    console.print(json.dumps(vulndb.stats(), indent=2), soft_wrap=True)
+
+
 if __name__ == "__main__":
     app() 
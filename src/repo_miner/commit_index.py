@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .activity import CommitRecord, _parse_git_record, iter_git_log
+from .cache import default_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    ident TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    is_merge INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commits_ts ON commits (ts);
+"""
+_BATCH = 5000
+
+
+def default_index_dir() -> Path:
+    return default_cache_dir() / "activity-index"
+
+
+def _git(repo_path: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", repo_path, *args], capture_output=True, text=True)
+
+
+class CommitIndex:
+    """Índice persistente dos commits alcançáveis a partir do HEAD de um repositório.
+
+    Guarda um registro compacto por commit (sha, data do committer, autor, merge) em um
+    SQLite por repositório. :meth:`update` só percorre os commits novos desde a última
+    execução; se o HEAD anterior não for ancestral do atual (force-push, rebase, troca
+    de branch), o índice é reconstruído.
+    """
+
+    def __init__(self, repo_path: str, directory: Optional[Path] = None):
+        self.repo_path = repo_path
+        git_dir = _git(repo_path, "rev-parse", "--absolute-git-dir")
+        if git_dir.returncode != 0:
+            raise RuntimeError(f"não é um repositório git: {repo_path}")
+        key = hashlib.sha1(os.path.realpath(git_dir.stdout.strip()).encode("utf-8")).hexdigest()[:16]
+        self.directory = Path(directory) if directory else default_index_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{key}.sqlite3"
+        # o ``repo-miner serve`` reusa o índice aberto em threads diferentes (um job por vez)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._authors: Dict[str, int] = dict(self._conn.execute("SELECT ident, id FROM authors"))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _author_id(self, ident: str) -> int:
+        aid = self._authors.get(ident)
+        if aid is None:
+            aid = self._conn.execute("INSERT INTO authors (ident) VALUES (?)", (ident,)).lastrowid
+            self._authors[ident] = aid
+        return aid
+
+    def _head(self) -> Optional[str]:
+        r = _git(self.repo_path, "rev-parse", "--verify", "-q", "HEAD")
+        return r.stdout.strip() if r.returncode == 0 else None
+
+    def _is_ancestor(self, old: str, new: str) -> bool:
+        return _git(self.repo_path, "merge-base", "--is-ancestor", old, new).returncode == 0
+
+    def _clear(self) -> None:
+        self._conn.execute("DELETE FROM commits")
+        self._conn.execute("DELETE FROM authors")
+        self._conn.execute("DELETE FROM meta")
+        self._authors.clear()
+
+    def _ingest(self, rev_args: List[str]) -> int:
+        added = 0
+        batch = []
+        for raw in iter_git_log(self.repo_path, ["--reverse", *rev_args]):
+            rec = _parse_git_record(raw)
+            batch.append((rec.sha, int(rec.committed_at.timestamp()), self._author_id(rec.author), int(rec.is_merge)))
+            if len(batch) >= _BATCH:
+                self._conn.executemany("INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?)", batch)
+                added += len(batch)
+                batch = []
+        self._conn.executemany("INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?)", batch)
+        return added + len(batch)
+
+    def update(self) -> Dict[str, object]:
+        """Sincroniza o índice com o HEAD atual. Retorna o modo usado e quantos commits entraram."""
+        head = self._head()
+        old = self._meta("head")
+        with self._conn:
+            if head is None:
+                self._clear()
+                return {"mode": "empty", "added": 0, "head": None}
+            if old == head:
+                return {"mode": "noop", "added": 0, "head": head}
+            if old and self._is_ancestor(old, head):
+                mode = "incremental"
+                added = self._ingest([head, f"^{old}"])
+            else:
+                mode = "rebuild" if old else "full"
+                self._clear()
+                added = self._ingest([head])
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('head', ?)", (head,))
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('repo_path', ?)", (os.path.abspath(self.repo_path),))
+        return {"mode": mode, "added": added, "head": head}
+
+    def records(self, since: datetime, until: datetime) -> Iterator[CommitRecord]:
+        """Commits indexados com data do committer em ``[since, until]``, do mais antigo ao mais novo."""
+        rows = self._conn.execute(
+            "SELECT c.sha, c.ts, a.ident, c.is_merge FROM commits c JOIN authors a ON a.id = c.author_id"
+            " WHERE c.ts >= ? AND c.ts <= ? ORDER BY c.ts, c.rowid",
+            (int(since.timestamp()), int(until.timestamp())),
+        )
+        for sha, ts, ident, is_merge in rows:
+            yield CommitRecord(sha, datetime.fromtimestamp(ts, timezone.utc), ident, bool(is_merge))
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
@@ -4,18 +4,30 @@ import json
 import re
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Optional
-
-import requests
-import semver
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:  # Python 3.11+
     import tomllib as tomli  # type: ignore
 except Exception:  # pragma: no cover
     import tomli  # type: ignore
 
-OSV_QUERY_URL = "https://api.osv.dev/v1/query"
+from . import profiling, transport, versions
+from .cache import HttpCache, cached_get
+from .resolver import ConcurrentResolver
+from .transitive import DEFAULT_MAX_DEPTH
+from .transport import DEFAULT_CONCURRENCY, HttpClient
+from .vulndb import VulnDB
+
 PYPI_BASE = "https://pypi.org/pypi/{name}/json"
+# metadados de uma release específica (``requires_dist`` de versões antigas)
+PYPI_RELEASE_BASE = "https://pypi.org/pypi/{name}/{version}/json"
+# índice "simple" em JSON (PEP 691/700): só nomes de arquivos e versões, sem metadados por release
+PYPI_SIMPLE_BASE = "https://pypi.org/simple/{name}/"
+PYPI_SIMPLE_ACCEPT = "application/vnd.pypi.simple.v1+json"
+PYPI_APIS = ("json", "simple")
+SDIST_SUFFIXES = (".tar.gz", ".tar.bz2", ".tar.xz", ".zip")
+# manifestos lidos por collect_packages (caminhos relativos à raiz do projeto)
+MANIFEST_FILES = ("requirements.txt", "pyproject.toml")
 REQ_LINE = re.compile(r"^\s*([A-Za-z0-9_.\-]+)\s*(?:==\s*([A-Za-z0-9!+_.\-]+))?.*$")
 
 
@@ -25,7 +37,9 @@ class PackageInfo:
     current_version: Optional[str]
     latest_version: Optional[str]
     is_outdated: bool
-    vulnerabilities: List[Dict]
+    # None quando a consulta ao OSV falhou: resultado desconhecido, não "sem vulnerabilidades"
+    vulnerabilities: Optional[List[Dict]]
+    error: Optional[str] = None
 
     def to_dict(self) -> Dict:
         return asdict(self)
@@ -37,7 +51,8 @@ def _parse_requirements(path: Path) -> List[Dict[str, Optional[str]]]:
         return packages
     for line in path.read_text(encoding="utf-8").splitlines():
         line = line.strip()
-        if not line or line.startswith("#"):
+        # opções do pip (-r outro.txt, -e ., --hash=...) não são pacotes
+        if not line or line.startswith(("#", "-")):
             continue
         m = REQ_LINE.match(line)
         if not m:
@@ -75,74 +90,263 @@ def _parse_pyproject(path: Path) -> List[Dict[str, Optional[str]]]:
     return pkgs
 
 
-def _latest_pypi_version(name: str) -> Optional[str]:
+def _parse_poetry_lock(path: Path) -> List[Dict[str, Optional[str]]]:
+    data = tomli.loads(path.read_text(encoding="utf-8"))
+    return [{"name": p["name"], "version": p.get("version")} for p in data.get("package", []) if p.get("name")]
+
+
+def _parse_uv_lock(path: Path) -> List[Dict[str, Optional[str]]]:
+    data = tomli.loads(path.read_text(encoding="utf-8"))
+    pkgs: List[Dict[str, Optional[str]]] = []
+    for p in data.get("package", []):
+        source = p.get("source") or {}
+        # membros do próprio workspace (editable/virtual) não vêm do PyPI
+        if not p.get("name") or "editable" in source or "virtual" in source:
+            continue
+        pkgs.append({"name": p["name"], "version": p.get("version")})
+    return pkgs
+
+
+_PIPFILE_NON_PYPI_KEYS = ("path", "editable", "git", "hg", "svn", "bzr", "file")
+
+
+def _parse_pipfile_lock(path: Path) -> List[Dict[str, Optional[str]]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    pkgs: List[Dict[str, Optional[str]]] = []
+    for section in ("default", "develop"):
+        for name, meta in (data.get(section) or {}).items():
+            # caminhos locais, editáveis e repositórios VCS não vêm do PyPI
+            if isinstance(meta, dict) and any(k in meta for k in _PIPFILE_NON_PYPI_KEYS):
+                continue
+            ver = meta.get("version") if isinstance(meta, dict) else None
+            pkgs.append({"name": name, "version": ver.lstrip("=") if ver and ver.startswith("==") else None})
+    return pkgs
+
+
+def _latest_pypi_version(
+    name: str, client: Optional[HttpClient] = None, cache: Optional[HttpCache] = None, api: str = "json"
+) -> Optional[str]:
+    client = client or transport.get_client()
+    if api == "simple":
+        return _latest_pypi_version_simple(name, client, cache)
     url = PYPI_BASE.format(name=name)
-    r = requests.get(url, timeout=15)
-    if r.status_code != 200:
+    r = cached_get(cache, "pypi", url, lambda headers: client.get(url, timeout=15, headers=headers))
+    if _missing_on_pypi(r, name):
         return None
     data = r.json()
     # Prefer stable latest version in info.version; fall back scanning releases
     ver = data.get("info", {}).get("version")
     if ver:
         return ver
-    releases = data.get("releases", {})
-    versions = sorted(
-        [v for v in releases.keys() if not _is_prerelease(v)],
-        key=_semver_key,
-        reverse=True,
-    )
-    return versions[0] if versions else None
+    return versions.latest_stable(data.get("releases", {}).keys())
 
 
-def _is_prerelease(version: str) -> bool:
-    s = version.lower()
-    return any(tag in s for tag in ["a", "b", "rc", "dev"])
+def _missing_on_pypi(r, name: str) -> bool:
+    """``True`` se o pacote não existe no PyPI (404); outras respostas de erro levantam ``RuntimeError``.
 
+    Um 5xx que sobreviveu às retentativas não diz nada sobre o pacote e não pode virar
+    "sem última versão".
+    """
+    if r.status_code == 404:
+        return True
+    if r.status_code != 200:
+        raise RuntimeError(f"PyPI respondeu {r.status_code} para {name}")
+    return False
 
-def _semver_key(v: str):  # tolerate non-semver by fallback
-    try:
-        return semver.Version.parse(v)
-    except Exception:
-        # try loose parsing: split by dots
-        parts = re.split(r"[^0-9]+", v)
-        nums = [int(p) for p in parts if p.isdigit()]
-        while len(nums) < 3:
-            nums.append(0)
-        return tuple(nums[:3])
 
+def _file_version(filename: str) -> Optional[str]:
+    """Extrai a versão do nome de um arquivo de distribuição (wheel, egg ou sdist)."""
+    if filename.endswith((".whl", ".egg")):
+        parts = filename.split("-")
+        return parts[1] if len(parts) > 2 else None
+    for suffix in SDIST_SUFFIXES:
+        if filename.endswith(suffix):
+            stem = filename[: -len(suffix)]
+            return stem.rsplit("-", 1)[1] if "-" in stem else None
+    return None
 
-def _osv_query(name: str, version: Optional[str]) -> List[Dict]:
-    if not version:
-        return []
-    payload = {
-        "package": {"name": name, "ecosystem": "PyPI"},
-        "version": version,
-    }
-    r = requests.post(OSV_QUERY_URL, data=json.dumps(payload), headers={"Content-Type": "application/json"}, timeout=20)
-    if r.status_code != 200:
-        return []
+
+def _latest_pypi_version_simple(name: str, client: HttpClient, cache: Optional[HttpCache] = None) -> Optional[str]:
+    """Calcula a última versão estável a partir do índice Simple JSON do PyPI.
+
+    Descarta pré-releases e versões em que todos os arquivos foram retirados (yanked).
+    """
+    url = PYPI_SIMPLE_BASE.format(name=name)
+    r = cached_get(
+        cache, "pypi", url,
+        lambda headers: client.get(url, timeout=15, headers={"Accept": PYPI_SIMPLE_ACCEPT, **headers}),
+    )
+    if _missing_on_pypi(r, name):
+        return None
     data = r.json()
-    vulns = data.get("vulns") or data.get("vulnerabilities") or []
-    # Reduce noise
-    normalized = []
-    for v in vulns:
-        normalized.append({
-            "id": v.get("id"),
-            "summary": v.get("summary"),
-            "severity": v.get("severity"),
-            "aliases": v.get("aliases"),
-            "references": v.get("references"),
-        })
-    return normalized
-
-
-def analyze_dependencies(project_path: Path, offline: bool = False) -> Dict:
+    files_by_version: Dict[str, List[bool]] = {}
+    for f in data.get("files") or []:
+        ver = _file_version(f.get("filename", ""))
+        if ver:
+            files_by_version.setdefault(ver, []).append(bool(f.get("yanked")))
+    return versions.latest_stable(
+        v for v in data.get("versions") or list(files_by_version)
+        if not (files_by_version.get(v) and all(files_by_version[v]))
+    )
+
+
+def analyze_dependencies(
+    project_path: Path,
+    offline: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[HttpCache] = None,
+    pypi_api: str = "json",
+    vulndb: Optional[VulnDB] = None,
+    recursive: bool = False,
+    transitive: bool = False,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+) -> Dict:
     """Analisa dependências de um projeto Python.
 
     Procura por requirements.txt e pyproject.toml no caminho informado.
     Para cada pacote, compara versão com PyPI (se online) e consulta vulnerabilidades (OSV).
+    As consultas ao OSV são agrupadas em chamadas /v1/querybatch, e todas as consultas
+    rodam em paralelo com no máximo ``concurrency`` requisições simultâneas por servidor.
+    Com ``cache``, respostas do PyPI e do OSV são reaproveitadas entre execuções.
+    ``pypi_api="simple"`` usa o índice Simple JSON (PEP 691), bem mais leve que o JSON
+    completo do projeto, e calcula a última versão estável localmente.
+    Com ``vulndb`` (banco offline importado de dumps do OSV/PyPI), as consultas são
+    respondidas localmente, sem rede, mesmo com ``offline=True``.
+    Com ``recursive``, lê os manifestos e lockfiles de todos os subprojetos (monorepos);
+    cada versão fixada aparece uma vez, com os subprojetos que a usam em ``used_by``.
+    Com ``transitive``, inclui as dependências das dependências (até ``max_depth`` níveis,
+    a partir do ``requires_dist`` do PyPI); cada pacote traz ``depth`` e o relatório ganha
+    ``graph`` com a lista de adjacência (ver :meth:`repo_miner.transitive.DependencyGraph.to_dict`).
+    """
+    rows, graph = resolve_dependencies(
+        project_path, offline=offline, concurrency=concurrency, cache=cache, pypi_api=pypi_api, vulndb=vulndb,
+        recursive=recursive, transitive=transitive, max_depth=max_depth,
+    )
+    packages = list(rows)
+    report = {"summary": summarize_packages(packages), "packages": packages}
+    if graph is not None:
+        report["graph"] = graph
+    return report
+
+
+def iter_dependencies(
+    project_path: Path,
+    offline: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[HttpCache] = None,
+    pypi_api: str = "json",
+    vulndb: Optional[VulnDB] = None,
+    recursive: bool = False,
+    transitive: bool = False,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+) -> Iterator[Dict]:
+    """Versão em streaming de :func:`analyze_dependencies`: gera um dict por pacote.
+
+    As consultas são feitas antes da primeira linha (os lotes do OSV precisam de todos os
+    pares); as linhas em si são produzidas uma a uma, para exportação sem montar o relatório.
+    """
+    rows, _ = resolve_dependencies(
+        project_path, offline=offline, concurrency=concurrency, cache=cache, pypi_api=pypi_api, vulndb=vulndb,
+        recursive=recursive, transitive=transitive, max_depth=max_depth,
+    )
+    return rows
+
+
+def resolve_dependencies(
+    project_path: Path,
+    offline: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[HttpCache] = None,
+    pypi_api: str = "json",
+    vulndb: Optional[VulnDB] = None,
+    recursive: bool = False,
+    transitive: bool = False,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+) -> Tuple[Iterator[Dict], Optional[Dict]]:
+    """Faz todas as consultas e retorna (linhas por pacote, grafo ou ``None`` sem ``transitive``)."""
+    if pypi_api not in PYPI_APIS:
+        raise ValueError(f"pypi_api inválida: {pypi_api!r} (use {', '.join(PYPI_APIS)})")
+    if transitive and offline:
+        raise ValueError("o modo transitivo consulta os metadados do PyPI e não funciona offline")
+    with profiling.span("deps.parse_manifests", "deps", recursive=recursive):
+        by_name = collect_packages(project_path, recursive=recursive)
+
+    latest_by_name: Dict[str, Optional[str]] = {}
+    vulns_by_pair: Dict = {}
+    errors: Dict = {}
+    resolver = None
+    graph = None
+    if transitive:
+        resolver = ConcurrentResolver(concurrency=concurrency, cache=cache, pypi_api=pypi_api)
+        by_name, graph, latest_by_name, errors = _expand_transitive(by_name, resolver, max_depth)
+    profiling.count("packages", len(by_name))
+
+    if vulndb is not None:
+        with profiling.span("deps.resolve", "deps", source="vulndb"):
+            for m in by_name.values():
+                latest_by_name[m["name"]] = vulndb.latest_version(m["name"])
+                if m.get("version"):
+                    vulns_by_pair[(m["name"], m["version"])] = vulndb.vulnerabilities(m["name"], m["version"])
+    elif not offline:
+        resolver = resolver or ConcurrentResolver(concurrency=concurrency, cache=cache, pypi_api=pypi_api)
+        pairs = list(dict.fromkeys((m["name"], m.get("version")) for m in by_name.values()))
+        with profiling.span("deps.resolve", "deps", source="network"):
+            if transitive:
+                # as últimas versões já vieram junto com os metadados; falta só o OSV
+                _, vulns_by_pair, osv_errors = resolver.resolve(pairs, latest_for=[])
+                errors.update(osv_errors)
+            else:
+                latest_by_name, vulns_by_pair, errors = resolver.resolve(pairs)
+
+    rows = iter_packages(by_name, latest_by_name, vulns_by_pair, resolved=vulndb is not None or not offline, errors=errors)
+    return rows, graph
+
+
+def _expand_transitive(
+    by_name: Dict[str, Dict[str, Optional[str]]], resolver: ConcurrentResolver, max_depth: int
+) -> Tuple[Dict[str, Dict], Dict, Dict[str, Optional[str]], Dict]:
+    """Acrescenta a ``by_name`` os nós transitivos (chave ``nome==versão``, com ``depth``).
+
+    Retorna também as falhas de metadados do PyPI, com as chaves de ``errors`` de
+    :func:`iter_packages` (nome ou par nome/versão de cada pacote, diretos ou transitivos).
     """
-    project_path = project_path.resolve()
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .transitive import MetadataStore, expand, node_id
+    from .vulndb import normalize_name
+
+    store = MetadataStore(resolver.client, resolver.cache)
+    with ThreadPoolExecutor(max_workers=resolver.concurrency) as pool:
+        graph = expand(((m["name"], m.get("version")) for m in by_name.values()), store, pool, max_depth)
+    packages = {key: {**meta, "depth": 0} for key, meta in by_name.items()}
+    direct = {(normalize_name(m["name"]), m.get("version")) for m in by_name.values()}
+    for name, version, depth in graph.nodes():
+        key = node_id(name, version)
+        if depth == 0 or (name, version) in direct or key in packages:
+            continue
+        packages[key] = {"name": name, "version": version, "depth": depth}
+    latest = {m["name"]: store.latest(m["name"]) for m in packages.values()}
+    errors: Dict = {}
+    for m in packages.values():
+        name, version = normalize_name(m["name"]), m.get("version")
+        if name in store.errors:
+            errors[m["name"]] = store.errors[name]
+        if (name, version) in store.errors:
+            errors[(m["name"], version)] = store.errors[(name, version)]
+    return packages, graph.to_dict(), latest, errors
+
+
+def collect_packages(project_path: Path, recursive: bool = False) -> Dict[str, Dict[str, Optional[str]]]:
+    """Lê os manifestos do projeto e retorna os pacotes por nome em minúsculas (só parse, sem rede).
+
+    Com ``recursive``, varre todos os subprojetos (ver :func:`repo_miner.manifests.scan_packages`);
+    as chaves passam a ser ``nome==versão`` e cada pacote traz ``used_by``.
+    """
+    project_path = Path(project_path).resolve()
+    if recursive:
+        from .manifests import scan_packages
+
+        return scan_packages(project_path)
     reqs = _parse_requirements(project_path / "requirements.txt")
     pyproj = _parse_pyproject(project_path / "pyproject.toml")
 
@@ -150,39 +354,64 @@ def analyze_dependencies(project_path: Path, offline: bool = False) -> Dict:
     by_name: Dict[str, Dict[str, Optional[str]]] = {}
     for p in reqs + pyproj:
         by_name[p["name"].lower()] = p
+    return by_name
 
-    packages: List[PackageInfo] = []
+
+def iter_packages(
+    by_name: Dict[str, Dict[str, Optional[str]]],
+    latest_by_name: Dict[str, Optional[str]],
+    vulns_by_pair: Dict,
+    resolved: bool = True,
+    errors: Optional[Dict] = None,
+) -> Iterator[Dict]:
+    """Gera as linhas de pacote a partir das versões/vulnerabilidades já resolvidas.
+
+    Com ``resolved=False`` (modo offline sem banco), os pacotes saem sem última versão.
+    ``errors`` (por nome ou por par nome/versão, ver
+    :meth:`~repo_miner.resolver.ConcurrentResolver.resolve`) vai para o campo ``error``.
+    """
+    errors = errors or {}
     for key, meta in sorted(by_name.items()):
         name = meta["name"]
         cur = meta.get("version")
-        if offline:
-            packages.append(PackageInfo(name=name, current_version=cur, latest_version=None, is_outdated=False, vulnerabilities=[]))
+        extra = {k: meta[k] for k in ("used_by", "depth") if k in meta}
+        if not resolved:
+            yield {**PackageInfo(name=name, current_version=cur, latest_version=None, is_outdated=False, vulnerabilities=[]).to_dict(), **extra}
             continue
-        latest = None
-        vulns: List[Dict] = []
-        try:
-            latest = _latest_pypi_version(name)
-        except Exception:
-            latest = None
-        try:
-            vulns = _osv_query(name, cur)
-        except Exception:
-            vulns = []
-        is_outdated = False
-        if cur and latest:
-            try:
-                is_outdated = _semver_key(latest) > _semver_key(cur)
-            except Exception:
-                is_outdated = latest != cur
-        packages.append(PackageInfo(name=name, current_version=cur, latest_version=latest, is_outdated=is_outdated, vulnerabilities=vulns))
-
-    summary = {
-        "packages_total": len(packages),
-        "outdated_total": sum(1 for p in packages if p.is_outdated),
-        "vulnerable_total": sum(1 for p in packages if p.vulnerabilities),
-    }
-
-    return {
-        "summary": summary,
-        "packages": [p.to_dict() for p in packages],
-    }
+        latest = latest_by_name.get(name)
+        vulns: Optional[List[Dict]] = vulns_by_pair.get((name, cur), []) if cur else []
+        is_outdated = bool(cur and latest) and versions.is_newer(latest, cur)
+        problems = [errors[k] for k in (name, (name, cur)) if k in errors]
+        if vulns is None and not any(p.startswith("OSV") for p in problems):
+            problems.append("OSV: consulta falhou")
+        yield {
+            **PackageInfo(
+                name=name, current_version=cur, latest_version=latest, is_outdated=is_outdated, vulnerabilities=vulns,
+                error="; ".join(problems) or None,
+            ).to_dict(),
+            **extra,
+        }
+
+
+def summarize_packages(packages: Iterable[Dict]) -> Dict[str, int]:
+    """Totais do relatório em uma única passada (aceita um iterador)."""
+    summary = {"packages_total": 0, "outdated_total": 0, "vulnerable_total": 0, "unknown_total": 0}
+    for p in packages:
+        summary["packages_total"] += 1
+        summary["outdated_total"] += bool(p.get("is_outdated"))
+        summary["vulnerable_total"] += bool(p.get("vulnerabilities"))
+        # consulta ao PyPI/OSV falhou: o pacote não pode contar como atualizado ou sem vulnerabilidades
+        summary["unknown_total"] += bool(p.get("error"))
+    return summary
+
+
+def build_report(
+    by_name: Dict[str, Dict[str, Optional[str]]],
+    latest_by_name: Dict[str, Optional[str]],
+    vulns_by_pair: Dict,
+    resolved: bool = True,
+    errors: Optional[Dict] = None,
+) -> Dict:
+    """Monta o relatório de dependências completo (ver :func:`iter_packages`)."""
+    packages = list(iter_packages(by_name, latest_by_name, vulns_by_pair, resolved=resolved, errors=errors))
+    return {"summary": summarize_packages(packages), "packages": packages}
@@ -1,28 +1,124 @@
 import csv
 import json
+import os
+import tempfile
 from pathlib import Path
-from typing import Any, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from . import profiling
 
 
 def export_json(data: Any, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
+    with profiling.span("export.json", "export", path=str(path)), path.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def export_csv(rows: Iterable[dict], path: Path) -> None:
-    rows_list: List[dict] = list(rows)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if not rows_list:
-        path.write_text("", encoding="utf-8")
-        return
-    # union of keys across rows for consistent columns
-    headers = set()
-    for r in rows_list:
-        headers.update(r.keys())
-    headers = sorted(headers)
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        for r in rows_list:
-            writer.writerow(r)
+def export_csv(rows: Iterable[dict], path: Path, fieldnames: Optional[Sequence[str]] = None) -> int:
+    """Grava ``rows`` em CSV sem carregar todas as linhas na memória (ver :class:`CsvWriter`)."""
+    with profiling.span("export.csv", "export", path=str(path)):
+        with CsvWriter(path, fieldnames) as writer:
+            for r in rows:
+                writer.write(r)
+    return writer.count
+
+
+def export_ndjson(rows: Iterable[dict], path: Path) -> int:
+    """Grava um objeto JSON por linha à medida que ``rows`` é consumido."""
+    with profiling.span("export.ndjson", "export", path=str(path)):
+        with NdjsonWriter(path) as writer:
+            for r in rows:
+                writer.write(r)
+    return writer.count
+
+
+class NdjsonWriter:
+    """Escreve linhas NDJSON (JSON Lines) uma a uma, sem acumular nada em memória."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._f = self.path.open("w", encoding="utf-8")
+
+    def write(self, row: dict) -> None:
+        self._f.write(json.dumps(row, ensure_ascii=False))
+        self._f.write("\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._f.close()
+        profiling.count("export_rows", self.count)
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CsvWriter:
+    """Escreve CSV linha a linha.
+
+    Com ``fieldnames`` declarado, cada linha vai direto para o arquivo (chaves fora do
+    esquema geram ``ValueError``). Sem esquema, as linhas são despejadas em um arquivo
+    temporário NDJSON enquanto a união das colunas é calculada; ao fechar, o CSV é
+    gerado a partir dele com as colunas em ordem alfabética. Em ambos os casos a memória
+    usada não depende do número de linhas.
+    """
+
+    def __init__(self, path: Path, fieldnames: Optional[Sequence[str]] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fieldnames: Optional[List[str]] = list(fieldnames) if fieldnames is not None else None
+        self.count = 0
+        self._headers: Dict[str, None] = {}
+        if self.fieldnames is not None:
+            self._f = self.path.open("w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._f, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+        else:
+            fd, spill = tempfile.mkstemp(prefix=".spill-", suffix=".ndjson", dir=str(self.path.parent))
+            self._spill = Path(spill)
+            self._f = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write(self, row: dict) -> None:
+        if self.fieldnames is not None:
+            self._writer.writerow(row)
+        else:
+            self._headers.update(dict.fromkeys(row))
+            self._f.write(json.dumps(row, ensure_ascii=False, default=str))
+            self._f.write("\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._f.close()
+        profiling.count("export_rows", self.count)
+        if self.fieldnames is not None:
+            return
+        try:
+            if not self.count:
+                self.path.write_text("", encoding="utf-8")
+                return
+            with profiling.span("export.csv_spill", "export", rows=self.count):
+                with self._spill.open(encoding="utf-8") as src, self.path.open("w", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=sorted(self._headers))
+                    writer.writeheader()
+                    for line in src:
+                        writer.writerow(json.loads(line))
+        finally:
+            self._spill.unlink()
+
+    def __enter__(self) -> "CsvWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def tee_rows(rows: Iterable[dict], writers: Sequence[Any]) -> Iterator[dict]:
+    """Repassa cada linha para os ``writers`` à medida que ela é consumida."""
+    for row in rows:
+        for w in writers:
+            w.write(row)
+        yield row
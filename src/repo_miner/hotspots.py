@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import codecs
+import heapq
+import re
+import subprocess
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from . import profiling
+from .activity import _FIELD_SEP, _RECORD_SEP, _author_ident, _repository_mining, iter_git_log
+
+SORT_KEYS = ("churn", "commits", "authors")
+DEFAULT_TOP = 20
+COLUMNS = ("path", "churn", "lines_added", "lines_deleted", "commits", "authors", "last_commit")
+# começa cada registro com o separador: as linhas do --numstat vêm depois dos campos
+_NUMSTAT_FORMAT = _RECORD_SEP + _FIELD_SEP.join(["%H", "%ct", "%ae", "%an", "%P"]) + _FIELD_SEP
+# "dir/{antigo => novo}/arq" ou "antigo => novo", como o git mostra renomeações no --numstat
+_RENAME_BRACES = re.compile(r"^(?P<pre>.*)\{(?P<old>[^{}]*) => (?P<new>[^{}]*)\}(?P<post>.*)$")
+
+
+class FileChange(NamedTuple):
+    path: str
+    added: int
+    deleted: int
+    old_path: Optional[str] = None
+
+
+class CommitChanges(NamedTuple):
+    """Um commit (não merge) e os arquivos que ele alterou."""
+
+    committed_at: datetime
+    author: str
+    files: List[FileChange]
+
+
+def _unquote(path: str) -> str:
+    # caminhos com caracteres especiais ou não ASCII vêm entre aspas, com escapes no estilo C
+    if len(path) > 1 and path[0] == path[-1] == '"':
+        return codecs.escape_decode(path[1:-1].encode("utf-8"))[0].decode("utf-8", errors="replace")
+    return path
+
+
+def _split_rename(path: str) -> Tuple[str, Optional[str]]:
+    m = _RENAME_BRACES.match(path)
+    if m:
+        # "{a => }/x.py": o lado vazio deixa uma barra sobrando
+        new = f"{m.group('pre')}{m.group('new')}{m.group('post')}".replace("//", "/").lstrip("/")
+        old = f"{m.group('pre')}{m.group('old')}{m.group('post')}".replace("//", "/").lstrip("/")
+        return new, old
+    if " => " in path:
+        old, new = path.split(" => ", 1)
+        return _unquote(new), _unquote(old)
+    return _unquote(path), None
+
+
+def _parse_numstat(raw: str) -> Optional[CommitChanges]:
+    _, ts, email, name, parents, rest = raw.lstrip("\n").split(_FIELD_SEP, 5)
+    if len(parents.split()) > 1:
+        return None
+    files = []
+    for line in rest.splitlines():
+        added, sep, tail = line.partition("\t")
+        if not sep:
+            continue
+        deleted, _, path = tail.partition("\t")
+        new, old = _split_rename(path)
+        # arquivos binários aparecem como "-\t-": contam o commit, mas não linhas
+        files.append(FileChange(new, int(added) if added.isdigit() else 0, int(deleted) if deleted.isdigit() else 0, old))
+    return CommitChanges(datetime.fromtimestamp(int(ts), timezone.utc), _author_ident(email, name), files)
+
+
+def _git_changes(repo_path: str, since: datetime, to: datetime) -> Iterator[CommitChanges]:
+    args = ["HEAD", "--reverse", "--numstat", "-M", f"--since={since.isoformat()}", f"--until={to.isoformat()}"]
+    for raw in iter_git_log(repo_path, args, fmt=_NUMSTAT_FORMAT):
+        change = _parse_numstat(raw)
+        if change is not None:
+            yield change
+
+
+def _pydriller_changes(repo_path: str, since: datetime, to: datetime) -> Iterator[CommitChanges]:
+    for commit in _repository_mining()(path_to_repo=repo_path, since=since, to=to).traverse_commits():
+        if len(getattr(commit, "parents", None) or []) > 1:
+            continue
+        cdate = commit.committer_date
+        if cdate.tzinfo is None:
+            cdate = cdate.replace(tzinfo=timezone.utc)
+        files = [
+            FileChange(m.new_path or m.old_path, m.added_lines, m.deleted_lines,
+                       m.old_path if m.old_path and m.new_path and m.old_path != m.new_path else None)
+            for m in commit.modified_files
+        ]
+        yield CommitChanges(cdate, _author_ident(commit.author.email, commit.author.name), files)
+
+
+BACKENDS: Dict[str, Callable[[str, datetime, datetime], Iterator[CommitChanges]]] = {
+    "git": _git_changes,
+    "pydriller": _pydriller_changes,
+}
+
+
+_METRICS: Dict[str, Callable[[List[Any]], int]] = {
+    "churn": lambda e: e[0] + e[1],
+    "commits": lambda e: e[2],
+    "authors": lambda e: len(e[4]),
+}
+
+
+class ChurnAggregator:
+    """Agregados por arquivo (linhas, commits, autores distintos, último commit), atualizados commit a commit.
+
+    A memória é proporcional ao número de caminhos alterados na janela, não ao de commits:
+    cada caminho guarda quatro números e o conjunto dos ids dos seus autores. Commits devem
+    chegar do mais antigo ao mais novo para que renomeações levem o histórico do caminho
+    antigo para o novo.
+    """
+
+    def __init__(self):
+        self.commits_total = 0
+        self._authors: Dict[str, int] = {}
+        # caminho -> [linhas adicionadas, removidas, commits, último commit (ts), {ids de autores}]
+        self.files: Dict[str, List[Any]] = {}
+
+    def add(self, change: CommitChanges) -> None:
+        self.commits_total += 1
+        author = self._authors.setdefault(change.author, len(self._authors))
+        ts = int(change.committed_at.timestamp())
+        for f in change.files:
+            entry = self.files.get(f.path)
+            if f.old_path is not None and f.old_path in self.files:
+                moved = self.files.pop(f.old_path)
+                if entry is not None:
+                    moved[0] += entry[0]
+                    moved[1] += entry[1]
+                    moved[2] += entry[2]
+                    moved[3] = max(moved[3], entry[3])
+                    moved[4] |= entry[4]
+                entry = self.files[f.path] = moved
+            if entry is None:
+                entry = self.files[f.path] = [0, 0, 0, 0, set()]
+            entry[0] += f.added
+            entry[1] += f.deleted
+            entry[2] += 1
+            entry[3] = max(entry[3], ts)
+            entry[4].add(author)
+
+    def top(self, n: int, sort: str = "churn", keep: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Os ``n`` arquivos com maior ``sort`` (empates pelo churn e pelo caminho), só entre ``keep`` se informado."""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"ordenação inválida: {sort!r} (use {', '.join(SORT_KEYS)})")
+        metric = _METRICS[sort]
+
+        def key(item):
+            entry = item[1]
+            return -metric(entry), -(entry[0] + entry[1]), item[0]
+
+        items = self.files.items() if keep is None else ((p, e) for p, e in self.files.items() if p in keep)
+        return [
+            {
+                "path": path,
+                "churn": added + deleted,
+                "lines_added": added,
+                "lines_deleted": deleted,
+                "commits": commits,
+                "authors": len(authors),
+                "last_commit": datetime.fromtimestamp(last, timezone.utc).date().isoformat(),
+            }
+            for path, (added, deleted, commits, last, authors) in heapq.nsmallest(n, items, key=key)
+        ]
+
+
+def tracked_files(repo_path: str) -> Set[str]:
+    """Caminhos presentes no HEAD (funciona também em espelhos bare)."""
+    r = subprocess.run(["git", "-C", repo_path, "ls-tree", "-r", "-z", "--name-only", "HEAD"], capture_output=True)
+    if r.returncode != 0:
+        return set()
+    return set(r.stdout.decode("utf-8", errors="replace").split("\0")) - {""}
+
+
+def analyze_hotspots(
+    repo_path: str,
+    since_days: int = 365,
+    top: int = DEFAULT_TOP,
+    sort: str = "churn",
+    backend: str = "git",
+    include_deleted: bool = False,
+) -> Dict[str, Any]:
+    """Arquivos com mais churn (linhas adicionadas + removidas), commits ou autores na janela.
+
+    ``backend="git"`` lê um único ``git log --numstat`` em streaming; ``pydriller`` usa os
+    ``modified_files`` de cada commit (bem mais lento). Merges não contam, pois só repetem
+    as mudanças dos seus pais. Renomeações levam o histórico para o novo caminho. Sem
+    ``include_deleted``, só entram arquivos que ainda existem no HEAD.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend inválido: {backend!r} (use {', '.join(BACKENDS)})")
+    if sort not in SORT_KEYS:
+        raise ValueError(f"ordenação inválida: {sort!r} (use {', '.join(SORT_KEYS)})")
+    now = datetime.now(timezone.utc)
+    aggregator = ChurnAggregator()
+    with profiling.span("hotspots.traverse", "activity", backend=backend):
+        for change in BACKENDS[backend](repo_path, now - timedelta(days=since_days), now):
+            aggregator.add(change)
+    profiling.count("commits_seen", aggregator.commits_total)
+    keep = None if include_deleted else tracked_files(repo_path)
+    return {
+        "since_days": since_days,
+        "sort": sort,
+        "commits_total": aggregator.commits_total,
+        "files_total": len(aggregator.files) if keep is None else sum(1 for p in aggregator.files if p in keep),
+        "hotspots": aggregator.top(top, sort, keep),
+    }
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import deps
+from .vulndb import normalize_name
+
+# diretórios que nunca contêm manifestos do projeto
+PRUNE_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".tox", ".nox", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", "site-packages",
+})
+DEFAULT_SCAN_WORKERS = 8
+
+_Rule = Tuple[str, str, bool, bool, bool]  # (base, padrão, negação, só diretório, ancorado)
+
+
+def _parser_for(rel: str) -> Optional[Callable[[Path], List[Dict[str, Optional[str]]]]]:
+    """Parser do manifesto em ``rel`` (caminho POSIX relativo à raiz), ou None."""
+    path = PurePosixPath(rel)
+    name = path.name
+    if name == "pyproject.toml":
+        return deps._parse_pyproject
+    if name == "poetry.lock":
+        return deps._parse_poetry_lock
+    if name == "uv.lock":
+        return deps._parse_uv_lock
+    if name == "Pipfile.lock":
+        return deps._parse_pipfile_lock
+    if name.endswith(".txt") and (name.startswith("requirements") or path.parent.name == "requirements"):
+        return deps._parse_requirements
+    return None
+
+
+def is_manifest(rel: str) -> bool:
+    return _parser_for(rel) is not None
+
+
+def is_tracked_manifest(rel: str) -> bool:
+    """Manifesto fora de diretórios podados (para listas de arquivos vindas do git)."""
+    parts = rel.split("/")
+    return is_manifest(rel) and not any(is_pruned_dir(p) for p in parts[:-1])
+
+
+def subproject_of(rel: str) -> str:
+    """Subprojeto dono do manifesto: o diretório dele (``requirements/*.txt`` conta para o pai)."""
+    parent = PurePosixPath(rel).parent
+    if parent.name == "requirements":
+        parent = parent.parent
+    return str(parent)
+
+
+def is_pruned_dir(name: str) -> bool:
+    return name in PRUNE_DIRS
+
+
+def _read_gitignore(directory: Path, base: str) -> List[_Rule]:
+    path = directory / ".gitignore"
+    if not path.is_file():
+        return []
+    rules: List[_Rule] = []
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line.startswith("**/") and "/" not in line[3:]:
+            line = line[3:]
+        # com "/" no início ou no meio, o padrão é relativo ao diretório do .gitignore
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line:
+            rules.append((base, line, negate, dir_only, anchored))
+    return rules
+
+
+def _ignored(rel: str, is_dir: bool, rules: List[_Rule]) -> bool:
+    """Aplica as regras de .gitignore (suporte simplificado: fnmatch, ``!``, ``/`` final e inicial)."""
+    ignored = False
+    for base, pattern, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not rel.startswith(base + "/"):
+                continue
+            sub = rel[len(base) + 1:]
+        else:
+            sub = rel
+        target = sub if anchored else sub.rsplit("/", 1)[-1]
+        if fnmatch.fnmatchcase(target, pattern):
+            ignored = not negate
+    return ignored
+
+
+def _scan_dir(root: Path, rel: str, rules: List[_Rule]) -> Tuple[List[str], List[Tuple[str, List[_Rule]]]]:
+    directory = root / rel if rel else root
+    rules = rules + _read_gitignore(directory, rel)
+    manifests: List[str] = []
+    subdirs: List[Tuple[str, List[_Rule]]] = []
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return manifests, subdirs
+    for entry in entries:
+        child = f"{rel}/{entry.name}" if rel else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if is_pruned_dir(entry.name) or _ignored(child, True, rules):
+                continue
+            if os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):  # virtualenv com outro nome
+                continue
+            subdirs.append((child, rules))
+        elif entry.is_file() and is_manifest(child) and not _ignored(child, False, rules):
+            manifests.append(child)
+    return manifests, subdirs
+
+
+def find_manifests(root: Path, workers: int = DEFAULT_SCAN_WORKERS) -> List[str]:
+    """Lista (ordenada) os manifestos sob ``root``, percorrendo os diretórios em paralelo.
+
+    Ignora ``.git``, virtualenvs (inclusive os detectados por ``pyvenv.cfg``),
+    ``node_modules`` e caches, e respeita os ``.gitignore`` encontrados no caminho.
+    """
+    root = Path(root)
+    found: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {pool.submit(_scan_dir, root, "", [])}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                manifests, subdirs = fut.result()
+                found.extend(manifests)
+                pending.update(pool.submit(_scan_dir, root, rel, rules) for rel, rules in subdirs)
+    return sorted(found)
+
+
+def _parse_manifest(root: Path, rel: str) -> List[Dict[str, Optional[str]]]:
+    try:
+        return _parser_for(rel)(root / rel)
+    except Exception:  # manifesto ilegível não derruba a varredura do monorepo
+        return []
+
+
+def scan_packages(root: Path, workers: int = DEFAULT_SCAN_WORKERS) -> Dict[str, Dict]:
+    """Pacotes de todos os manifestos sob ``root``, deduplicados por versão fixada.
+
+    Dentro de cada subprojeto, lockfiles prevalecem sobre o pyproject, que prevalece sobre
+    requirements, mas uma versão fixada nunca é trocada por uma declaração sem versão.
+    O resultado tem uma entrada por (nome, versão), com ``used_by`` listando os
+    subprojetos que a usam, para que cada par seja resolvido na rede uma única vez.
+    """
+    root = Path(root)
+    manifests = find_manifests(root, workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        parsed = list(pool.map(lambda rel: _parse_manifest(root, rel), manifests))
+
+    order = {"requirements": 0, "pyproject": 1, "lock": 2}
+    by_project: Dict[str, Dict[str, Dict[str, Optional[str]]]] = {}
+    ranked = sorted(zip(manifests, parsed), key=lambda mp: order[_kind(mp[0])])
+    for rel, pkgs in ranked:
+        project = by_project.setdefault(subproject_of(rel), {})
+        for p in pkgs:
+            key = normalize_name(p["name"])
+            # versão fixada não é sobrescrita por uma declaração sem versão
+            if p.get("version") or not (project.get(key) or {}).get("version"):
+                project[key] = p
+
+    packages: Dict[str, Dict] = {}
+    for project in sorted(by_project):
+        for p in by_project[project].values():
+            name = normalize_name(p["name"])
+            key = f"{name}=={p['version']}" if p.get("version") else name
+            entry = packages.setdefault(key, {"name": p["name"], "version": p.get("version"), "used_by": []})
+            entry["used_by"].append(project)
+    return packages
+
+
+def _kind(rel: str) -> str:
+    name = PurePosixPath(rel).name
+    if name == "pyproject.toml":
+        return "pyproject"
+    if name.endswith(".lock"):
+        return "lock"
+    return "requirements"
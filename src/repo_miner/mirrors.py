@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+try:  # bloqueio entre processos (ex.: batch); indisponível no Windows
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+from .cache import default_cache_dir
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+_META = "repo-miner.json"
+_USED = "repo-miner-used"
+# despejo automático no máximo uma vez por intervalo (s), marcado por este arquivo no diretório dos espelhos
+DEFAULT_EVICT_INTERVAL = 3600
+_EVICTED = ".repo-miner-evicted"
+# só branches e tags, que é o que a análise lê (ver ``activity.ALL_REFS``): um ``--mirror``
+# traria também ``refs/pull/*`` e afins, milhares de heads de PR em repositórios populares
+_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+_REFS_LAYOUT = "heads+tags"
+
+
+def is_remote(target: str) -> bool:
+    return target.startswith(("http://", "https://", "ssh://", "git@", "file://"))
+
+
+def normalize_url(url: str) -> str:
+    """Forma canônica da URL: esquema/host em minúsculas, sem credenciais, ``.git`` ou ``/`` final."""
+    url = url.strip()
+    m = re.match(r"^git@([^:]+):(.+)$", url)
+    if m:  # sintaxe scp do ssh
+        url = f"ssh://git@{m.group(1)}/{m.group(2)}"
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    if parts.username and parts.scheme == "ssh":
+        host = f"{parts.username}@{host}"
+    path = re.sub(r"/+$", "", parts.path)
+    path = re.sub(r"\.git$", "", path)
+    return urlunsplit((parts.scheme.lower(), host, path, "", ""))
+
+
+def default_mirror_dir() -> Path:
+    return default_cache_dir() / "mirrors"
+
+
+def _git(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True)
+
+
+def _restrict_refs(path: Path) -> None:
+    """Grava ``_REFSPECS`` na configuração do remoto e apaga as refs fora delas (espelhos antigos)."""
+    _git("-C", str(path), "config", "--unset-all", "remote.origin.fetch")
+    _git("-C", str(path), "config", "--unset-all", "remote.origin.mirror")
+    for spec in _REFSPECS:
+        _git("-C", str(path), "config", "--add", "remote.origin.fetch", spec)
+    refs = _git("-C", str(path), "for-each-ref", "--format=%(refname)").stdout.splitlines()
+    stale = "".join(f"delete {ref}\n" for ref in refs if not ref.startswith(("refs/heads/", "refs/tags/")))
+    if stale:
+        subprocess.run(["git", "-C", str(path), "update-ref", "--stdin"], input=stale, capture_output=True, text=True)
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for p in path.rglob("*"):
+        try:
+            if p.is_file() and not p.is_symlink():
+                total += p.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def shallow_clone(url: str, dest: Path, filter_spec: str = "tree:0") -> None:
+    """Clone bare de profundidade 1 e parcial (padrão: sem árvores nem blobs).
+
+    Só o commit do HEAD é baixado; o que o filtro excluir vem sob demanda ao ser lido.
+    """
+    r = _git("clone", "--quiet", "--bare", "--depth", "1", f"--filter={filter_spec}", url, str(dest))
+    if r.returncode != 0:
+        raise RuntimeError(f"falha ao clonar {url}: {r.stderr.strip()}")
+
+
+def _tree_blobs(repo: Path, rev: str = "HEAD") -> Dict[str, str]:
+    """ID do blob de cada arquivo em ``rev`` (precisa das árvores, não dos blobs)."""
+    r = subprocess.run(["git", "-C", str(repo), "ls-tree", "-r", "-z", rev], capture_output=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"falha ao listar arquivos de {repo}: {r.stderr.decode('utf-8', 'replace').strip()}")
+    blobs: Dict[str, str] = {}
+    for entry in r.stdout.split(b"\0"):
+        meta, sep, path = entry.partition(b"\t")
+        fields = meta.split()
+        if sep and len(fields) == 3 and fields[1] == b"blob":
+            blobs[path.decode("utf-8", "surrogateescape")] = fields[2].decode("ascii")
+    return blobs
+
+
+def list_files(repo: Path, rev: str = "HEAD") -> List[str]:
+    """Caminhos de todos os arquivos em ``rev`` (não precisa dos blobs)."""
+    return list(_tree_blobs(repo, rev))
+
+
+def _select(repo: Path, paths: Union[Sequence[str], Callable[[str], bool]], rev: str = "HEAD") -> List[Tuple[str, str]]:
+    """Pares (caminho, objeto pedido ao ``cat-file``).
+
+    Com um filtro, os objetos são pedidos pelo ID listado no ``ls-tree``, o que aceita qualquer
+    nome de arquivo. Caminhos explícitos usam ``rev:caminho`` (dispensa as árvores em clones
+    ``tree:0``); um caminho com quebra de linha não cabe no protocolo e é omitido.
+    """
+    if callable(paths):
+        return [(p, oid) for p, oid in _tree_blobs(repo, rev).items() if paths(p)]
+    return [(p, f"{rev}:{p}") for p in paths if "\n" not in p]
+
+
+def read_files(repo: Path, paths: Union[Sequence[str], Callable[[str], bool]], rev: str = "HEAD") -> Dict[str, bytes]:
+    """Conteúdo dos ``paths`` (ou dos arquivos aceitos pelo filtro) em ``rev``; ausentes são omitidos.
+
+    Usa ``git cat-file --batch``; em clones parciais, o git busca no remoto apenas os
+    objetos efetivamente lidos.
+    """
+    requests = _select(repo, paths, rev)
+    batch = "".join(f"{spec}\n" for _, spec in requests).encode("utf-8", "surrogateescape")
+    r = subprocess.run(
+        ["git", "-C", str(repo), "cat-file", "--batch=%(objectname) %(objecttype) %(objectsize)"],
+        input=batch, capture_output=True,
+    )
+    if r.returncode != 0:
+        raise RuntimeError(f"falha ao ler arquivos de {repo}: {r.stderr.decode('utf-8', 'replace').strip()}")
+    out = r.stdout
+    files: Dict[str, bytes] = {}
+    pos = 0
+    for path, _ in requests:
+        end = out.index(b"\n", pos)
+        header = out[pos:end].split(b" ")
+        pos = end + 1
+        # objeto ausente: o git repete a entrada (que pode ter espaços) seguida de "missing"
+        if header[-1] in (b"missing", b"ambiguous") or len(header) != 3:
+            continue
+        size = int(header[2])
+        if header[1] == b"blob":
+            files[path] = out[pos:pos + size]
+        pos += size + 1  # árvore ou outro objeto: conteúdo descartado
+    return files
+
+
+class MirrorCache:
+    """Espelhos locais (bare, parciais) de repositórios remotos, reaproveitados entre execuções.
+
+    Cada URL normalizada vira um ``git clone --bare --filter=blob:none`` em
+    ``~/.cache/repo-miner/mirrors``, que acompanha só branches e tags: o histórico completo
+    de commits e árvores, mas sem o conteúdo dos arquivos, que o git busca sob demanda. Nas execuções seguintes o espelho
+    só recebe um ``git fetch`` incremental. Espelhos sem uso há mais de ``max_age_days``
+    são removidos, e os menos usados saem até o total caber em ``max_bytes``. Como medir
+    os espelhos percorre todos os arquivos, :meth:`mirror` só faz esse despejo uma vez a
+    cada ``evict_interval`` segundos (entre processos); ``cache prune`` o faz sempre.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        evict_interval: float = DEFAULT_EVICT_INTERVAL,
+    ):
+        self.directory = Path(directory) if directory else default_mirror_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.evict_interval = evict_interval
+
+    def path_for(self, url: str) -> Path:
+        norm = normalize_url(url)
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "-", norm.split("://", 1)[-1]).strip("-")[-60:]
+        key = hashlib.sha1(norm.encode("utf-8")).hexdigest()[:12]
+        return self.directory / f"{slug}-{key}.git"
+
+    @contextmanager
+    def _locked(self, path: Path, blocking: bool = True) -> Iterator[bool]:
+        lock_path = path.with_name(path.name + ".lock")
+        with lock_path.open("w") as f:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def mirror(self, url: str) -> Path:
+        """Garante um espelho atualizado de ``url`` e retorna o caminho do repositório bare."""
+        path = self.path_for(url)
+        with self._locked(path):
+            if (path / _META).exists():
+                meta = json.loads((path / _META).read_text(encoding="utf-8"))
+                if meta.get("refs") != _REFS_LAYOUT:  # espelho criado com --mirror
+                    _restrict_refs(path)
+                    (path / _META).write_text(json.dumps({**meta, "refs": _REFS_LAYOUT}), encoding="utf-8")
+                r = _git("-C", str(path), "fetch", "--quiet", "--prune", "origin")
+                if r.returncode != 0:
+                    raise RuntimeError(f"falha ao atualizar o espelho de {url}: {r.stderr.strip()}")
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+                tmp = Path(tempfile.mkdtemp(prefix=".clone-", dir=str(self.directory)))
+                r = _git("clone", "--quiet", "--bare", "--filter=blob:none", url, str(tmp / "repo.git"))
+                if r.returncode != 0:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    raise RuntimeError(f"falha ao clonar {url}: {r.stderr.strip()}")
+                _restrict_refs(tmp / "repo.git")
+                (tmp / "repo.git" / _META).write_text(
+                    json.dumps({"url": normalize_url(url), "refs": _REFS_LAYOUT}), encoding="utf-8"
+                )
+                (tmp / "repo.git").rename(path)
+                shutil.rmtree(tmp, ignore_errors=True)
+            (path / _USED).touch()
+        self._evict_if_due(keep=path)
+        return path
+
+    def _evict_if_due(self, keep: Optional[Path] = None) -> None:
+        stamp = self.directory / _EVICTED
+        try:
+            if time.time() - stamp.stat().st_mtime < self.evict_interval:
+                return
+        except FileNotFoundError:
+            pass
+        stamp.touch()
+        self.evict(keep=keep)
+
+    @contextmanager
+    def manifest_tree(
+        self, url: str, paths: Union[Sequence[str], Callable[[str], bool]], mirror: Optional[Path] = None
+    ) -> Iterator[Path]:
+        """Diretório temporário só com os arquivos ``paths`` do HEAD de ``url`` (removido ao sair).
+
+        Usa o espelho já existente (atualizado, ou ``mirror`` se o chamador acabou de
+        atualizá-lo); sem espelho, faz um clone raso sem árvores nem blobs e lê só os
+        arquivos pedidos com ``git cat-file``, o que custa poucos KB de transferência.
+        ``paths`` também pode ser um filtro aplicado a todos os arquivos do HEAD; nesse
+        caso o clone raso traz as árvores (``--filter=blob:none``) para listar os caminhos.
+        """
+        tmp = Path(tempfile.mkdtemp(prefix="repo_miner_manifests_"))
+        try:
+            if mirror is None and (self.path_for(url) / _META).exists():
+                mirror = self.mirror(url)
+            if mirror is not None:
+                with self._locked(mirror):
+                    files = read_files(mirror, paths)
+            else:
+                clone = tmp / "repo.git"
+                shallow_clone(url, clone, filter_spec="blob:none" if callable(paths) else "tree:0")
+                files = read_files(clone, paths)
+                shutil.rmtree(clone, ignore_errors=True)
+            tree = tmp / "tree"
+            tree.mkdir()
+            for rel, content in files.items():
+                (tree / rel).parent.mkdir(parents=True, exist_ok=True)
+                (tree / rel).write_bytes(content)
+            yield tree
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def entries(self) -> List[Dict]:
+        result = []
+        for path in self.directory.glob("*.git"):
+            meta = path / _META
+            if not meta.exists():
+                continue
+            used = path / _USED
+            result.append({
+                "path": path,
+                "url": json.loads(meta.read_text(encoding="utf-8")).get("url"),
+                "last_used": used.stat().st_mtime if used.exists() else meta.stat().st_mtime,
+                "bytes": _dir_size(path),
+            })
+        return result
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Remove espelhos vencidos e, em seguida, os menos usados até caber no limite."""
+        entries = sorted(self.entries(), key=lambda e: e["last_used"])
+        cutoff = time.time() - self.max_age_days * 86400
+        total = sum(e["bytes"] for e in entries)
+        removed = 0
+        for e in entries:
+            if e["path"] == keep:
+                continue
+            if e["last_used"] >= cutoff and total <= self.max_bytes:
+                continue
+            with self._locked(e["path"], blocking=False) as acquired:
+                if not acquired:  # em uso por outro processo
+                    continue
+                shutil.rmtree(e["path"], ignore_errors=True)
+            total -= e["bytes"]
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        entries = self.entries()
+        return {
+            "path": str(self.directory),
+            "mirrors": len(entries),
+            "bytes": sum(e["bytes"] for e in entries),
+        }
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import Executor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import profiling, transport
+from .cache import HttpCache, cached_get, get_json, put_json
+from .transport import HttpClient
+
+OSV_QUERYBATCH_URL = "https://api.osv.dev/v1/querybatch"
+OSV_VULN_URL = "https://api.osv.dev/v1/vulns/{id}"
+# limite documentado da API para o número de consultas por chamada de querybatch
+QUERYBATCH_MAX = 1000
+
+Pair = Tuple[str, str]
+
+
+def normalize_vuln(v: Dict) -> Dict:
+    """Reduz um registro OSV aos campos exibidos no relatório."""
+    return {
+        "id": v.get("id"),
+        "summary": v.get("summary"),
+        "severity": v.get("severity"),
+        "aliases": v.get("aliases"),
+        "references": v.get("references"),
+    }
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _map(executor: Optional[Executor], fn, items: List) -> List:
+    if executor is None:
+        return [fn(item) for item in items]
+    return list(executor.map(fn, items))
+
+
+def _post_batch(queries: List[Dict], client: HttpClient) -> List[Dict]:
+    with profiling.span("osv.querybatch", "osv", queries=len(queries)):
+        r = client.post(
+            OSV_QUERYBATCH_URL,
+            data=json.dumps({"queries": queries}),
+            headers={"Content-Type": "application/json"},
+            timeout=30,
+        )
+    if r.status_code != 200:
+        return []
+    return r.json().get("results") or []
+
+
+def query_batch(
+    pairs: Iterable[Pair],
+    chunk_size: int = QUERYBATCH_MAX,
+    client: Optional[HttpClient] = None,
+    executor: Optional[Executor] = None,
+    cache: Optional[HttpCache] = None,
+) -> Dict[Pair, Optional[List[str]]]:
+    """Consulta os IDs de vulnerabilidades de vários pares (nome, versão) via /v1/querybatch.
+
+    Pares repetidos são enviados uma única vez. Resultados paginados (``next_page_token``)
+    são reconsultados até o fim. Se o lote de um par falhar (mesmo depois das retentativas
+    do cliente), o par fica com ``None``, e não com uma lista vazia: "sem resposta" não pode
+    virar "sem vulnerabilidades".
+    Com ``executor``, os lotes são enviados em paralelo. Com ``cache``, pares consultados
+    recentemente não são reenviados.
+    """
+    client = client or transport.get_client()
+    unique: List[Pair] = list(dict.fromkeys(p for p in pairs if p[1]))
+    ids: Dict[Pair, List[str]] = {}
+    pending: List[Tuple[Pair, Optional[str]]] = []
+    for p in unique:
+        cached = get_json(cache, _pair_key(p))
+        ids[p] = list(cached) if cached is not None else []
+        if cached is None:
+            pending.append((p, None))
+    failed = set()
+
+    def run(chunk: List[Tuple[Pair, Optional[str]]]) -> Optional[List[Dict]]:
+        queries = []
+        for (name, version), token in chunk:
+            q: Dict = {"package": {"name": name, "ecosystem": "PyPI"}, "version": version}
+            if token:
+                q["page_token"] = token
+            queries.append(q)
+        try:
+            return _post_batch(queries, client)
+        except Exception:
+            return None
+
+    queried = [p for p, _ in pending]
+    while pending:
+        next_pending: List[Tuple[Pair, Optional[str]]] = []
+        chunks = list(_chunks(pending, chunk_size))
+        for chunk, results in zip(chunks, _map(executor, run, chunks)):
+            if results is None or len(results) != len(chunk):
+                failed.update(pair for pair, _ in chunk)
+                results = results or []
+            for (pair, _), res in zip(chunk, results):
+                for v in res.get("vulns") or []:
+                    if v.get("id") and v["id"] not in ids[pair]:
+                        ids[pair].append(v["id"])
+                token = res.get("next_page_token")
+                if token:
+                    next_pending.append((pair, token))
+        pending = next_pending
+    for pair in queried:
+        if pair not in failed:
+            put_json(cache, "osv", _pair_key(pair), ids[pair])
+    return {pair: (None if pair in failed else found) for pair, found in ids.items()}
+
+
+def _pair_key(pair: Pair) -> str:
+    return f"osv:query:{pair[0].lower()}=={pair[1]}"
+
+
+def fetch_vuln(vuln_id: str, client: Optional[HttpClient] = None, cache: Optional[HttpCache] = None) -> Optional[Dict]:
+    client = client or transport.get_client()
+    url = OSV_VULN_URL.format(id=vuln_id)
+    with profiling.span("osv.vuln", "osv", id=vuln_id):
+        r = cached_get(cache, "osv", url, lambda headers: client.get(url, timeout=20, headers=headers))
+    if r.status_code != 200:
+        return None
+    return r.json()
+
+
+def hydrate(
+    vuln_ids: Iterable[str],
+    client: Optional[HttpClient] = None,
+    executor: Optional[Executor] = None,
+    cache: Optional[HttpCache] = None,
+) -> Dict[str, Dict]:
+    """Busca os detalhes de cada ID distinto uma única vez e devolve-os normalizados.
+
+    Se a busca de um ID falhar, mantém-se ao menos o ID, para que o pacote continue
+    marcado como vulnerável.
+    """
+    def run(vid: str) -> Dict:
+        try:
+            data = fetch_vuln(vid, client, cache)
+        except Exception:
+            data = None
+        return normalize_vuln(data or {"id": vid})
+
+    unique = list(dict.fromkeys(vuln_ids))
+    return dict(zip(unique, _map(executor, run, unique)))
+
+
+def lookup(
+    pairs: Iterable[Pair],
+    chunk_size: int = QUERYBATCH_MAX,
+    client: Optional[HttpClient] = None,
+    executor: Optional[Executor] = None,
+    cache: Optional[HttpCache] = None,
+) -> Dict[Pair, Optional[List[Dict]]]:
+    """Retorna as vulnerabilidades normalizadas de cada par (nome, versão); ``None`` se a consulta falhou."""
+    ids = query_batch(pairs, chunk_size=chunk_size, client=client, executor=executor, cache=cache)
+    details = hydrate((vid for vids in ids.values() for vid in vids or []), client=client, executor=executor, cache=cache)
+    return {pair: None if vids is None else [details[vid] for vid in vids] for pair, vids in ids.items()}
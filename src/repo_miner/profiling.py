@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:  # pico de memória do processo; indisponível no Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+
+class Profiler:
+    """Coleta intervalos de tempo (spans) e contadores de uma execução.
+
+    Thread-safe: as etapas de ``analyze`` e as consultas ao PyPI/OSV rodam em threads.
+    Os spans são guardados como eventos completos do formato de trace do Chrome, que
+    também é lido pelo Perfetto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self.threads: Dict[int, str] = {}
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            thread = threading.current_thread()
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round((start - self._origin) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": thread.ident,
+            }
+            if args:
+                event["args"] = args
+            with self._lock:
+                self.events.append(event)
+                self.threads[thread.ident] = thread.name
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> Dict[str, Any]:
+        """Tempo por nome de span (chamadas, total e máximo em segundos), contadores e pico de RSS."""
+        spans: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        for e in events:
+            s = spans.setdefault(e["name"], {"name": e["name"], "cat": e["cat"], "calls": 0, "total_s": 0.0, "max_s": 0.0})
+            s["calls"] += 1
+            s["total_s"] += e["dur"] / 1e6
+            s["max_s"] = max(s["max_s"], e["dur"] / 1e6)
+        rows = sorted(spans.values(), key=lambda s: s["total_s"], reverse=True)
+        for s in rows:
+            s["total_s"] = round(s["total_s"], 4)
+            s["max_s"] = round(s["max_s"], 4)
+        return {"spans": rows, "counters": counters, "peak_rss_bytes": peak_rss_bytes()}
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace no formato JSON do Chrome (``chrome://tracing``, https://ui.perfetto.dev)."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+            counters = dict(self.counters)
+        meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "repo-miner"}}]
+        meta += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in threads.items()]
+        end = round((time.perf_counter() - self._origin) * 1e6, 1)
+        tail = [{"name": "counters", "ph": "C", "ts": end, "pid": pid, "tid": 0, "args": counters}] if counters else []
+        return {
+            "traceEvents": meta + sorted(events, key=lambda e: e["ts"]) + tail,
+            "displayTimeUnit": "ms",
+            "otherData": {"peak_rss_bytes": peak_rss_bytes()},
+        }
+
+    def write_trace(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Pico de memória residente do processo, ou None se a plataforma não informar."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS, em bytes
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+_active: Optional[Profiler] = None
+
+
+def start() -> Profiler:
+    """Ativa a coleta no processo; :func:`span` e :func:`count` passam a registrar."""
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def stop() -> Optional[Profiler]:
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+@contextmanager
+def span(name: str, cat: str = "stage", **args: Any) -> Iterator[None]:
+    """Mede o bloco se houver coleta ativa; caso contrário não custa quase nada."""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.span(name, cat, **args):
+        yield
+
+
+def count(name: str, amount: int = 1) -> None:
+    profiler = _active
+    if profiler is not None:
+        profiler.count(name, amount)
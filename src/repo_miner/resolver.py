@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from . import profiling
+from .transport import DEFAULT_CONCURRENCY, HttpClient
+
+# chave de erro: nome do pacote (PyPI) ou par (nome, versão) (OSV)
+ErrorKey = Union[str, Tuple[str, str]]
+
+
+class ConcurrentResolver:
+    """Resolve versões no PyPI e vulnerabilidades no OSV com paralelismo limitado.
+
+    As consultas compartilham um único pool de threads de tamanho ``concurrency`` e
+    um :class:`~repo_miner.transport.HttpClient`, que limita as conexões por servidor
+    e reduz o paralelismo quando o servidor responde 429/503.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        cache=None,
+        client: Optional[HttpClient] = None,
+        pypi_api: str = "json",
+    ):
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.pypi_api = pypi_api
+        self.client = client or HttpClient(max_per_host=self.concurrency)
+
+    def resolve(
+        self, packages: Iterable[Tuple[str, Optional[str]]], latest_for: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, Optional[str]], Dict[Tuple[str, str], Optional[List[Dict]]], Dict[ErrorKey, str]]:
+        """Retorna (última versão por nome, vulnerabilidades por par nome/versão, erros).
+
+        ``latest_for`` restringe a busca da última versão a esses nomes (padrão: todos).
+        Consultas que falharam, mesmo depois das retentativas, não viram resultado "limpo":
+        o par fica com vulnerabilidades ``None`` e a falha vai para ``erros``, por par
+        (OSV) ou por nome (PyPI; a última versão fica ``None``).
+        """
+        from . import deps, osv
+
+        packages = list(packages)
+        names = list(dict.fromkeys(name for name, _ in packages) if latest_for is None else dict.fromkeys(latest_for))
+        pairs = [(name, ver) for name, ver in packages if ver]
+
+        errors: Dict[ErrorKey, str] = {}
+
+        def latest(name: str) -> Optional[str]:
+            with profiling.span("pypi.latest", "pypi", package=name):
+                try:
+                    return deps._latest_pypi_version(name, client=self.client, cache=self.cache, api=self.pypi_api)
+                except Exception as e:
+                    errors[name] = f"PyPI: {type(e).__name__}: {e}"
+                    return None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {name: pool.submit(latest, name) for name in names}
+            try:
+                with profiling.span("osv.lookup", "osv", pairs=len(pairs)):
+                    vulns = osv.lookup(pairs, client=self.client, executor=pool, cache=self.cache)
+            except Exception as e:
+                vulns = {p: None for p in pairs}
+                reason = f"OSV: {type(e).__name__}: {e}"
+            else:
+                reason = "OSV: consulta falhou"
+            for pair in pairs:
+                if vulns.get(pair, []) is None:
+                    errors[pair] = reason
+            latest_by_name = {name: fut.result() for name, fut in futures.items()}
+        return latest_by_name, vulns, errors
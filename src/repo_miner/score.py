@@ -0,0 +1,17 @@
+from typing import Dict
+
+
+def maintenance_score(activity: Dict, deps: Dict) -> int:
+    """Score simples de 0 a 100 baseado em atividade e desatualização."""
+    commits = activity.get("commits_total", 0)
+    days_since_last = activity.get("days_since_last_commit", 9999)
+    if "packages" in deps:
+        outdated = sum(1 for p in deps["packages"] if p.get("is_outdated"))
+    else:  # relatório em streaming: só o resumo fica em memória
+        outdated = deps.get("summary", {}).get("outdated_total", 0)
+
+    score = 50
+    score += min(30, commits // 10)
+    score += max(0, 20 - min(20, days_since_last))
+    score -= min(30, outdated * 5)
+    return max(0, min(100, score))
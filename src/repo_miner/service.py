@@ -0,0 +1,528 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import itertools
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from .cache import default_cache_dir
+from .mirrors import MirrorCache, is_remote
+
+KINDS = ("activity", "deps", "analyze")
+DEFAULT_WORKERS = 4
+DEFAULT_RESULT_TTL = 300
+DEFAULT_PACKAGE_TTL = 3600
+_MAX_FINISHED_JOBS = 1000
+# prazo (s) com que o servidor espera um job antes de responder 504, quando o cliente não informa outro
+DEFAULT_WAIT_TIMEOUT = 3600
+# segredo compartilhado: exigido em toda requisição quando definido, obrigatório fora do loopback
+TOKEN_ENV = "REPO_MINER_SERVER_TOKEN"
+# tamanho máximo do corpo de uma requisição (um job é um JSON pequeno)
+_MAX_BODY = 1024 * 1024
+
+Address = Tuple[str, Union[str, Tuple[str, int]]]
+
+
+def default_socket_path() -> Path:
+    return default_cache_dir() / "serve.sock"
+
+
+def parse_address(value: Union[str, Path]) -> Address:
+    """``unix:/caminho``, ``http://host:porta``, ``host:porta`` ou o caminho de um socket Unix."""
+    value = str(value)
+    if value.startswith("unix:"):
+        return ("unix", value[len("unix:"):])
+    if value.startswith("http://"):
+        value = value[len("http://"):].rstrip("/")
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit() and "/" not in value:
+        return ("tcp", (host or "127.0.0.1", int(port)))
+    return ("unix", value)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str = "queued"
+    result: Any = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "kind": self.kind, "status": self.status}
+        if self.status == "done":
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class AnalysisService:
+    """Estado quente do ``repo-miner serve``, compartilhado por todos os jobs.
+
+    - um pool de ``workers`` threads executa os jobs (atividade, dependências, análise);
+    - cada repositório local mantém aberto o seu :class:`~repo_miner.commit_index.CommitIndex`,
+      que só lê do git os commits novos;
+    - as versões e vulnerabilidades já resolvidas ficam no memo de um
+      :class:`~repo_miner.batch.FleetResolver` (renovado a cada ``package_ttl`` segundos),
+      e as conexões HTTP com PyPI/OSV continuam abertas entre jobs;
+    - o resultado de cada job é guardado por HEAD (atividade) ou pelo estado dos
+      manifestos (dependências) e reaproveitado por ``result_ttl`` segundos, já que
+      métricas como ``days_since_last_commit`` dependem da data atual.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        resolver=None,
+        vulndb=None,
+        result_ttl: float = DEFAULT_RESULT_TTL,
+        package_ttl: float = DEFAULT_PACKAGE_TTL,
+        index_dir: Optional[Path] = None,
+        mirrors: Optional[MirrorCache] = None,
+    ):
+        from .batch import FleetResolver
+
+        self.fleet = FleetResolver(resolver=resolver, vulndb=vulndb)
+        self.result_ttl = result_ttl
+        self.package_ttl = package_ttl
+        self.index_dir = index_dir
+        self._mirrors = mirrors
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="repo-miner-job")
+        self._lock = threading.Lock()
+        self._fleet_lock = threading.Lock()
+        self._fleet_since = time.monotonic()
+        self._repo_locks: Dict[str, threading.Lock] = {}
+        self._indexes: Dict[str, Any] = {}
+        self._results: Dict[Tuple, Tuple[float, Any]] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self.counters = {"jobs": 0, "failed": 0, "result_hits": 0, "result_misses": 0}
+
+    @property
+    def mirrors(self) -> MirrorCache:
+        if self._mirrors is None:
+            self._mirrors = MirrorCache()
+        return self._mirrors
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        for index in self._indexes.values():
+            index.close()
+
+    # ---- jobs ----
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Job:
+        if kind not in KINDS:
+            raise ValueError(f"tipo de job inválido: {kind!r} (use {', '.join(KINDS)})")
+        job = Job(id=str(next(self._ids)), kind=kind, params=dict(params or {}))
+        if not job.params.get("repo"):
+            raise ValueError("parâmetro obrigatório ausente: repo")
+        with self._lock:
+            self._jobs[job.id] = job
+            self.counters["jobs"] += 1
+            finished = [j for j in self._jobs.values() if j.done.is_set()]
+            for old in finished[: max(0, len(finished) - _MAX_FINISHED_JOBS)]:
+                del self._jobs[old.id]
+        self._pool.submit(self._run, job)
+        return job
+
+    def job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        try:
+            job.result = getattr(self, f"_{job.kind}")(**job.params)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self.counters["failed"] += 1
+        finally:
+            job.finished = time.time()
+            job.done.set()
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            counters = dict(self.counters)
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "jobs_pending": sum(1 for j in jobs if not j.done.is_set()),
+            "repos": len(self._indexes),
+            "results_cached": len(self._results),
+            "packages_memo": len(self.fleet.latest),
+            **counters,
+        }
+
+    # ---- memo de resultados ----
+
+    def _cached(self, key: Tuple) -> Any:
+        with self._lock:
+            hit = self._results.get(key)
+            if hit is not None and time.monotonic() - hit[0] < self.result_ttl:
+                self.counters["result_hits"] += 1
+                return hit[1]
+            self.counters["result_misses"] += 1
+            return None
+
+    def _store(self, key: Tuple, value: Any) -> Any:
+        if (value.get("summary") or {}).get("unknown_total"):
+            return value  # relatório com consultas que falharam: o próximo job consulta de novo
+        with self._lock:
+            now = time.monotonic()
+            self._results = {k: v for k, v in self._results.items() if now - v[0] < self.result_ttl}
+            self._results[key] = (now, value)
+        return value
+
+    @contextmanager
+    def _repo_lock(self, path: str) -> Iterator[None]:
+        with self._lock:
+            lock = self._repo_locks.setdefault(path, threading.Lock())
+        with lock:
+            yield
+
+    # ---- tipos de job ----
+
+    def _history_path(self, repo: str) -> str:
+        return str(self.mirrors.mirror(repo)) if is_remote(repo) else os.path.realpath(repo)
+
+    def _activity(self, repo: str, since_days: int = 365) -> Dict[str, Any]:
+        from .activity import aggregate_activity
+        from .commit_index import CommitIndex
+
+        path = self._history_path(repo)
+        with self._repo_lock(path):
+            index = self._indexes.get(path)
+            if index is None:
+                index = self._indexes[path] = CommitIndex(path, self.index_dir)
+            head = index.update()["head"]
+            key = ("activity", path, head, int(since_days))
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            now = datetime.now(timezone.utc)
+            result = aggregate_activity(index.records(now - timedelta(days=int(since_days)), now), now)
+        return self._store(key, result)
+
+    def _deps(self, repo: str, offline: bool = False, recursive: bool = False) -> Dict[str, Any]:
+        from .deps import MANIFEST_FILES, build_report, collect_packages
+        from .manifests import is_tracked_manifest
+
+        with ExitStack() as stack:
+            if is_remote(repo):
+                mirror = self.mirrors.mirror(repo)
+                state = _git_head(mirror)
+                files = None
+            else:
+                files = os.path.realpath(repo)
+                state = _manifest_fingerprint(Path(files), recursive)
+            key = ("deps", repo if files is None else files, state, bool(offline), bool(recursive))
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            if files is None:
+                wanted = is_tracked_manifest if recursive else MANIFEST_FILES
+                files = stack.enter_context(self.mirrors.manifest_tree(repo, wanted, mirror=mirror))
+            by_name = collect_packages(Path(files), recursive=recursive)
+            if offline and self.fleet.vulndb is None:
+                report = build_report(by_name, {}, {}, resolved=False)
+            else:
+                report = self._resolve(by_name)
+        return self._store(key, report)
+
+    def _resolve(self, by_name: Dict[str, Dict[str, Optional[str]]]) -> Dict[str, Any]:
+        # o memo da frota não é thread-safe; a resolução de cada job já é paralela por dentro
+        with self._fleet_lock:
+            if time.monotonic() - self._fleet_since > self.package_ttl:
+                self.fleet.latest.clear()
+                self.fleet.vulns.clear()
+                self._fleet_since = time.monotonic()
+            return self.fleet.report(by_name)
+
+    def _analyze(self, repo: str, since_days: int = 365, offline: bool = False, recursive: bool = False) -> Dict[str, Any]:
+        from .score import maintenance_score
+        from .stages import run_stages
+
+        started = time.perf_counter()
+        results, timings = run_stages({
+            "activity": lambda: self._activity(repo, since_days=since_days),
+            "dependencies": lambda: self._deps(repo, offline=offline, recursive=recursive),
+        })
+        timings = {f"{name}_s": secs for name, secs in timings.items()}
+        timings["total_s"] = round(time.perf_counter() - started, 3)
+        activity, deps = results["activity"], results["dependencies"]
+        return {
+            "activity": activity,
+            "dependencies": deps,
+            "maintenance_score": maintenance_score(activity, deps),
+            "timings": timings,
+        }
+
+
+def _git_head(path: Union[str, Path]) -> Optional[str]:
+    import subprocess
+
+    r = subprocess.run(["git", "-C", str(path), "rev-parse", "--verify", "-q", "HEAD"], capture_output=True, text=True)
+    return r.stdout.strip() if r.returncode == 0 else None
+
+
+def _manifest_fingerprint(root: Path, recursive: bool) -> str:
+    """Resumo (caminho, tamanho, mtime) dos manifestos; muda quando algum deles é editado."""
+    from .deps import MANIFEST_FILES
+    from .manifests import find_manifests
+
+    paths = find_manifests(root) if recursive else [p for p in MANIFEST_FILES if (root / p).is_file()]
+    digest = hashlib.sha1()
+    for rel in paths:
+        st = (root / rel).stat()
+        digest.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ---- servidor HTTP ----
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _authorized(self) -> bool:
+        token = self.server.token  # type: ignore[attr-defined]
+        if not token:
+            return True
+        given = self.headers.get("Authorization") or ""
+        if hmac.compare_digest(given.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return True
+        length = self._content_length()
+        if 0 <= length <= _MAX_BODY:
+            # descarta sem interpretar, para o cliente não receber EPIPE antes de ler o 401
+            self.rfile.read(length)
+        else:
+            self.close_connection = True
+        self._send(401, {"error": "token ausente ou inválido"})
+        return False
+
+    def _content_length(self) -> int:
+        """``Content-Length`` da requisição (0 se ausente, -1 se inválido)."""
+        try:
+            return int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return -1
+
+    def _read_body(self) -> Optional[Dict[str, Any]]:
+        """Corpo JSON (objeto) da requisição; responde 400/413 e retorna ``None`` se for inválido."""
+        length = self._content_length()
+        if length < 0 or length > _MAX_BODY:
+            self.close_connection = True
+            self._send(413 if length > _MAX_BODY else 400, {"error": "Content-Length inválido ou grande demais"})
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            self._send(400, {"error": "JSON inválido: esperado um objeto"})
+            return None
+        return body
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        if self.path == "/health":
+            return self._send(200, self.service.health())
+        if self.path.startswith("/jobs/"):
+            job = self.service.job(self.path[len("/jobs/"):])
+            if job is None:
+                return self._send(404, {"error": "job não encontrado"})
+            return self._send(200, job.to_dict())
+        self._send(404, {"error": "rota não encontrada"})
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        body = self._read_body()
+        if body is None:
+            return
+        if self.path == "/shutdown":
+            self._send(200, {"status": "stopping"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != "/jobs":
+            return self._send(404, {"error": "rota não encontrada"})
+        params, timeout = body.get("params"), body.get("timeout")
+        if params is not None and not isinstance(params, dict):
+            return self._send(400, {"error": "params deve ser um objeto"})
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout < 0):
+            return self._send(400, {"error": "timeout deve ser um número de segundos >= 0"})
+        try:
+            job = self.service.submit(body.get("kind", ""), params)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        if not body.get("wait", True):
+            return self._send(202, job.to_dict())
+        if not job.done.wait(DEFAULT_WAIT_TIMEOUT if timeout is None else timeout):
+            return self._send(504, {**job.to_dict(), "error": f"job {job.id} não terminou no prazo"})
+        self._send(200, job.to_dict())
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class _UnixHandler(_Handler):
+    disable_nagle_algorithm = False  # TCP_NODELAY não existe em sockets Unix
+
+    def setup(self) -> None:
+        # conexões Unix não têm endereço de cliente; o BaseHTTPRequestHandler espera uma tupla
+        self.client_address = ("local", 0)
+        super().setup()
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def make_server(address: Address, service: AnalysisService, token: Optional[str] = None) -> socketserver.BaseServer:
+    """Cria (sem iniciar) o servidor HTTP do serviço em um socket Unix ou TCP.
+
+    Com ``token``, toda requisição (inclusive ``/shutdown``) precisa de ``Authorization: Bearer <token>``.
+    Sem token, o TCP só é aceito em endereço de loopback: o serviço lê qualquer caminho local e pode ser encerrado.
+    """
+    kind, where = address
+    if kind == "tcp" and not token and not _is_loopback(where[0]):
+        raise RuntimeError(f"{where[0]} não é loopback; defina {TOKEN_ENV} (ou --token) para escutar fora da máquina")
+    if kind == "unix":
+        path = Path(where)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if _is_listening(address):
+                raise RuntimeError(f"já existe um serviço escutando em {path}")
+            path.unlink()  # socket órfão de uma execução anterior
+        server = _UnixHTTPServer(str(path), _UnixHandler)
+    else:
+        server = ThreadingHTTPServer(where, _Handler)
+        server.daemon_threads = True
+    server.service = service  # type: ignore[attr-defined]
+    server.token = token  # type: ignore[attr-defined]
+    return server
+
+
+def describe(address: Address) -> str:
+    kind, where = address
+    return f"unix:{where}" if kind == "unix" else f"http://{where[0]}:{where[1]}"
+
+
+def _is_listening(address: Address) -> bool:
+    try:
+        request(address, "GET", "/health", timeout=1)
+        return True
+    except OSError:
+        return False
+
+
+# ---- cliente ----
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._path)
+        self.sock = sock
+
+
+def request(
+    address: Address,
+    method: str,
+    path: str,
+    body: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    token: Optional[str] = None,
+) -> Tuple[int, Dict[str, Any]]:
+    """Uma requisição ao serviço; retorna (status HTTP, corpo JSON). Erros de conexão viram ``OSError``.
+
+    ``token`` padrão: a variável de ambiente ``REPO_MINER_SERVER_TOKEN``.
+    """
+    kind, where = address
+    conn = _UnixConnection(where, timeout) if kind == "unix" else http.client.HTTPConnection(*where, timeout=timeout)
+    token = token if token is not None else os.environ.get(TOKEN_ENV)
+    try:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        conn.request(method, path, body=payload, headers=headers)
+        r = conn.getresponse()
+        return r.status, json.loads(r.read() or b"{}")
+    finally:
+        conn.close()
+
+
+def run_remote(address: Union[str, Address], kind: str, params: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    """Executa um job no serviço e espera o resultado. Falhas do job viram ``RuntimeError``."""
+    if isinstance(address, str):
+        address = parse_address(address)
+    if "repo" in params and not is_remote(params["repo"]):
+        params = {**params, "repo": os.path.abspath(params["repo"])}  # o serviço tem outro diretório atual
+    payload = {"kind": kind, "params": params, "wait": True, "timeout": timeout}
+    # o servidor desiste antes do socket: a resposta 504 explica o motivo melhor que um timeout de leitura
+    wait = (DEFAULT_WAIT_TIMEOUT if timeout is None else timeout) + 5
+    status, body = request(address, "POST", "/jobs", payload, timeout=wait)
+    if status != 200 or body.get("status") != "done":
+        raise RuntimeError(body.get("error") or f"serviço respondeu HTTP {status}")
+    return body["result"]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import profiling
+
+
+class StageTimeout(TimeoutError):
+    """Prazo comum estourado antes de todas as etapas terminarem."""
+
+    def __init__(self, pending, timeout: float):
+        self.pending = list(pending)
+        super().__init__(f"etapas não concluídas em {timeout:g}s: {', '.join(self.pending)}")
+
+
+def run_stages(
+    stages: Dict[str, Callable[[], Any]], timeout: Optional[float] = None
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Executa as etapas ao mesmo tempo, cada uma em sua thread, sob um prazo comum.
+
+    Retorna (resultado por etapa, segundos por etapa). A primeira exceção de uma etapa é
+    repassada ao chamador; se o prazo acabar, levanta :class:`StageTimeout`. As threads são
+    daemon para que uma etapa presa (ex.: rede) não segure o encerramento do processo.
+    """
+    results: Dict[str, Any] = {}
+    errors: Dict[str, BaseException] = {}
+    timings: Dict[str, float] = {}
+
+    def run(name: str, fn: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        try:
+            with profiling.span(f"stage.{name}", "stage"):
+                results[name] = fn()
+        except BaseException as e:
+            errors[name] = e
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+
+    threads = {name: threading.Thread(target=run, args=(name, fn), name=f"stage-{name}", daemon=True) for name, fn in stages.items()}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for t in threads.values():
+        t.start()
+    for t in threads.values():
+        t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    pending = [name for name, t in threads.items() if t.is_alive()]
+    for name in stages:
+        if name in errors:
+            raise errors[name]
+    if pending:
+        raise StageTimeout(pending, timeout)
+    return results, timings
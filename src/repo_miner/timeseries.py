@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from . import profiling
+from .activity import BACKENDS, CommitRecord, iter_records
+
+SERIES = ("monthly", "weekly")
+
+
+class CommitArrays:
+    """Histórico compacto em colunas: timestamps, autores (ids inteiros) e merges.
+
+    Montado em uma única passagem pelos commits e ordenado por data; cada janela ou
+    período vira um intervalo de índices encontrado por busca binária, e contagens de
+    merges saem de somas prefixadas, sem voltar ao git.
+    """
+
+    def __init__(self, records: Iterable[CommitRecord]):
+        ids: Dict[str, int] = {}
+        ts, authors, merges = array("q"), array("l"), array("b")
+        for rec in records:
+            ts.append(int(rec.committed_at.timestamp()))
+            authors.append(ids.setdefault(rec.author, len(ids)))
+            merges.append(1 if rec.is_merge else 0)
+        if any(ts[i] < ts[i - 1] for i in range(1, len(ts))):
+            order = sorted(range(len(ts)), key=ts.__getitem__)
+            ts = array("q", (ts[i] for i in order))
+            authors = array("l", (authors[i] for i in order))
+            merges = array("b", (merges[i] for i in order))
+        self.ts = ts
+        self.authors = authors
+        # merge_prefix[i] = merges entre os i primeiros commits
+        self.merge_prefix = array("q", [0])
+        for m in merges:
+            self.merge_prefix.append(self.merge_prefix[-1] + m)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def span(self, start: datetime, end: datetime) -> range:
+        """Índices dos commits com data em ``[start, end]``."""
+        return range(bisect_left(self.ts, int(start.timestamp())), bisect_right(self.ts, int(end.timestamp())))
+
+    def metrics(self, idx: range) -> Dict[str, Any]:
+        """Métricas de contagem do trecho ``idx``, com a mesma semântica de ``analyze_activity``."""
+        lo, hi = idx.start, idx.stop
+        # intervalos em dias entre commits consecutivos do trecho (timestamps já ordenados)
+        intervals = sorted((self.ts[i] - self.ts[i - 1]) // 86400 for i in range(lo + 1, hi))
+        return {
+            "commits_total": hi - lo,
+            "authors_total": len(set(self.authors[lo:hi])),
+            "merge_commits": self.merge_prefix[hi] - self.merge_prefix[lo],
+            "median_days_between_commits": intervals[len(intervals) // 2] if intervals else 0,
+        }
+
+
+def _period_starts(since: datetime, now: datetime, series: str) -> List[datetime]:
+    """Inícios dos períodos (mês ou semana ISO, em UTC) que cobrem ``[since, now]``."""
+    if series == "monthly":
+        start = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = (since - timedelta(days=since.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    starts = []
+    while start <= now:
+        starts.append(start)
+        if series == "monthly":
+            start = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        else:
+            start += timedelta(days=7)
+    return starts
+
+
+def _period_label(start: datetime, series: str) -> str:
+    if series == "monthly":
+        return start.strftime("%Y-%m")
+    year, week, _ = start.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def window_metrics(history: CommitArrays, now: datetime, windows: Sequence[int]) -> Dict[str, Dict[str, Any]]:
+    """Métricas de cada janela dos últimos ``N`` dias, indexadas por ``str(N)``."""
+    result = {}
+    for days in windows:
+        idx = history.span(now - timedelta(days=days), now)
+        m = history.metrics(idx)
+        m["days_since_last_commit"] = (
+            (now - datetime.fromtimestamp(history.ts[idx.stop - 1], timezone.utc)).days if len(idx) else 999999
+        )
+        result[str(days)] = m
+    return result
+
+
+def series_metrics(history: CommitArrays, since: datetime, now: datetime, series: str) -> List[Dict[str, Any]]:
+    """Métricas por período (``monthly`` ou ``weekly``) de ``since`` até ``now``, em ordem cronológica."""
+    if series not in SERIES:
+        raise ValueError(f"série inválida: {series!r} (use {', '.join(SERIES)})")
+    starts = _period_starts(since, now, series)
+    rows = []
+    for i, start in enumerate(starts):
+        lo = max(start, since)
+        hi = starts[i + 1] - timedelta(seconds=1) if i + 1 < len(starts) else now
+        rows.append({"period": _period_label(start, series), **history.metrics(history.span(lo, hi))})
+    return rows
+
+
+def analyze_activity_windows(
+    repo_path: str,
+    windows: Sequence[int] = (30, 90, 365),
+    series: Optional[str] = None,
+    since_days: int = 365,
+    backend: str = "pydriller",
+    incremental: bool = False,
+    index_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """Várias janelas e/ou uma série temporal de atividade a partir de uma única leitura do histórico.
+
+    Lê os commits uma vez (do tamanho da maior janela ou de ``since_days``, o que for maior)
+    e calcula, para cada janela em ``windows``, ``commits_total``, ``authors_total``,
+    ``merge_commits``, ``median_days_between_commits`` e ``days_since_last_commit``; com
+    ``series``, as mesmas métricas de contagem (sem ``days_since_last_commit``) por mês
+    ou semana dos últimos ``since_days`` dias.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend inválido: {backend!r} (use {', '.join(BACKENDS)})")
+    if series is not None and series not in SERIES:
+        raise ValueError(f"série inválida: {series!r} (use {', '.join(SERIES)})")
+    now = datetime.now(timezone.utc)
+    span_days = max([since_days, *windows])
+    with profiling.span("activity.traverse", "activity", backend=backend, incremental=incremental):
+        history = CommitArrays(
+            iter_records(repo_path, now - timedelta(days=span_days), now, backend=backend, incremental=incremental, index_dir=index_dir)
+        )
+    profiling.count("commits_seen", len(history))
+    result: Dict[str, Any] = {}
+    if windows:
+        result["windows"] = window_metrics(history, now, windows)
+    if series:
+        result["series"] = series_metrics(history, now - timedelta(days=since_days), now, series)
+    return result
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import re
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import profiling, versions
+from .cache import HttpCache, get_json, put_json
+from .transport import HttpClient
+from .vulndb import normalize_name
+
+DEFAULT_MAX_DEPTH = 10
+# nome [extras] (especificador) ; marcadores — formato de ``requires_dist`` (PEP 508)
+_REQUIREMENT = re.compile(
+    r"^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?P<at>@)?\(?(?P<spec>[^;()]*)\)?\s*(?:;(?P<marker>.*))?$"
+)
+_EXTRA_MARKER = re.compile(r"\bextra\s*==")
+
+Requirement = Tuple[str, str]
+
+
+def parse_requires_dist(entries: Optional[Iterable[str]]) -> List[Requirement]:
+    """Converte ``requires_dist`` em pares (nome normalizado, especificador).
+
+    Dependências de extras opcionais e referências diretas (``nome @ url``) são ignoradas.
+    Os demais marcadores de ambiente não são avaliados: a árvore inclui as dependências
+    de todas as plataformas e versões do Python.
+    """
+    reqs: List[Requirement] = []
+    for entry in entries or []:
+        m = _REQUIREMENT.match(entry)
+        if m is None or m.group("at") or (m.group("marker") and _EXTRA_MARKER.search(m.group("marker"))):
+            continue
+        reqs.append((normalize_name(m.group("name")), m.group("spec").strip()))
+    return list(dict.fromkeys(reqs))
+
+
+class MetadataStore:
+    """Metadados do PyPI (versões publicadas e ``requires_dist``), buscados uma única vez por processo.
+
+    O memo é compartilhado entre threads: chamadas simultâneas para o mesmo projeto
+    esperam a mesma busca. Com ``cache``, só a parte usada dos metadados (e não o JSON
+    completo do projeto, que pode ter vários MB) é guardada entre execuções.
+
+    Só um 404 significa "não existe no PyPI". As demais falhas (5xx depois das
+    retentativas, erro de rede) ficam em ``errors``, por nome (projeto) ou por par
+    nome/versão (release), para que o relatório marque o pacote como desconhecido.
+    """
+
+    def __init__(self, client: HttpClient, cache: Optional[HttpCache] = None):
+        self.client = client
+        self.cache = cache
+        self.errors: Dict[Union[str, Tuple[str, str]], str] = {}
+        self._lock = threading.Lock()
+        self._memo: Dict[Tuple, Future] = {}
+
+    def _once(self, key: Tuple, fetch: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        with self._lock:
+            future = self._memo.get(key)
+            owner = future is None
+            if owner:
+                future = self._memo[key] = Future()
+        if owner:
+            try:
+                future.set_result(fetch())
+            except Exception as e:
+                # ("project", nome) -> nome; ("release", nome, versão) -> (nome, versão)
+                with self._lock:
+                    self.errors[key[1] if len(key) == 2 else key[1:]] = f"PyPI: {type(e).__name__}: {e}"
+                future.set_result(None)
+        return future.result()
+
+    def _get(self, url: str) -> Optional[Dict]:
+        r = self.client.get(url, timeout=15)
+        if r.status_code == 404:
+            return None
+        if r.status_code != 200:
+            raise RuntimeError(f"PyPI respondeu {r.status_code} para {url}")
+        return r.json()
+
+    def project(self, name: str) -> Optional[Dict]:
+        """``{"name", "latest", "versions", "requires"}`` do projeto, ou ``None`` se não existir no PyPI.
+
+        ``versions`` exclui releases sem arquivos ou com todos os arquivos retirados (yanked);
+        ``requires`` é o ``requires_dist`` da versão ``latest``.
+        """
+        name = normalize_name(name)
+        return self._once(("project", name), lambda: self._fetch_project(name))
+
+    def _fetch_project(self, name: str) -> Optional[Dict]:
+        from . import deps
+
+        key = f"pypi:meta:{name}"
+        meta = get_json(self.cache, key)
+        if meta is not None:
+            return meta
+        with profiling.span("pypi.metadata", "pypi", package=name):
+            data = self._get(deps.PYPI_BASE.format(name=name))
+        if data is None:
+            return None
+        info = data.get("info") or {}
+        meta = {
+            "name": info.get("name") or name,
+            "latest": info.get("version"),
+            "versions": [v for v, files in (data.get("releases") or {}).items() if files and not all(f.get("yanked") for f in files)],
+            "requires": info.get("requires_dist") or [],
+        }
+        put_json(self.cache, "pypi", key, meta)
+        return meta
+
+    def requires(self, name: str, version: str) -> List[Requirement]:
+        """Dependências declaradas por ``name==version`` (vazio se os metadados não existirem)."""
+        project = self.project(name)
+        if project is not None and project["latest"] == version:
+            return parse_requires_dist(project["requires"])
+        meta = self._once(("release", normalize_name(name), version), lambda: self._fetch_release(normalize_name(name), version))
+        return parse_requires_dist((meta or {}).get("requires"))
+
+    def _fetch_release(self, name: str, version: str) -> Optional[Dict]:
+        from . import deps
+
+        key = f"pypi:requires:{name}=={version}"
+        meta = get_json(self.cache, key)
+        if meta is not None:
+            return meta
+        with profiling.span("pypi.metadata", "pypi", package=name, version=version):
+            data = self._get(deps.PYPI_RELEASE_BASE.format(name=name, version=version))
+        if data is None:
+            return None
+        meta = {"requires": (data.get("info") or {}).get("requires_dist") or []}
+        put_json(self.cache, "pypi", key, meta)
+        return meta
+
+    def resolve(self, name: str, specifier: str = "") -> Optional[str]:
+        """A versão que o pip escolheria para ``name`` + ``specifier`` entre as publicadas."""
+        project = self.project(name)
+        if project is None:
+            return None
+        try:
+            return versions.latest_matching(project["versions"], specifier)
+        except ValueError:
+            return None
+
+    def latest(self, name: str) -> Optional[str]:
+        project = self.project(name)
+        return project["latest"] if project else None
+
+
+def node_id(name: str, version: Optional[str]) -> str:
+    name = normalize_name(name)
+    return f"{name}=={version}" if version else name
+
+
+class DependencyGraph:
+    """Grafo de dependências resolvido: um nó por (pacote, versão), com a menor profundidade."""
+
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        self.roots: List[str] = []
+        self.depth: Dict[str, int] = {}
+        self.adjacency: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.depth)
+
+    def nodes(self) -> Iterable[Tuple[str, Optional[str], int]]:
+        """(nome, versão, profundidade) de cada nó; versão ``None`` se não foi resolvida."""
+        for nid, depth in self.depth.items():
+            name, _, version = nid.partition("==")
+            yield name, version or None, depth
+
+    def to_dict(self) -> Dict:
+        return {
+            "roots": self.roots,
+            "max_depth": self.max_depth,
+            "nodes_total": len(self.depth),
+            "edges_total": sum(len(children) for children in self.adjacency.values()),
+            "depth": self.depth,
+            "adjacency": self.adjacency,
+        }
+
+
+def expand(
+    roots: Iterable[Tuple[str, Optional[str]]],
+    store: MetadataStore,
+    executor: Optional[Executor] = None,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+) -> DependencyGraph:
+    """Expande o grafo em largura a partir de ``roots`` (nome, versão fixada ou ``None``).
+
+    Cada nível é resolvido de uma vez: os ``requires_dist`` de todos os nós da fronteira
+    e a versão escolhida para cada (dependência, especificador) distinto são buscados em
+    paralelo no ``executor``. Nós já visitados não são expandidos de novo, e nós na
+    profundidade ``max_depth`` entram no grafo sem os seus filhos.
+    """
+    def run(fn, items: List) -> List:
+        return list(executor.map(fn, items)) if executor is not None else [fn(i) for i in items]
+
+    graph = DependencyGraph(max_depth)
+    roots = list(dict.fromkeys((normalize_name(n), v) for n, v in roots))
+    resolved = run(lambda r: r[1] or store.resolve(r[0]), roots)
+    frontier: List[str] = []
+    for (name, _), version in zip(roots, resolved):
+        nid = node_id(name, version)
+        if nid not in graph.depth:
+            graph.roots.append(nid)
+            graph.depth[nid] = 0
+            frontier.append(nid)
+
+    depth = 0
+    with profiling.span("deps.transitive", "deps", roots=len(roots)):
+        while frontier and depth < max_depth:
+            expandable = [nid for nid in frontier if "==" in nid]
+            requirements = run(lambda nid: store.requires(*nid.split("==", 1)), expandable)
+            wanted = list(dict.fromkeys(req for reqs in requirements for req in reqs))
+            chosen = dict(zip(wanted, run(lambda req: store.resolve(*req), wanted)))
+            depth += 1
+            frontier = []
+            for nid, reqs in zip(expandable, requirements):
+                children = graph.adjacency.setdefault(nid, [])
+                for req in reqs:
+                    child = node_id(req[0], chosen[req])
+                    if child not in children:
+                        children.append(child)
+                    if child not in graph.depth:
+                        graph.depth[child] = depth
+                        frontier.append(child)
+    profiling.count("transitive_nodes", len(graph))
+    return graph
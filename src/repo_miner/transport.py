@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import functools
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import __version__, profiling
+
+if TYPE_CHECKING:  # requests/urllib3 só são importados ao criar o primeiro HttpClient
+    import requests
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RETRIES = 3
+# respostas que indicam que o servidor está sobrecarregado ou limitando a taxa
+THROTTLE_STATUS = (429, 503)
+# respostas transitórias que valem nova tentativa
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def __getattr__(name: str):
+    # ``transport.requests`` e ``transport.RETRY_EXCEPTIONS`` continuam acessíveis, mas sob demanda
+    if name == "requests":
+        import requests
+
+        return requests
+    if name == "RETRY_EXCEPTIONS":
+        return _retry_exceptions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _retry_exceptions() -> Tuple[type, ...]:
+    """Erros transitórios que valem nova tentativa."""
+    import requests
+
+    return (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class AdaptiveLimiter:
+    """Limita o número de requisições simultâneas a um servidor.
+
+    O limite cai pela metade quando o servidor responde 429/503 e volta a crescer,
+    uma unidade por vez, após uma sequência de respostas bem-sucedidas (AIMD).
+    """
+
+    def __init__(self, limit: int = DEFAULT_CONCURRENCY, minimum: int = 1):
+        self.maximum = max(1, limit)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = self.maximum
+        self._active = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self) -> "AdaptiveLimiter":
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def observe(self, status_code: int) -> None:
+        with self._cond:
+            if status_code in THROTTLE_STATUS:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._successes = 0
+            elif status_code < 500:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+                    self._cond.notify_all()
+
+
+class TransportStats:
+    """Contadores thread-safe do transporte."""
+
+    FIELDS = ("requests", "retries", "errors", "connections_opened", "bytes_received", "bytes_decoded")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, int] = {f: 0 for f in self.FIELDS}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] += amount
+        profiling.count(f"http_{name}", amount)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            values = dict(self._values)
+        values["connections_reused"] = max(0, values["requests"] - values["connections_opened"])
+        return values
+
+
+def _counting_pool(base, stats: TransportStats):
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.incr("connections_opened")
+            return super()._new_conn()
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+@functools.lru_cache(maxsize=None)
+def _counting_adapter_class() -> type:
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _CountingAdapter(HTTPAdapter):
+        def __init__(self, stats: TransportStats, **kwargs):
+            self._stats = stats
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _counting_pool(HTTPConnectionPool, self._stats),
+                "https": _counting_pool(HTTPSConnectionPool, self._stats),
+            }
+
+    return _CountingAdapter
+
+
+class HttpClient:
+    """Transporte HTTP compartilhado por todo o código de rede.
+
+    - uma ``requests.Session`` com conexões persistentes (keep-alive) e gzip;
+    - no máximo ``max_per_host`` conexões por servidor, com limite adaptativo (429/503);
+    - novas tentativas com backoff exponencial e jitter em erros de conexão e respostas
+      429/5xx, respeitando ``Retry-After``;
+    - contadores de requisições, conexões reaproveitadas, novas tentativas e bytes.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = DEFAULT_CONCURRENCY,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+    ):
+        self.max_per_host = max(1, max_per_host)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        import requests
+
+        self.stats = TransportStats()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": f"repo-maintenance-miner/{__version__}",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        adapter = _counting_adapter_class()(self.stats, pool_connections=8, pool_maxsize=self.max_per_host, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def limiter(self, url: str) -> AdaptiveLimiter:
+        host = urlsplit(url).netloc
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = AdaptiveLimiter(self.max_per_host)
+            return limiter
+
+    def _delay(self, attempt: int, response=None) -> float:
+        if response is not None:
+            try:
+                return min(60.0, float(response.headers.get("Retry-After")))
+            except (TypeError, ValueError):
+                pass
+        # "full jitter": espera aleatória até o teto exponencial
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        limiter = self.limiter(url)
+        attempt = 0
+        while True:
+            try:
+                with limiter:
+                    self.stats.incr("requests")
+                    r = self.session.request(method, url, **kwargs)
+                    # lê o corpo dentro do limite para contar os bytes e liberar a conexão
+                    content = r.content
+            except _retry_exceptions():
+                self.stats.incr("errors")
+                if attempt >= self.retries:
+                    raise
+                self.stats.incr("retries")
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            limiter.observe(r.status_code)
+            self.stats.incr("bytes_decoded", len(content or b""))
+            self.stats.incr("bytes_received", _wire_bytes(r, content))
+            if r.status_code not in RETRY_STATUS or attempt >= self.retries:
+                return r
+            self.stats.incr("retries")
+            time.sleep(self._delay(attempt, r))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+def _wire_bytes(r: requests.Response, content: Optional[bytes]) -> int:
+    tell = getattr(r.raw, "tell", None)
+    try:
+        return int(tell()) if tell else len(content or b"")
+    except Exception:
+        return len(content or b"")
+
+
+_default_client: Optional[HttpClient] = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Cliente compartilhado do processo (criado sob demanda)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
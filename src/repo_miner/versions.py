@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import functools
+import math
+import re
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+# expressão da PEP 440 (apêndice B), aceitando as grafias alternativas que ela normaliza
+_PATTERN = re.compile(
+    r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_.]?(?P<pre_l>alpha|a|beta|b|preview|pre|c|rc)[-_.]?(?P<pre_n>[0-9]+)?)?
+    (?P<post>(?:-(?P<post_n1>[0-9]+))|(?:[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?))?
+    (?P<dev>[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_SPECIFIER = re.compile(r"^\s*(~=|===|==|!=|<=|>=|<|>)\s*(\S+?)\s*$")
+_PRE_PHASES = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "pre": 2, "preview": 2, "rc": 2}
+_PRE_LABELS = ("a", "b", "rc")
+# fase usada quando não há pré-release; só "dev" sem pré/pós-release fica abaixo de todas
+_FINAL = 3
+_DEV_ONLY = -1
+
+Key = Tuple
+
+
+class Version(NamedTuple):
+    """Versão PEP 440 já interpretada, com a chave de ordenação calculada uma única vez."""
+
+    epoch: int
+    release: Tuple[int, ...]
+    pre: Optional[Tuple[str, int]]
+    post: Optional[int]
+    dev: Optional[int]
+    local: Optional[str]
+    key: Key
+
+    @property
+    def is_prerelease(self) -> bool:
+        return self.pre is not None or self.dev is not None
+
+    def __str__(self) -> str:
+        parts = [f"{self.epoch}!" if self.epoch else "", ".".join(map(str, self.release))]
+        if self.pre is not None:
+            parts.append(f"{self.pre[0]}{self.pre[1]}")
+        if self.post is not None:
+            parts.append(f".post{self.post}")
+        if self.dev is not None:
+            parts.append(f".dev{self.dev}")
+        if self.local is not None:
+            parts.append(f"+{self.local}")
+        return "".join(parts)
+
+
+def _local_key(local: Optional[str]) -> Tuple:
+    # segmentos numéricos ficam acima dos alfanuméricos; versão sem local fica abaixo de qualquer local
+    if local is None:
+        return ()
+    return tuple((1, int(s), "") if s.isdigit() else (0, 0, s) for s in re.split(r"[-_.]", local))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def parse(value: str) -> Optional[Version]:
+    """Interpreta ``value`` segundo a PEP 440; ``None`` se não for uma versão válida.
+
+    O resultado fica em cache: a mesma string (repetida em milhares de releases da frota)
+    é interpretada uma única vez e devolve sempre o mesmo objeto.
+    """
+    m = _PATTERN.match(value)
+    if m is None:
+        return None
+    epoch = int(m.group("epoch") or 0)
+    release = tuple(int(p) for p in m.group("release").split("."))
+    pre = None
+    if m.group("pre_l"):
+        phase = _PRE_PHASES[m.group("pre_l").lower()]
+        pre = (_PRE_LABELS[phase], int(m.group("pre_n") or 0))
+    post = None
+    if m.group("post"):
+        post = int(m.group("post_n1") or m.group("post_n2") or 0)
+    dev = int(m.group("dev_n") or 0) if m.group("dev_l") else None
+    local = m.group("local").lower() if m.group("local") else None
+
+    trimmed = release
+    while len(trimmed) > 1 and trimmed[-1] == 0:
+        trimmed = trimmed[:-1]
+    if pre is not None:
+        pre_key = (_PRE_PHASES[pre[0]], pre[1])
+    elif dev is not None and post is None:
+        pre_key = (_DEV_ONLY, 0)
+    else:
+        pre_key = (_FINAL, 0)
+    key = (
+        epoch, trimmed, pre_key,
+        -1 if post is None else post,
+        math.inf if dev is None else dev,
+        _local_key(local),
+    )
+    return Version(epoch, release, pre, post, dev, local, key)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def sort_key(value: str) -> Key:
+    """Chave de ordenação de ``value``; versões inválidas ficam abaixo de todas as válidas.
+
+    Entre si, as inválidas são ordenadas pelos números que contêm e, no empate, pelo texto.
+    """
+    v = parse(value)
+    if v is not None:
+        return v.key
+    nums = tuple(int(p) for p in re.findall(r"[0-9]+", value))
+    return (-1, nums, value)
+
+
+def is_prerelease(value: str) -> bool:
+    """Pré-release ou versão de desenvolvimento (``1.0a1``, ``2.0rc1``, ``1.0.dev3``); inválidas também contam."""
+    v = parse(value)
+    return v is None or v.is_prerelease
+
+
+def is_newer(candidate: str, current: str) -> bool:
+    return sort_key(candidate) > sort_key(current)
+
+
+def latest_stable(versions: Iterable[str]) -> Optional[str]:
+    """A maior versão final (sem pré-release/dev) da lista, ou ``None``."""
+    best, best_key = None, None
+    for v in versions:
+        if is_prerelease(v):
+            continue
+        key = sort_key(v)
+        if best_key is None or key > best_key:
+            best, best_key = v, key
+    return best
+
+
+@functools.lru_cache(maxsize=1 << 14)
+def _clauses(specifier: str) -> Tuple[Tuple[str, str], ...]:
+    clauses = []
+    for part in specifier.split(","):
+        if not part.strip():
+            continue
+        m = _SPECIFIER.match(part)
+        if m is None:
+            raise ValueError(f"especificador de versão inválido: {part.strip()!r}")
+        clauses.append((m.group(1), m.group(2)))
+    return tuple(clauses)
+
+
+def _padded(release: Tuple[int, ...], size: int) -> Tuple[int, ...]:
+    return release[:size] + (0,) * (size - len(release))
+
+
+def _matches(v: Version, raw: str, op: str, target: str) -> bool:
+    if op == "===":
+        return raw.strip().lower() == target.lower()
+    if op in ("==", "!=") and target.endswith(".*"):
+        prefix = parse(target[:-2])
+        if prefix is None:
+            raise ValueError(f"versão inválida no especificador: {target!r}")
+        same = v.epoch == prefix.epoch and _padded(v.release, len(prefix.release)) == prefix.release
+        if prefix.pre is not None or prefix.post is not None or prefix.dev is not None:
+            same = same and (v.pre, v.post, v.dev) == (prefix.pre, prefix.post, prefix.dev)
+        return same if op == "==" else not same
+    t = parse(target)
+    if t is None:
+        raise ValueError(f"versão inválida no especificador: {target!r}")
+    # sem versão local no alvo, a parte local do candidato é ignorada (PEP 440)
+    key = v.key if t.local is not None else v.key[:-1] + ((),)
+    if op == "==":
+        return key == t.key
+    if op == "!=":
+        return key != t.key
+    if op == ">=":
+        return key >= t.key
+    if op == "<=":
+        return key <= t.key
+    if op == ">":
+        # >1.7 não aceita pós-releases de 1.7
+        return key > t.key and not (t.post is None and v.post is not None and v.key[:2] == t.key[:2])
+    if op == "<":
+        # <2.0 não aceita pré-releases de 2.0
+        return key < t.key and not (not t.is_prerelease and v.is_prerelease and v.key[:2] == t.key[:2])
+    # ~=2.2.1 equivale a >=2.2.1, ==2.2.*
+    prefix = t.release[:-1] if len(t.release) > 1 else t.release
+    return key >= t.key and v.epoch == t.epoch and _padded(v.release, len(prefix)) == prefix
+
+
+def satisfies(version: str, specifier: str) -> bool:
+    """``version`` atende a ``specifier`` (ex.: ``">=2.0,<3"``; vazio aceita qualquer versão válida)?
+
+    Levanta ``ValueError`` se o especificador for inválido; versões inválidas nunca atendem.
+    """
+    v = parse(version)
+    if v is None:
+        return False
+    return all(_matches(v, version, op, target) for op, target in _clauses(specifier))
+
+
+def latest_matching(versions: Iterable[str], specifier: str = "") -> Optional[str]:
+    """A maior versão que atende a ``specifier``, preferindo versões finais.
+
+    Como o pip, só recorre a pré-releases se nenhuma versão final atender.
+    """
+    candidates = [v for v in versions if satisfies(v, specifier)]
+    return latest_stable(candidates) or max(candidates, key=sort_key, default=None)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .cache import default_cache_dir
+from .osv import normalize_vuln
+from .versions import latest_stable, sort_key
+
+DB_NAME = "vulndb.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vulns (
+    id TEXT PRIMARY KEY,
+    summary TEXT,
+    severity TEXT,
+    aliases TEXT,
+    refs TEXT
+);
+CREATE TABLE IF NOT EXISTS affected_versions (
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    vuln_id TEXT NOT NULL,
+    PRIMARY KEY (package, version, vuln_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS affected_ranges (
+    package TEXT NOT NULL,
+    vuln_id TEXT NOT NULL,
+    introduced TEXT,
+    fixed TEXT,
+    last_affected TEXT
+);
+CREATE INDEX IF NOT EXISTS affected_ranges_package ON affected_ranges (package);
+CREATE TABLE IF NOT EXISTS releases (
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (package, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+    package TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+"""
+
+
+def default_db_path() -> Path:
+    return default_cache_dir() / DB_NAME
+
+
+def normalize_name(name: str) -> str:
+    """Normaliza o nome do pacote como o PyPI (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _ranges(affected: Dict) -> Iterator[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """Converte os eventos OSV (ECOSYSTEM) em intervalos (introduced, fixed, last_affected)."""
+    for rng in affected.get("ranges") or []:
+        if rng.get("type") != "ECOSYSTEM":
+            continue
+        introduced = None
+        for event in rng.get("events") or []:
+            if "introduced" in event:
+                introduced = event["introduced"]
+            elif "fixed" in event and introduced is not None:
+                yield introduced, event["fixed"], None
+                introduced = None
+            elif "last_affected" in event and introduced is not None:
+                yield introduced, None, event["last_affected"]
+                introduced = None
+        if introduced is not None:
+            yield introduced, None, None
+
+
+def _in_range(version: str, introduced: Optional[str], fixed: Optional[str], last_affected: Optional[str]) -> bool:
+    key = sort_key(version)
+    if introduced not in (None, "0") and key < sort_key(introduced):
+        return False
+    if fixed is not None and key >= sort_key(fixed):
+        return False
+    if last_affected is not None and key > sort_key(last_affected):
+        return False
+    return True
+
+
+def _iter_osv_records(zip_path: Path) -> Iterator[Dict]:
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.endswith(".json"):
+                continue
+            with zf.open(info) as f:
+                yield json.load(f)
+
+
+def _load_snapshot(path: Path) -> Dict[str, object]:
+    """Snapshot de versões do PyPI: ``{"pacote": ["1.0", "1.1"]}`` ou ``{"pacote": "1.1"}``."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("snapshot do PyPI deve ser um objeto JSON {pacote: versões}")
+    return data
+
+
+def import_osv_zip(zip_path: Path, db_path: Optional[Path] = None, pypi_snapshot: Optional[Path] = None) -> Dict[str, int]:
+    """Importa uma exportação ``all.zip`` do OSV (ecossistema PyPI) para o banco local.
+
+    Com ``pypi_snapshot``, importa também as versões publicadas de cada pacote e expande
+    os intervalos afetados sobre elas, para que as consultas sejam só buscas no índice.
+    O banco é recriado a cada importação.
+    """
+    db_path = Path(db_path) if db_path else default_db_path()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_suffix(db_path.suffix + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(str(tmp_path))
+    conn.executescript(_SCHEMA)
+    stats = {"vulns": 0, "affected_versions": 0, "affected_ranges": 0, "releases": 0}
+    ranges_by_package: Dict[str, List[Tuple[str, Optional[str], Optional[str], Optional[str]]]] = {}
+    with conn:
+        for rec in _iter_osv_records(Path(zip_path)):
+            if rec.get("withdrawn"):
+                continue
+            affected = [a for a in rec.get("affected") or [] if (a.get("package") or {}).get("ecosystem") == "PyPI"]
+            if not affected:
+                continue
+            norm = normalize_vuln(rec)
+            conn.execute(
+                "INSERT OR REPLACE INTO vulns (id, summary, severity, aliases, refs) VALUES (?, ?, ?, ?, ?)",
+                (norm["id"], norm["summary"], json.dumps(norm["severity"]), json.dumps(norm["aliases"]), json.dumps(norm["references"])),
+            )
+            stats["vulns"] += 1
+            for a in affected:
+                pkg = normalize_name(a["package"]["name"])
+                rows = [(pkg, v, norm["id"]) for v in a.get("versions") or []]
+                conn.executemany("INSERT OR IGNORE INTO affected_versions VALUES (?, ?, ?)", rows)
+                stats["affected_versions"] += len(rows)
+                for rng in _ranges(a):
+                    conn.execute("INSERT INTO affected_ranges VALUES (?, ?, ?, ?, ?)", (pkg, norm["id"], *rng))
+                    ranges_by_package.setdefault(pkg, []).append((norm["id"], *rng))
+                    stats["affected_ranges"] += 1
+        if pypi_snapshot:
+            for name, versions in _load_snapshot(pypi_snapshot).items():
+                pkg = normalize_name(name)
+                if isinstance(versions, str):
+                    conn.execute("INSERT OR REPLACE INTO latest VALUES (?, ?)", (pkg, versions))
+                    continue
+                versions = list(versions)
+                conn.executemany("INSERT OR IGNORE INTO releases VALUES (?, ?)", [(pkg, v) for v in versions])
+                stats["releases"] += len(versions)
+                latest = latest_stable(versions)
+                if latest:
+                    conn.execute("INSERT OR REPLACE INTO latest VALUES (?, ?)", (pkg, latest))
+                # pré-expansão dos intervalos sobre as versões conhecidas
+                expanded = [
+                    (pkg, v, vid)
+                    for vid, introduced, fixed, last in ranges_by_package.get(pkg, [])
+                    for v in versions
+                    if _safe_in_range(v, introduced, fixed, last)
+                ]
+                conn.executemany("INSERT OR IGNORE INTO affected_versions VALUES (?, ?, ?)", expanded)
+    conn.close()
+    tmp_path.replace(db_path)
+    return stats
+
+
+def _safe_in_range(version: str, introduced, fixed, last_affected) -> bool:
+    try:
+        return _in_range(version, introduced, fixed, last_affected)
+    except Exception:
+        return False
+
+
+class VulnDB:
+    """Consulta local de vulnerabilidades e últimas versões (sem acesso à rede)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_db_path()
+        if not self.path.exists():
+            raise FileNotFoundError(f"banco offline não encontrado: {self.path} (use 'repo-miner db import')")
+        self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def latest_version(self, name: str) -> Optional[str]:
+        row = self._conn.execute("SELECT version FROM latest WHERE package = ?", (normalize_name(name),)).fetchone()
+        return row[0] if row else None
+
+    def vulnerabilities(self, name: str, version: Optional[str]) -> List[Dict]:
+        if not version:
+            return []
+        pkg = normalize_name(name)
+        ids = [r[0] for r in self._conn.execute(
+            "SELECT vuln_id FROM affected_versions WHERE package = ? AND version = ?", (pkg, version)
+        )]
+        # versão do snapshot do PyPI: os intervalos já foram expandidos na importação
+        indexed = self._conn.execute("SELECT 1 FROM releases WHERE package = ? AND version = ?", (pkg, version)).fetchone()
+        if indexed is None:
+            for vid, introduced, fixed, last in self._conn.execute(
+                "SELECT vuln_id, introduced, fixed, last_affected FROM affected_ranges WHERE package = ?", (pkg,)
+            ).fetchall():
+                if vid not in ids and _safe_in_range(version, introduced, fixed, last):
+                    ids.append(vid)
+        result = []
+        for vid in sorted(ids):
+            row = self._conn.execute("SELECT id, summary, severity, aliases, refs FROM vulns WHERE id = ?", (vid,)).fetchone()
+            if row:
+                result.append({
+                    "id": row[0],
+                    "summary": row[1],
+                    "severity": json.loads(row[2]),
+                    "aliases": json.loads(row[3]),
+                    "references": json.loads(row[4]),
+                })
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        tables = ("vulns", "affected_versions", "affected_ranges", "releases", "latest")
+        return {t: self._conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
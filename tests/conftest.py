@@ -0,0 +1,56 @@
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Evita que os testes leiam ou gravem no cache real do usuário."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("xdg-cache")))
+
+
+def run_git(repo, *args, when=None, email="a@example.com"):
+    env = dict(os.environ)
+    if when is not None:
+        stamp = f"{int(when.timestamp())} +0000"
+        env.update(GIT_AUTHOR_DATE=stamp, GIT_COMMITTER_DATE=stamp)
+    env.update(GIT_AUTHOR_NAME=email.split("@")[0], GIT_AUTHOR_EMAIL=email,
+               GIT_COMMITTER_NAME="ci", GIT_COMMITTER_EMAIL="ci@example.com")
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, env=env)
+
+
+def commit_file(repo, name, content, days_ago, email="a@example.com", msg=None):
+    (repo / name).write_text(content, encoding="utf-8")
+    run_git(repo, "add", ".")
+    run_git(repo, "commit", "-q", "-m", msg or f"edita {name}",
+            when=datetime.now(timezone.utc) - timedelta(days=days_ago), email=email)
+
+
+@pytest.fixture
+def git():
+    """Executa comandos git com datas/autores controlados."""
+    return run_git
+
+
+@pytest.fixture
+def git_commit():
+    return commit_file
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """Repositório real com commits de vários autores, um merge e mensagens com acentos."""
+    path = tmp_path / "repo"
+    now = datetime.now(timezone.utc)
+    run_git(tmp_path, "init", "-q", str(path))
+    run_git(path, "checkout", "-q", "-b", "main")
+    for i, (days_ago, email) in enumerate([(40, "a@example.com"), (20, "b@example.com"), (12, "a@example.com")]):
+        commit_file(path, f"f{i}.txt", str(i), days_ago, email=email, msg=f"mudança {i}\n\ncorpo com ção")
+    run_git(path, "checkout", "-q", "-b", "side")
+    commit_file(path, "side.txt", "s", 8, email="c@example.com", msg="side")
+    run_git(path, "checkout", "-q", "main")
+    commit_file(path, "main.txt", "m", 6, email="b@example.com", msg="main")
+    run_git(path, "merge", "-q", "--no-ff", "side", "-m", "integra side", when=now - timedelta(days=3), email="a@example.com")
+    return path
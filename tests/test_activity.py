@@ -130,3 +130,107 @@ def test_activity_recent_authors(monkeypatch, tmp_path):
 
     for item in recent:
         assert "author" in item and "days_since_last_commit" in item and "commits" in item
+
+
+
+def test_git_backend_matches_pydriller(git_repo):
+    via_pydriller = activity_mod.analyze_activity(str(git_repo), since_days=30, backend="pydriller")
+    via_git = activity_mod.analyze_activity(str(git_repo), since_days=30, backend="git")
+    assert via_git == via_pydriller
+    assert via_git["commits_total"] == 5
+    assert via_git["merge_commits"] == 1
+
+
+def test_git_backend_empty_repo(tmp_path, git):
+    git(tmp_path, "init", "-q", str(tmp_path / "empty"))
+    metrics = activity_mod.analyze_activity(str(tmp_path / "empty"), since_days=30, backend="git")
+    assert metrics["commits_total"] == 0
+
+
+def test_partials_merge_to_serial_result():
+    """Qualquer divisão cronológica dos commits deve reproduzir o resultado serial."""
+    now = datetime.now(timezone.utc)
+    base = now - timedelta(days=60)
+    records = [
+        activity_mod.CommitRecord(str(i), base + timedelta(days=d, hours=i), f"a{i % 4}@x", i % 5 == 0)
+        for i, d in enumerate([0, 1, 1, 3, 7, 8, 8, 15, 16, 30, 31, 40, 55])
+    ]
+    serial = activity_mod.aggregate_activity(records, now)
+    for cuts in ([4], [1, 6, 9], [0, 13], [2, 3, 4, 12]):
+        bounds = [0, *cuts, len(records)]
+        total = activity_mod.ActivityPartial()
+        for lo, hi in zip(bounds, bounds[1:]):
+            total.merge(activity_mod.ActivityPartial.from_records(records[lo:hi]))
+        assert total.finalize(now) == serial
+
+
+def test_sharded_traversal_matches_serial(git_repo):
+    for backend in ("git", "pydriller"):
+        serial = activity_mod.analyze_activity(str(git_repo), since_days=30, backend=backend)
+        sharded = activity_mod.analyze_activity(str(git_repo), since_days=30, backend=backend, workers=3)
+        assert sharded == serial
+
+
+def test_streaming_matches_exact_on_small_history(git_repo):
+    for backend in ("git", "pydriller"):
+        exact = activity_mod.analyze_activity(str(git_repo), since_days=30, backend=backend)
+        streamed = activity_mod.analyze_activity(str(git_repo), since_days=30, backend=backend, streaming=True)
+        assert streamed == exact
+
+
+def test_streaming_reorders_and_bounds_state():
+    """Commits fora de ordem dentro do buffer dão a mesma mediana; o estado por autor é limitado."""
+    now = datetime.now(timezone.utc)
+    base = now - timedelta(days=300)
+    records = [
+        activity_mod.CommitRecord(str(i), base + timedelta(days=i % 97, hours=i), f"a{i}@x", False)
+        for i in range(300)
+    ]
+    exact = activity_mod.aggregate_activity(records, now)
+    acc = activity_mod.StreamingActivity(top_k=16, recent=8, reorder=len(records))
+    for rec in records:
+        acc.add(rec)
+    streamed = acc.finalize(now)
+    assert acc.out_of_order == 0
+    assert len(acc.author_last) <= 8 and len(acc.top.counts) <= 16
+    for key in ("commits_total", "median_days_between_commits", "days_since_last_commit", "merge_commits"):
+        assert streamed[key] == exact[key]
+    assert [a["author"] for a in streamed["recent_authors"]] == [a["author"] for a in exact["recent_authors"]]
+    assert abs(streamed["authors_total"] - 300) <= 10
+
+
+def test_streaming_rejects_workers(git_repo):
+    import pytest
+
+    with pytest.raises(ValueError):
+        activity_mod.analyze_activity(str(git_repo), since_days=30, streaming=True, workers=2)
+
+
+def test_all_refs_union_counts_each_commit_once(git_repo, git, git_commit):
+    import pytest
+
+    git(git_repo, "checkout", "-q", "-b", "release/1.x", "HEAD~1")
+    git_commit(git_repo, "fix.txt", "x", 2, email="d@example.com")
+    git(git_repo, "tag", "-a", "v1.0", "-m", "versão 1.0")
+    git(git_repo, "checkout", "-q", "main")
+
+    head = activity_mod.analyze_activity(str(git_repo), since_days=30, backend="git")
+    union = activity_mod.analyze_activity(str(git_repo), since_days=30, backend="git", refs=activity_mod.ALL_REFS)
+    assert union["refs"] == ["main", "release/1.x", "side", "v1.0"]
+    assert union["commits_total"] == head["commits_total"] + 1
+    assert union["authors_total"] == head["authors_total"] + 1
+
+    split = activity_mod.analyze_activity(
+        str(git_repo), since_days=30, backend="git", refs=["main", "release/*"], per_ref=True,
+    )
+    per_ref = split.pop("per_ref")
+    assert split["refs"] == ["main", "release/1.x"]
+    assert {k: v for k, v in split.items() if k != "refs"} == {k: v for k, v in union.items() if k != "refs"}
+    assert per_ref["main"] == head
+    # release/1.x parte do commit anterior ao merge: não alcança side nem o merge
+    assert per_ref["release/1.x"]["commits_total"] == 4 and per_ref["release/1.x"]["merge_commits"] == 0
+
+    with pytest.raises(ValueError):
+        activity_mod.analyze_activity(str(git_repo), since_days=30, backend="git", refs=["nada/*"])
+    with pytest.raises(ValueError):
+        activity_mod.analyze_activity(str(git_repo), since_days=30, backend="pydriller", refs=["main"])
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+import repo_miner.batch as batch_mod
+import repo_miner.cli as cli_mod
+
+
+@pytest.fixture
+def make_repo(git, git_commit):
+    def make(path, requirements):
+        git(path.parent, "init", "-q", str(path))
+        git_commit(path, "requirements.txt", requirements, 5)
+        git_commit(path, "README.md", "x", 2, email="b@example.com")
+        return path
+
+    return make
+
+
+class CountingResolver:
+    def __init__(self):
+        self.names = []
+        self.pairs = []
+
+    def resolve(self, packages, latest_for=None):
+        packages = list(packages)
+        pairs = [(n, v) for n, v in packages if v]
+        self.names.extend(latest_for)
+        self.pairs.extend(pairs)
+        latest = {n: "9.0.0" for n in latest_for}
+        vulns = {p: [{"id": f"VULN-{p[0]}"}] if p[0] == "jinja2" else [] for p in pairs}
+        return latest, vulns, {}
+
+
+def test_batch_dedups_lookups_across_fleet(tmp_path, make_repo):
+    repos = [
+        make_repo(tmp_path / "a", "requests==2.0.0\njinja2==2.10\n"),
+        make_repo(tmp_path / "b", "Requests==2.0.0\njinja2==3.1.0\n"),
+        make_repo(tmp_path / "c", "requests==2.0.0\n"),
+    ]
+    resolver = CountingResolver()
+    out = tmp_path / "fleet.jsonl"
+    stats = batch_mod.run_batch(
+        [str(r) for r in repos] + ["", "# comentário", str(repos[0])], out, jobs=2,
+        fleet=batch_mod.FleetResolver(resolver=resolver),
+    )
+    assert stats == {"total": 3, "skipped": 0, "ok": 3, "failed": 0}
+    rows = {row["repo"]: row for row in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+    assert set(rows) == {str(r) for r in repos}
+    assert rows[str(repos[0])]["activity"]["commits_total"] == 2
+    assert rows[str(repos[0])]["dependencies"]["summary"] == {"packages_total": 2, "outdated_total": 2, "vulnerable_total": 1, "unknown_total": 0}
+    assert 0 <= rows[str(repos[2])]["maintenance_score"] <= 100
+    # cada nome/par é consultado uma vez para a frota inteira
+    assert sorted(n.lower() for n in resolver.names) == ["jinja2", "requests"]
+    assert sorted((n.lower(), v) for n, v in resolver.pairs) == [("jinja2", "2.10"), ("jinja2", "3.1.0"), ("requests", "2.0.0")]
+
+
+def test_batch_resumes_from_output(tmp_path, make_repo):
+    a = make_repo(tmp_path / "a", "requests==2.0.0\n")
+    b = make_repo(tmp_path / "b", "flask==2.0.0\n")
+    missing = tmp_path / "nao-existe"
+    out = tmp_path / "fleet.jsonl"
+    done = {"repo": str(a), "activity": {}, "dependencies": {}, "maintenance_score": 1}
+    out.write_text(
+        json.dumps(done) + "\n" + json.dumps({"repo": str(b), "error": "falhou"}) + "\n" + '{"repo": "trunc',
+        encoding="utf-8",
+    )
+
+    stats = batch_mod.run_batch([str(a), str(b), str(missing)], out, jobs=2)
+    assert stats == {"total": 3, "skipped": 1, "ok": 1, "failed": 1}
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert rows[0] == done
+    by_repo = {row["repo"]: row for row in rows}
+    assert len(rows) == 3
+    assert by_repo[str(b)]["dependencies"]["packages"][0]["name"] == "flask"
+    assert "error" in by_repo[str(missing)]
+
+
+def test_cli_batch_reads_stdin(tmp_path, make_repo):
+    repo = make_repo(tmp_path / "a", "requests==2.0.0\n")
+    out = tmp_path / "out.jsonl"
+    result = CliRunner().invoke(cli_mod.app, ["batch", "--out", str(out), "--offline", "--jobs", "1"], input=f"{repo}\n")
+    assert result.exit_code == 0, result.output
+    row = json.loads(out.read_text(encoding="utf-8"))
+    assert row["repo"] == str(repo)
+    assert row["dependencies"]["packages"][0]["latest_version"] is None
@@ -0,0 +1,121 @@
+import json
+import time
+
+from typer.testing import CliRunner
+
+from repo_miner import deps as deps_mod
+from repo_miner import osv as osv_mod
+from repo_miner.cache import HttpCache, cached_get
+from repo_miner.cli import app
+
+
+class DummyResp:
+    def __init__(self, status_code=200, json_data=None, headers=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+        self.content = json.dumps(self._json).encode("utf-8")
+        self.headers = headers or {}
+
+    def json(self):
+        return self._json
+
+
+def test_fresh_entry_skips_network(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path)
+    calls = []
+
+    def fake_get(url, timeout=15, headers=None):
+        calls.append(headers)
+        return DummyResp(200, {"info": {"version": "1.2.3"}}, headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(deps_mod.transport, "get_client", lambda: type("C", (), {"get": staticmethod(fake_get)}))
+    assert deps_mod._latest_pypi_version("foo", cache=cache) == "1.2.3"
+    assert deps_mod._latest_pypi_version("foo", cache=cache) == "1.2.3"
+    assert len(calls) == 1
+    assert cache.hits == 1
+
+
+def test_stale_entry_is_revalidated_with_etag(tmp_path):
+    cache = HttpCache(tmp_path, ttls={"pypi": 0})
+    seen = []
+
+    def first(headers):
+        return DummyResp(200, {"v": 1}, headers={"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    def second(headers):
+        seen.append(headers)
+        return DummyResp(304)
+
+    cached_get(cache, "pypi", "k", first)
+    r = cached_get(cache, "pypi", "k", second)
+    assert seen == [{"If-None-Match": '"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}]
+    assert r.status_code == 200 and r.json() == {"v": 1}
+    assert cache.revalidated == 1
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=25)
+    cache.put("a", "pypi", b"x" * 10)
+    time.sleep(0.01)
+    cache.put("b", "pypi", b"x" * 10)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.put("c", "pypi", b"x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_puts_keep_a_running_total_and_hits_are_batched(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=10_000)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    for i in range(50):
+        cache.put(f"k{i}", "pypi", b"x" * 10)
+    cache.put("k0", "pypi", b"x" * 30)
+    assert sum("SUM(size)" in s for s in statements) == 1
+    assert cache._total == 49 * 10 + 30
+
+    statements.clear()
+    for _ in range(20):
+        cache.get("k1")
+    assert not any(s.startswith("UPDATE") for s in statements)
+    cache.put("big", "pypi", b"x" * 9_500)  # passa do limite: grava os acessos antes de despejar
+    assert cache.get("k1") is not None and cache.get("k2") is None
+
+
+def test_prune_removes_expired_per_source(tmp_path):
+    cache = HttpCache(tmp_path, ttls={"pypi": 3600, "osv": 0})
+    cache.put("p", "pypi", b"1")
+    cache.put("o", "osv", b"2")
+    assert cache.prune() == 1
+    stats = cache.stats()
+    assert stats["entries"] == 1 and "pypi" in stats["sources"]
+
+
+def test_osv_query_results_are_cached_per_pair(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path)
+    posted = []
+
+    def fake_post(url, data=None, headers=None, timeout=30):
+        queries = json.loads(data)["queries"]
+        posted.append([q["package"]["name"] for q in queries])
+        return DummyResp(200, {"results": [{"vulns": [{"id": "OSV-1"}]} for _ in queries]})
+
+    monkeypatch.setattr(osv_mod.transport, "get_client", lambda: type("C", (), {"post": staticmethod(fake_post)}))
+    osv_mod.query_batch([("a", "1.0")], cache=cache)
+    ids = osv_mod.query_batch([("a", "1.0"), ("b", "1.0")], cache=cache)
+    assert posted == [["a"], ["b"]]
+    assert ids[("a", "1.0")] == ["OSV-1"]
+
+
+def test_cli_cache_stats_and_prune(tmp_path):
+    HttpCache(tmp_path, ttls={"osv": 0}).put("o", "osv", b"2")
+    runner = CliRunner()
+    result = runner.invoke(app, ["cache", "stats", "--cache-dir", str(tmp_path)])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["entries"] == 1
+
+    result = runner.invoke(app, ["cache", "prune", "--cache-dir", str(tmp_path), "--osv-ttl", "0"])
+    assert result.exit_code == 0
+    assert HttpCache(tmp_path).stats()["entries"] == 0
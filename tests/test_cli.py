@@ -9,7 +9,7 @@ runner = CliRunner()
 
 
 def test_cli_activity_json(tmp_path, monkeypatch):
-    def fake_analyze_activity(repo_path: str, since_days: int = 365):
+    def fake_analyze_activity(repo_path: str, since_days: int = 365, **kwargs):
         return {"commits_total": 42, "days_since_last_commit": 1}
 
     import repo_miner.cli as cli_mod
@@ -34,7 +34,7 @@ def test_cli_deps_offline_json_csv(tmp_path, monkeypatch):
 
     import repo_miner.cli as cli_mod
 
-    monkeypatch.setattr(cli_mod, "analyze_dependencies", lambda p, offline=False: report)
+    monkeypatch.setattr(cli_mod, "analyze_dependencies", lambda p, offline=False, **kwargs: report)
 
     json_path = tmp_path / "deps.json"
     csv_path = tmp_path / "deps.csv"
@@ -48,11 +48,11 @@ def test_cli_deps_offline_json_csv(tmp_path, monkeypatch):
 def test_cli_analyze_score(tmp_path, monkeypatch):
     import repo_miner.cli as cli_mod
 
-    monkeypatch.setattr(cli_mod, "analyze_activity", lambda repo_path, since_days=365: {"commits_total": 100, "days_since_last_commit": 2})
+    monkeypatch.setattr(cli_mod, "analyze_activity", lambda repo_path, since_days=365, **kwargs: {"commits_total": 100, "days_since_last_commit": 2})
     monkeypatch.setattr(
         cli_mod,
         "analyze_dependencies",
-        lambda p: {"packages": [{"is_outdated": True}, {"is_outdated": False}]},
+        lambda p, **kwargs: {"packages": [{"is_outdated": True}, {"is_outdated": False}]},
     )
     result = runner.invoke(app, ["analyze", str(tmp_path)])
     assert result.exit_code == 0
@@ -82,3 +82,97 @@ def test_cli_deps_offline(tmp_path):
 
     output = result.stdout.strip()
     assert output.startswith("{") or output.startswith("[")
+
+
+def test_cli_deps_streams_ndjson_and_csv(tmp_path, monkeypatch):
+    import repo_miner.cli as cli_mod
+
+    def fail(*args, **kwargs):
+        raise AssertionError("relatório completo não deveria ser montado")
+
+    monkeypatch.setattr(cli_mod, "analyze_dependencies", fail)
+    (tmp_path / "requirements.txt").write_text("requests==2.0.0\nflask\n", encoding="utf-8")
+    ndjson_path = tmp_path / "deps.ndjson"
+    csv_path = tmp_path / "deps.csv"
+    result = runner.invoke(app, ["deps", str(tmp_path), "--offline", "--ndjson-out", str(ndjson_path), "--csv-out", str(csv_path)])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in ndjson_path.read_text(encoding="utf-8").splitlines()]
+    assert [r["name"] for r in rows] == ["flask", "requests"]
+    assert len(csv_path.read_text(encoding="utf-8").splitlines()) == 3
+    assert '"packages_total": 2' in result.stdout
+    assert "Nenhum arquivo" not in result.stdout
+
+    empty = tmp_path / "vazio"
+    empty.mkdir()
+    result = runner.invoke(app, ["deps", str(empty), "--offline", "--ndjson-out", str(ndjson_path)])
+    assert result.exit_code == 0, result.output
+    assert "Nenhum arquivo requirements.txt ou pyproject.toml" in result.stdout
+
+
+def test_cli_analyze_runs_stages_concurrently(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    import repo_miner.cli as cli_mod
+
+    # as duas etapas só passam da barreira se estiverem rodando ao mesmo tempo;
+    # em sequência, a primeira estoura o prazo e a análise falha
+    barrier = threading.Barrier(2, timeout=10)
+
+    def slow_activity(repo_path, since_days=365, **kwargs):
+        barrier.wait()
+        return {"commits_total": 100, "days_since_last_commit": 2}
+
+    def slow_deps(p, **kwargs):
+        barrier.wait()
+        return {"packages": [{"is_outdated": True}]}
+
+    monkeypatch.setattr(cli_mod, "analyze_activity", slow_activity)
+    monkeypatch.setattr(cli_mod, "analyze_dependencies", slow_deps)
+    result = runner.invoke(app, ["analyze", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.stdout)
+    assert data["maintenance_score"] == 50 + 10 + 18 - 5
+    assert set(data["timings"]) == {"activity_s", "dependencies_s", "total_s"}
+
+    monkeypatch.setattr(cli_mod, "analyze_dependencies", lambda p, **kwargs: time.sleep(2))
+    result = runner.invoke(app, ["analyze", str(tmp_path), "--timeout", "0.5"])
+    assert result.exit_code == 1
+    assert "dependencies" in result.stdout
+
+
+def test_cli_activity_windows_and_series(git_repo, tmp_path):
+    out = tmp_path / "windows.json"
+    result = runner.invoke(app, [
+        "activity", str(git_repo), "--backend", "git", "--windows", "7,30", "--series", "monthly",
+        "--since-days", "60", "--json-out", str(out),
+    ])
+    assert result.exit_code == 0, result.output
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert set(data["windows"]) == {"7", "30"}
+    assert data["windows"]["30"]["commits_total"] == 5
+    assert sum(r["commits_total"] for r in data["series"]) == 6
+
+    bad = runner.invoke(app, ["activity", str(git_repo), "--windows", "30,x"])
+    assert bad.exit_code == 1
+    for extra in (["--workers", "2"], ["--streaming"]):
+        bad = runner.invoke(app, ["activity", str(git_repo), "--series", "weekly", *extra])
+        assert bad.exit_code == 1 and "não podem ser combinados" in bad.output
+
+
+def test_cli_activity_all_refs_per_ref(git_repo, git, tmp_path):
+    git(git_repo, "branch", "release/1.x", "HEAD~1")
+    out = tmp_path / "refs.json"
+    result = runner.invoke(app, [
+        "activity", str(git_repo), "--all-refs", "--per-ref", "--since-days", "30", "--json-out", str(out),
+    ])
+    assert result.exit_code == 0, result.output
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["refs"] == ["main", "release/1.x", "side"]
+    assert data["commits_total"] == 5
+    assert {name: m["commits_total"] for name, m in data["per_ref"].items()} == {"main": 5, "release/1.x": 3, "side": 3}
+
+    bad = runner.invoke(app, ["activity", str(git_repo), "--backend", "pydriller", "--all-refs"])
+    assert bad.exit_code == 1 and "--backend pydriller" in bad.output
+    bad = runner.invoke(app, ["activity", str(git_repo), "--backend", "git", "--per-ref"])
+    assert bad.exit_code == 1
@@ -2,30 +2,39 @@ import json
 from typer.testing import CliRunner
 
 import repo_miner.cli as cli_mod
+from repo_miner.mirrors import MirrorCache
 
 
-def test_cli_deps_remote_clone(monkeypatch, tmp_path):
-    clone_dir = tmp_path / "cloned"
-
-    def fake_mkdtemp(prefix="repo_miner_clone_"):
-        clone_dir.mkdir()
-        return str(clone_dir)
-
-    def fake_run(cmd, check=True, capture_output=True):  # simulate git clone
-        (clone_dir / "pyproject.toml").write_text(
-            '[project]\nname="x"\nversion="0.0.1"\ndependencies=["requests==2.0.0"]\n',
-            encoding="utf-8",
-        )
-        class R:
-            returncode = 0
-        return R()
-
-    monkeypatch.setattr(cli_mod.tempfile, "mkdtemp", fake_mkdtemp)
-    monkeypatch.setattr(cli_mod.subprocess, "run", fake_run)
+def test_cli_deps_remote_clone(tmp_path, git, git_commit):
+    origin = tmp_path / "org" / "repo"
+    origin.mkdir(parents=True)
+    git(origin, "init", "-q")
+    git(origin, "config", "uploadpack.allowFilter", "true")
+    git_commit(origin, "pyproject.toml", '[project]\nname="x"\nversion="0.0.1"\ndependencies=["requests==2.0.0"]\n', 3)
+    url = origin.as_uri()
 
     runner = CliRunner()
     out_json = tmp_path / "deps.json"
-    result = runner.invoke(cli_mod.app, ["deps", "https://github.com/org/repo", "--offline", "--json-out", str(out_json)])
-    assert result.exit_code == 0
+    result = runner.invoke(cli_mod.app, ["deps", url, "--offline", "--json-out", str(out_json)])
+    assert result.exit_code == 0, result.output
     data = json.loads(out_json.read_text(encoding="utf-8"))
-    assert data["summary"]["packages_total"] == 1
\ No newline at end of file
+    assert data["summary"]["packages_total"] == 1
+    # só os manifestos foram buscados: nenhum espelho do histórico é criado pelo deps
+    assert MirrorCache().entries() == []
+
+    out_activity = tmp_path / "activity.json"
+    result = runner.invoke(cli_mod.app, ["activity", url, "--backend", "git", "--json-out", str(out_activity)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(out_activity.read_text(encoding="utf-8"))["commits_total"] == 1
+    assert [e["url"] for e in MirrorCache().entries()] == [url]
+
+    # com o espelho já existente, o deps o atualiza e lê os manifestos dele
+    git_commit(origin, "requirements.txt", "flask==2.0.0\n", 1)
+    result = runner.invoke(cli_mod.app, ["deps", url + ".git/", "--offline", "--json-out", str(out_json)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(out_json.read_text(encoding="utf-8"))["summary"]["packages_total"] == 2
+
+
+def test_cli_deps_rejects_url_without_project():
+    result = CliRunner().invoke(cli_mod.app, ["deps", "https://github.com/org", "--offline"])
+    assert result.exit_code == 1
@@ -0,0 +1,45 @@
+from repo_miner import activity as activity_mod
+from repo_miner.commit_index import CommitIndex
+
+
+def test_incremental_matches_full_scan(git_repo, tmp_path):
+    full = activity_mod.analyze_activity(str(git_repo), since_days=30, backend="git")
+    incremental = activity_mod.analyze_activity(str(git_repo), since_days=30, incremental=True, index_dir=tmp_path / "idx")
+    assert incremental == full
+
+
+def test_update_only_walks_new_commits(git_repo, git_commit, tmp_path):
+    index = CommitIndex(str(git_repo), tmp_path / "idx")
+    assert index.update()["mode"] == "full"
+    assert len(index) == 6
+    assert index.update() == {"mode": "noop", "added": 0, "head": index._meta("head")}
+
+    git_commit(git_repo, "novo.txt", "n", 1, email="d@example.com")
+    git_commit(git_repo, "novo.txt", "n2", 0, email="d@example.com")
+    result = index.update()
+    assert result["mode"] == "incremental" and result["added"] == 2
+    assert len(index) == 8
+
+    # qualquer janela é recalculada a partir do índice
+    metrics = activity_mod.analyze_activity(str(git_repo), since_days=10, incremental=True, index_dir=tmp_path / "idx")
+    assert metrics == activity_mod.analyze_activity(str(git_repo), since_days=10, backend="git")
+    assert metrics["recent_authors"][0]["author"] == "d@example.com"
+
+
+def test_rewritten_history_triggers_rebuild(git_repo, git, git_commit, tmp_path):
+    index = CommitIndex(str(git_repo), tmp_path / "idx")
+    index.update()
+    git(git_repo, "reset", "-q", "--hard", "HEAD~2")
+    git_commit(git_repo, "outro.txt", "x", 0, email="e@example.com")
+    result = index.update()
+    assert result["mode"] == "rebuild"
+    assert len(index) == 4
+    shas = {r.sha for r in index.records(*_whole_range())}
+    head = git(git_repo, "rev-parse", "HEAD").stdout.decode().strip()
+    assert head in shas
+
+
+def _whole_range():
+    from datetime import datetime, timezone
+
+    return datetime(1970, 1, 2, tzinfo=timezone.utc), datetime(2100, 1, 1, tzinfo=timezone.utc)
@@ -1,5 +1,6 @@
 from pathlib import Path
 from repo_miner import deps as deps_mod
+from repo_miner import osv
 
 
 class DummyResp:
@@ -12,20 +13,24 @@ class DummyResp:
 
 
 def test_latest_pypi_version(monkeypatch):
-    def fake_get(url, timeout=15):
+    def fake_get(url, timeout=15, headers=None):
         return DummyResp(200, {"info": {"version": "1.2.3"}})
 
-    monkeypatch.setattr(deps_mod, "requests", type("R", (), {"get": staticmethod(fake_get)}))
+    monkeypatch.setattr(deps_mod.transport, "get_client", lambda: type("C", (), {"get": staticmethod(fake_get)}))
     assert deps_mod._latest_pypi_version("foo") == "1.2.3"
 
 
-def test_osv_query(monkeypatch):
+def test_osv_lookup(monkeypatch):
     def fake_post(url, data=None, headers=None, timeout=20):
-        return DummyResp(200, {"vulns": [{"id": "OSV-1", "summary": "x"}]})
+        return DummyResp(200, {"results": [{"vulns": [{"id": "OSV-1"}]}]})
 
-    monkeypatch.setattr(deps_mod, "requests", type("R", (), {"post": staticmethod(fake_post)}))
-    vulns = deps_mod._osv_query("pkg", "1.0.0")
-    assert vulns and vulns[0]["id"] == "OSV-1"
+    def fake_get(url, timeout=20, headers=None):
+        return DummyResp(200, {"id": "OSV-1", "summary": "x"})
+
+    client = type("C", (), {"post": staticmethod(fake_post), "get": staticmethod(fake_get)})
+    monkeypatch.setattr(deps_mod.transport, "get_client", lambda: client)
+    vulns = osv.lookup([("pkg", "1.0.0")])[("pkg", "1.0.0")]
+    assert vulns and vulns[0]["id"] == "OSV-1" and vulns[0]["summary"] == "x"
 
 
 def test_analyze_dependencies_offline(tmp_path: Path):
@@ -36,27 +41,34 @@ def test_analyze_dependencies_offline(tmp_path: Path):
 
 
 def test_latest_pypi_version_non_200(monkeypatch):
-    """_latest_pypi_version deve retornar None se o PyPI responder com erro."""
+    """_latest_pypi_version retorna None para pacote inexistente (404) e levanta erro nas demais falhas."""
+    import pytest
 
     from repo_miner import deps as deps_mod
 
-    def fake_get(url, timeout=15):
-        # Simula um erro no servidor do PyPI
-        return DummyResp(status_code=500, json_data={})
+    status = {"code": 404}
+
+    def fake_get(url, timeout=15, headers=None):
+        return DummyResp(status_code=status["code"], json_data={})
 
-    # Substitui o módulo requests dentro de deps_mod por um "fake"
+    # Substitui o cliente HTTP compartilhado por um "fake"
     monkeypatch.setattr(
-        deps_mod,
-        "requests",
-        type("R", (), {"get": staticmethod(fake_get)}),
+        deps_mod.transport,
+        "get_client",
+        lambda: type("C", (), {"get": staticmethod(fake_get)}),
     )
 
     ver = deps_mod._latest_pypi_version("qualquer-coisa")
     assert ver is None
 
+    # erro no servidor do PyPI: não é "sem última versão"
+    status["code"] = 500
+    with pytest.raises(RuntimeError):
+        deps_mod._latest_pypi_version("qualquer-coisa")
 
-def test_osv_query_non_200(monkeypatch):
-    """_osv_query deve retornar lista vazia se a API do OSV falhar."""
+
+def test_osv_lookup_non_200(monkeypatch):
+    """osv.lookup marca o par como desconhecido (None), e não como limpo, se a API do OSV falhar."""
 
     from repo_miner import deps as deps_mod
 
@@ -65,10 +77,38 @@ def test_osv_query_non_200(monkeypatch):
         return DummyResp(status_code=500, json_data={})
 
     monkeypatch.setattr(
-        deps_mod,
-        "requests",
-        type("R", (), {"post": staticmethod(fake_post)}),
+        deps_mod.transport,
+        "get_client",
+        lambda: type("C", (), {"post": staticmethod(fake_post)}),
     )
 
-    vulns = deps_mod._osv_query("pacote-x", "1.0.0")
-    assert vulns == []
+    assert osv.lookup([("pacote-x", "1.0.0")]) == {("pacote-x", "1.0.0"): None}
+
+
+def test_latest_pypi_version_simple_api(monkeypatch):
+    """No modo 'simple', a última versão estável é calculada localmente."""
+    seen = {}
+
+    def fake_get(url, timeout=15, headers=None):
+        seen["url"], seen["headers"] = url, headers
+        return DummyResp(200, {
+            "versions": ["1.9.0", "2.0.0", "2.1.0", "3.0.0rc1", "10.0.0.dev1"],
+            "files": [
+                {"filename": "pkg-1.9.0.tar.gz", "yanked": False},
+                {"filename": "pkg-2.0.0-py3-none-any.whl", "yanked": False},
+                {"filename": "pkg-2.1.0-py3-none-any.whl", "yanked": "broken"},
+                {"filename": "pkg-2.1.0.tar.gz", "yanked": True},
+                {"filename": "pkg-3.0.0rc1.tar.gz", "yanked": False},
+            ],
+        })
+
+    monkeypatch.setattr(deps_mod.transport, "get_client", lambda: type("C", (), {"get": staticmethod(fake_get)}))
+    assert deps_mod._latest_pypi_version("pkg", api="simple") == "2.0.0"
+    assert seen["url"] == "https://pypi.org/simple/pkg/"
+    assert seen["headers"]["Accept"] == "application/vnd.pypi.simple.v1+json"
+
+
+def test_file_version_from_distribution_names():
+    assert deps_mod._file_version("google-cloud-storage-2.14.0.tar.gz") == "2.14.0"
+    assert deps_mod._file_version("google_cloud_storage-2.14.0-py2.py3-none-any.whl") == "2.14.0"
+    assert deps_mod._file_version("README.txt") is None
@@ -46,3 +46,29 @@ def test_parse_pyproject(tmp_path: Path):
     pkgs = deps_mod._parse_pyproject(tmp_path / "pyproject.toml")
     names = {p["name"] for p in pkgs}
     assert {"flask", "uvicorn", "requests"}.issubset(names)
+
+
+def test_parse_lockfiles(tmp_path: Path):
+    (tmp_path / "poetry.lock").write_text('[[package]]\nname = "flask"\nversion = "3.0.0"\n', encoding="utf-8")
+    (tmp_path / "uv.lock").write_text(
+        '[[package]]\nname = "app"\nversion = "0.1.0"\nsource = { virtual = "." }\n\n'
+        '[[package]]\nname = "idna"\nversion = "3.6"\nsource = { registry = "https://pypi.org/simple" }\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "Pipfile.lock").write_text(
+        '{"default": {"certifi": {"version": "==2024.2.2"}, "local": {"path": ".", "editable": true}},'
+        ' "develop": {"tool": {"git": "https://github.com/org/tool.git", "ref": "abc"},'
+        ' "wheel": {"file": "https://example.com/w.whl"}, "pytest": {"version": "==8.0.0"}}}',
+        encoding="utf-8",
+    )
+    assert deps_mod._parse_poetry_lock(tmp_path / "poetry.lock") == [{"name": "flask", "version": "3.0.0"}]
+    assert deps_mod._parse_uv_lock(tmp_path / "uv.lock") == [{"name": "idna", "version": "3.6"}]
+    assert deps_mod._parse_pipfile_lock(tmp_path / "Pipfile.lock") == [
+        {"name": "certifi", "version": "2024.2.2"},
+        {"name": "pytest", "version": "8.0.0"},
+    ]
+
+
+def test_parse_requirements_skips_pip_options(tmp_path: Path):
+    (tmp_path / "requirements.txt").write_text("-r base.txt\n-e .\n--index-url https://x\nrequests==2.0.0\n", encoding="utf-8")
+    assert deps_mod._parse_requirements(tmp_path / "requirements.txt") == [{"name": "requests", "version": "2.0.0"}]
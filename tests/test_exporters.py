@@ -32,3 +32,39 @@ def test_export_csv_empty(tmp_path):
 
     content = out.read_text(encoding="utf-8")
     assert content == ""
+
+
+def test_export_ndjson_streams_generator(tmp_path):
+    from repo_miner.exporters import export_ndjson
+
+    out = tmp_path / "rows.ndjson"
+    count = export_ndjson(({"i": i, "nome": "ção"} for i in range(3)), out)
+
+    assert count == 3
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["i"] for l in lines] == [0, 1, 2]
+    assert "ção" in lines[0]
+
+
+def test_csv_writer_declared_schema(tmp_path):
+    import pytest
+    from repo_miner.exporters import CsvWriter
+
+    out = tmp_path / "declared.csv"
+    with CsvWriter(out, fieldnames=["name", "val"]) as writer:
+        writer.write({"name": "x", "val": 1})
+        writer.write({"name": "y"})
+        with pytest.raises(ValueError):
+            writer.write({"name": "z", "extra": 1})
+    assert out.read_text(encoding="utf-8").splitlines() == ["name,val", "x,1", "y,"]
+
+
+def test_csv_writer_spills_unknown_schema(tmp_path):
+    from repo_miner.exporters import export_csv
+
+    out = tmp_path / "spilled.csv"
+    rows = ({"name": f"p{i}", **({"extra": i} if i % 2 else {})} for i in range(4))
+    assert export_csv(rows, out) == 4
+    assert out.read_text(encoding="utf-8").splitlines() == ["extra,name", ",p0", "1,p1", ",p2", "3,p3"]
+    # o arquivo temporário de despejo é removido
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["spilled.csv"]
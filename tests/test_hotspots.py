@@ -0,0 +1,84 @@
+import json
+
+from typer.testing import CliRunner
+
+from repo_miner import hotspots
+from repo_miner.activity import _FIELD_SEP, _RECORD_SEP
+from repo_miner.cli import app
+
+
+def _raw(parents, lines, ts=1_700_000_000):
+    header = _RECORD_SEP + _FIELD_SEP.join(["abc", str(ts), "a@example.com", "A", parents]) + _FIELD_SEP
+    return (header + "\n" + "\n".join(lines) + "\n").split(_RECORD_SEP, 1)[1]
+
+
+def test_parse_numstat_renames_binary_and_quoted_paths():
+    change = hotspots._parse_numstat(_raw("p1", [
+        "3\t1\tsrc/app.py",
+        "-\t-\tlogo.png",
+        "0\t0\tsrc/{old => new}/mod.py",
+        "2\t0\tdocs/a.md => guide/a.md",
+        '1\t0\t"caf\\303\\251.txt"',
+    ]))
+    assert change.author == "a@example.com"
+    assert change.files == [
+        hotspots.FileChange("src/app.py", 3, 1),
+        hotspots.FileChange("logo.png", 0, 0),
+        hotspots.FileChange("src/new/mod.py", 0, 0, "src/old/mod.py"),
+        hotspots.FileChange("guide/a.md", 2, 0, "docs/a.md"),
+        hotspots.FileChange("café.txt", 1, 0),
+    ]
+    assert hotspots._split_rename("{a => }/x.py") == ("x.py", "a/x.py")
+    # merges só repetem as mudanças dos pais
+    assert hotspots._parse_numstat(_raw("p1 p2", ["5\t5\tsrc/app.py"])) is None
+
+
+def test_aggregator_follows_renames_and_ranks():
+    agg = hotspots.ChurnAggregator()
+    for ts, author, files in [
+        (100, "a", [hotspots.FileChange("old.py", 10, 0), hotspots.FileChange("b.py", 1, 0)]),
+        (200, "b", [hotspots.FileChange("new.py", 2, 2, "old.py")]),
+        (300, "c", [hotspots.FileChange("b.py", 1, 1)]),
+        (400, "c", [hotspots.FileChange("b.py", 1, 0)]),
+    ]:
+        agg.add(hotspots.CommitChanges(hotspots.datetime.fromtimestamp(ts, hotspots.timezone.utc), author, files))
+    assert set(agg.files) == {"new.py", "b.py"}
+    top = agg.top(5)
+    assert [(r["path"], r["churn"], r["commits"], r["authors"]) for r in top] == [("new.py", 14, 2, 2), ("b.py", 4, 3, 2)]
+    assert [r["path"] for r in agg.top(1, sort="commits")] == ["b.py"]
+    assert agg.top(5, keep={"b.py"})[0]["path"] == "b.py" and len(agg.top(5, keep={"b.py"})) == 1
+
+
+def test_analyze_hotspots_real_repo(git_repo, git, git_commit):
+    git_commit(git_repo, "f0.txt", "0\n1\n2\n", 2, email="c@example.com")
+    git(git_repo, "mv", "f1.txt", "renamed.txt")
+    git(git_repo, "commit", "-q", "-m", "renomeia")
+    git(git_repo, "rm", "-q", "f2.txt")
+    git(git_repo, "commit", "-q", "-m", "remove")
+
+    result = hotspots.analyze_hotspots(str(git_repo), since_days=60)
+    rows = {r["path"]: r for r in result["hotspots"]}
+    assert result["commits_total"] == 8  # o merge não conta
+    assert rows["f0.txt"]["commits"] == 2 and rows["f0.txt"]["authors"] == 2 and rows["f0.txt"]["churn"] == 5
+    assert rows["renamed.txt"]["commits"] == 2 and "f1.txt" not in rows
+    assert "f2.txt" not in rows
+    assert result["hotspots"][0]["path"] == "f0.txt"
+
+    with_deleted = hotspots.analyze_hotspots(str(git_repo), since_days=60, include_deleted=True)
+    assert "f2.txt" in {r["path"] for r in with_deleted["hotspots"]}
+    # os dois backends produzem os mesmos agregados
+    assert hotspots.analyze_hotspots(str(git_repo), since_days=60, backend="pydriller") == result
+
+
+def test_cli_hotspots(git_repo, tmp_path):
+    json_out, csv_out = tmp_path / "h.json", tmp_path / "h.csv"
+    result = CliRunner().invoke(app, [
+        "hotspots", str(git_repo), "--top", "2", "--sort", "authors", "--json-out", str(json_out), "--csv-out", str(csv_out),
+    ])
+    assert result.exit_code == 0, result.output
+    data = json.loads(json_out.read_text(encoding="utf-8"))
+    assert data["sort"] == "authors" and len(data["hotspots"]) == 2
+    assert csv_out.read_text(encoding="utf-8").splitlines()[0].startswith("path,churn")
+
+    result = CliRunner().invoke(app, ["hotspots", str(git_repo), "--sort", "size"])
+    assert result.exit_code == 1 and "--sort" in result.output
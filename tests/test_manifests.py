@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+
+from repo_miner import deps as deps_mod
+from repo_miner.manifests import find_manifests, scan_packages
+
+
+def _write(root: Path, rel: str, content: str) -> None:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def _monorepo(root: Path) -> Path:
+    _write(root, "pyproject.toml", '[project]\nname="mono"\ndependencies=["requests==2.31.0"]\n')
+    _write(root, "services/api/requirements.txt", "-r requirements/base.txt\nrequests==2.31.0\nflask\n")
+    _write(root, "services/api/requirements/base.txt", "Jinja2==3.1.2\n")
+    _write(root, "services/api/poetry.lock", '[[package]]\nname = "flask"\nversion = "3.0.0"\n')
+    _write(root, "services/worker/Pipfile.lock", json.dumps({
+        "default": {"requests": {"version": "==2.28.0"}, "jinja2": {"version": "==3.1.2"}},
+        "develop": {"pytest": {"version": "==8.0.0"}},
+    }))
+    _write(root, "libs/core/uv.lock", (
+        '[[package]]\nname = "core"\nversion = "0.1.0"\nsource = { editable = "." }\n\n'
+        '[[package]]\nname = "requests"\nversion = "2.31.0"\nsource = { registry = "https://pypi.org/simple" }\n'
+    ))
+    # podados: .git, node_modules, virtualenvs (por nome ou pyvenv.cfg) e .gitignore
+    _write(root, ".git/requirements.txt", "nao==1\n")
+    _write(root, "web/node_modules/pkg/requirements.txt", "nao==1\n")
+    _write(root, ".venv/lib/requirements.txt", "nao==1\n")
+    _write(root, "tools/env/pyvenv.cfg", "home = /usr\n")
+    _write(root, "tools/env/requirements.txt", "nao==1\n")
+    _write(root, ".gitignore", "build/\n/generated\n*.tmp.txt\n")
+    _write(root, "build/requirements.txt", "nao==1\n")
+    _write(root, "generated/requirements.txt", "nao==1\n")
+    _write(root, "libs/generated/requirements.txt", "pyyaml==6.0\n")
+    _write(root, "libs/requirements.tmp.txt", "nao==1\n")
+    _write(root, "libs/core/.gitignore", "*.txt\n!requirements-dev.txt\n")
+    _write(root, "libs/core/requirements.txt", "nao==1\n")
+    _write(root, "libs/core/requirements-dev.txt", "black==24.1.0\n")
+    return root
+
+
+def test_find_manifests_prunes_and_honors_gitignore(tmp_path):
+    found = find_manifests(_monorepo(tmp_path), workers=4)
+    assert found == [
+        "libs/core/requirements-dev.txt",
+        "libs/core/uv.lock",
+        "libs/generated/requirements.txt",
+        "pyproject.toml",
+        "services/api/poetry.lock",
+        "services/api/requirements.txt",
+        "services/api/requirements/base.txt",
+        "services/worker/Pipfile.lock",
+    ]
+
+
+def test_scan_packages_dedups_pins_with_used_by(tmp_path):
+    packages = scan_packages(_monorepo(tmp_path))
+    used_by = {key: p["used_by"] for key, p in packages.items()}
+    assert used_by == {
+        "requests==2.31.0": [".", "libs/core", "services/api"],
+        "requests==2.28.0": ["services/worker"],
+        # a versão do lockfile prevalece sobre "flask" sem versão
+        "flask==3.0.0": ["services/api"],
+        "jinja2==3.1.2": ["services/api", "services/worker"],
+        "pytest==8.0.0": ["services/worker"],
+        "black==24.1.0": ["libs/core"],
+        "pyyaml==6.0": ["libs/generated"],
+    }
+
+
+def test_recursive_analysis_resolves_each_pin_once(tmp_path, monkeypatch):
+    calls = []
+
+    class FakeResolver:
+        def __init__(self, **kwargs):
+            pass
+
+        def resolve(self, packages):
+            packages = list(packages)
+            calls.extend(packages)
+            return {n: "9.9.9" for n, _ in packages}, {}, {}
+
+    monkeypatch.setattr(deps_mod, "ConcurrentResolver", FakeResolver)
+    report = deps_mod.analyze_dependencies(_monorepo(tmp_path), recursive=True)
+    assert len(calls) == len(set(calls)) == report["summary"]["packages_total"] == 7
+    requests = [p for p in report["packages"] if p["name"] == "requests" and p["current_version"] == "2.31.0"]
+    assert requests[0]["used_by"] == [".", "libs/core", "services/api"]
+    assert requests[0]["is_outdated"] is True
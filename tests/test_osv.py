@@ -0,0 +1,150 @@
+import json
+from pathlib import Path
+
+from repo_miner import deps as deps_mod
+from repo_miner import osv as osv_mod
+
+
+class DummyResp:
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+
+    def json(self):
+        return self._json
+
+
+def test_lookup_batches_and_hydrates_each_id_once(monkeypatch):
+    posted = []
+    fetched = []
+
+    def fake_post(url, data=None, headers=None, timeout=30):
+        queries = json.loads(data)["queries"]
+        posted.append(queries)
+        results = []
+        for q in queries:
+            name = q["package"]["name"]
+            if name == "clean":
+                results.append({})
+            else:
+                results.append({"vulns": [{"id": "GHSA-shared", "modified": "x"}, {"id": f"OSV-{name}"}]})
+        return DummyResp(200, {"results": results})
+
+    def fake_get(url, timeout=20, headers=None):
+        vid = url.rsplit("/", 1)[-1]
+        fetched.append(vid)
+        return DummyResp(200, {"id": vid, "summary": f"s-{vid}", "aliases": ["CVE-1"], "details": "long"})
+
+    monkeypatch.setattr(osv_mod.transport, "get_client", lambda: type("C", (), {"post": staticmethod(fake_post), "get": staticmethod(fake_get)}))
+
+    pairs = [("a", "1.0"), ("b", "2.0"), ("clean", "1.0"), ("c", "3.0"), ("a", "1.0")]
+    result = osv_mod.lookup(pairs, chunk_size=2)
+
+    assert [len(q) for q in posted] == [2, 2]
+    assert sorted(fetched) == ["GHSA-shared", "OSV-a", "OSV-b", "OSV-c"]
+    assert result[("clean", "1.0")] == []
+    assert [v["id"] for v in result[("a", "1.0")]] == ["GHSA-shared", "OSV-a"]
+    assert result[("b", "2.0")][0] == {
+        "id": "GHSA-shared",
+        "summary": "s-GHSA-shared",
+        "severity": None,
+        "aliases": ["CVE-1"],
+        "references": None,
+    }
+
+
+def test_query_batch_follows_page_token(monkeypatch):
+    calls = []
+
+    def fake_post(url, data=None, headers=None, timeout=30):
+        q = json.loads(data)["queries"][0]
+        calls.append(q.get("page_token"))
+        if q.get("page_token"):
+            return DummyResp(200, {"results": [{"vulns": [{"id": "OSV-2"}]}]})
+        return DummyResp(200, {"results": [{"vulns": [{"id": "OSV-1"}], "next_page_token": "t1"}]})
+
+    monkeypatch.setattr(osv_mod.transport, "get_client", lambda: type("C", (), {"post": staticmethod(fake_post)}))
+    ids = osv_mod.query_batch([("pkg", "1.0")])
+    assert ids[("pkg", "1.0")] == ["OSV-1", "OSV-2"]
+    assert calls == [None, "t1"]
+
+
+def test_hydrate_failure_keeps_id(monkeypatch):
+    def fake_get(url, timeout=20, headers=None):
+        return DummyResp(500)
+
+    monkeypatch.setattr(osv_mod.transport, "get_client", lambda: type("C", (), {"get": staticmethod(fake_get)}))
+    details = osv_mod.hydrate(["OSV-9"])
+    assert details["OSV-9"]["id"] == "OSV-9"
+    assert details["OSV-9"]["summary"] is None
+
+
+def test_analyze_dependencies_uses_batch_lookup(monkeypatch, tmp_path: Path):
+    (tmp_path / "requirements.txt").write_text("a==1.0\nb==2.0\nc\n", encoding="utf-8")
+    seen = []
+
+    def fake_lookup(pairs, **kwargs):
+        pairs = list(pairs)
+        seen.append(pairs)
+        return {("a", "1.0"): [{"id": "OSV-1"}], ("b", "2.0"): []}
+
+    monkeypatch.setattr(osv_mod, "lookup", fake_lookup)
+    monkeypatch.setattr(deps_mod, "_latest_pypi_version", lambda name, **kwargs: "2.0")
+    report = deps_mod.analyze_dependencies(tmp_path)
+
+    assert len(seen) == 1 and sorted(seen[0]) == [("a", "1.0"), ("b", "2.0")]
+    by_name = {p["name"]: p for p in report["packages"]}
+    assert by_name["a"]["vulnerabilities"] == [{"id": "OSV-1"}]
+    assert by_name["c"]["vulnerabilities"] == []
+    assert report["summary"]["vulnerable_total"] == 1
+
+
+def _always_503(monkeypatch):
+    """Cliente real cujas respostas são sempre 503, inclusive depois de todas as retentativas."""
+    import requests
+
+    from repo_miner import resolver as resolver_mod
+    from repo_miner.transport import HttpClient
+
+    client = HttpClient(max_per_host=2, retries=2, backoff=0)
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        r = requests.Response()
+        r.status_code, r._content, r.url = 503, b"", url
+        return r
+
+    monkeypatch.setattr(client.session, "request", fake_request)
+    monkeypatch.setattr(resolver_mod, "HttpClient", lambda **kwargs: client)
+    return calls
+
+
+def test_lookup_failure_is_not_reported_clean(monkeypatch, tmp_path: Path):
+    from typer.testing import CliRunner
+
+    from repo_miner.cli import app
+
+    calls = _always_503(monkeypatch)
+    (tmp_path / "requirements.txt").write_text("pkg==1.0\n", encoding="utf-8")
+    report = deps_mod.analyze_dependencies(tmp_path)
+
+    row = report["packages"][0]
+    assert row["vulnerabilities"] is None and row["latest_version"] is None
+    assert "OSV" in row["error"] and "PyPI" in row["error"] and "503" in row["error"]
+    assert report["summary"] == {"packages_total": 1, "outdated_total": 0, "vulnerable_total": 0, "unknown_total": 1}
+    assert calls.count(osv_mod.OSV_QUERYBATCH_URL) == 3  # 1 tentativa + 2 retentativas
+
+    out = tmp_path / "deps.json"
+    result = CliRunner().invoke(app, ["deps", str(tmp_path), "--no-cache", "--json-out", str(out)])
+    assert result.exit_code == 2 and "sem resultado" in result.output
+    assert json.loads(out.read_text(encoding="utf-8"))["summary"]["unknown_total"] == 1
+
+
+def test_query_batch_marks_failed_pairs(monkeypatch):
+    def fake_post(url, data=None, headers=None, timeout=30):
+        return DummyResp(503)
+
+    monkeypatch.setattr(osv_mod.transport, "get_client", lambda: type("C", (), {"post": staticmethod(fake_post)}))
+    assert osv_mod.query_batch([("pkg", "1.0")]) == {("pkg", "1.0"): None}
+    assert osv_mod.lookup([("pkg", "1.0")]) == {("pkg", "1.0"): None}
@@ -0,0 +1,74 @@
+import json
+import threading
+
+from typer.testing import CliRunner
+
+from repo_miner import profiling
+from repo_miner.cache import HttpCache
+from repo_miner.cli import app
+
+
+def test_span_and_count_are_noops_when_inactive():
+    assert profiling.active() is None
+    with profiling.span("nada"):
+        pass
+    profiling.count("nada")
+    assert profiling.active() is None
+
+
+def test_profiler_collects_spans_from_threads():
+    profiler = profiling.start()
+    try:
+        barrier = threading.Barrier(4)
+
+        def work(i):
+            with profiling.span("pypi.latest", "pypi", package=f"p{i}"):
+                profiling.count("http_requests")
+                barrier.wait()  # threads vivas ao mesmo tempo têm idents distintos
+
+        threads = [threading.Thread(target=work, args=(i,), name=f"w{i}") for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        assert profiling.stop() is profiler
+
+    summary = profiler.summary()
+    assert summary["counters"] == {"http_requests": 4}
+    assert [(s["name"], s["calls"]) for s in summary["spans"]] == [("pypi.latest", 4)]
+
+    trace = profiler.chrome_trace()
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert sorted(e["args"]["package"] for e in spans) == ["p0", "p1", "p2", "p3"]
+    names = {e["args"]["name"] for e in trace["traceEvents"] if e["name"] == "thread_name"}
+    assert {"w0", "w1", "w2", "w3"} <= names
+
+
+def test_cache_counters_feed_profiler(tmp_path):
+    cache = HttpCache(tmp_path / "c")
+    profiler = profiling.start()
+    try:
+        cache.count("hits")
+        cache.count("misses")
+    finally:
+        profiling.stop()
+        cache.close()
+    assert profiler.counters == {"cache_hits": 1, "cache_misses": 1}
+
+
+def test_cli_profile_and_trace(git_repo, tmp_path):
+    trace_path = tmp_path / "trace.json"
+    result = CliRunner().invoke(app, [
+        "--profile", "--trace-out", str(trace_path),
+        "activity", str(git_repo), "--backend", "git", "--since-days", "30", "--json-out", str(tmp_path / "a.json"),
+    ])
+    assert result.exit_code == 0, result.output
+    assert "Perfil de execução" in result.output and "commits_seen" in result.output
+    assert profiling.active() is None
+
+    trace = json.loads(trace_path.read_text(encoding="utf-8"))
+    names = {e["name"] for e in trace["traceEvents"] if e["ph"] == "X"}
+    assert {"command.activity", "activity.traverse", "export.json"} <= names
+    counters = [e for e in trace["traceEvents"] if e["ph"] == "C"]
+    assert counters[0]["args"]["commits_seen"] == 5
@@ -0,0 +1,43 @@
+import threading
+import time
+from pathlib import Path
+
+from repo_miner import deps as deps_mod
+from repo_miner import osv
+from repo_miner.resolver import ConcurrentResolver
+
+
+def test_resolver_runs_lookups_concurrently(monkeypatch):
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def fake_latest(name, **kwargs):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return name.upper()
+
+    monkeypatch.setattr(deps_mod, "_latest_pypi_version", fake_latest)
+    monkeypatch.setattr(osv, "lookup", lambda pairs, **kwargs: {p: [] for p in pairs})
+    latest, vulns, errors = ConcurrentResolver(concurrency=4).resolve([(f"p{i}", "1.0") for i in range(12)])
+    assert latest["p3"] == "P3"
+    assert len(vulns) == 12 and errors == {}
+    assert 1 < state["peak"] <= 4
+
+
+def test_analyze_dependencies_output_is_sorted(monkeypatch, tmp_path: Path):
+    (tmp_path / "requirements.txt").write_text("zeta==1.0\nalpha==1.0\nmid==1.0\n", encoding="utf-8")
+
+    def fake_latest(name, **kwargs):
+        # respostas terminam fora de ordem
+        time.sleep({"zeta": 0.0, "mid": 0.01, "alpha": 0.02}[name])
+        return "2.0"
+
+    monkeypatch.setattr(deps_mod, "_latest_pypi_version", fake_latest)
+    monkeypatch.setattr(osv, "lookup", lambda pairs, **kwargs: {})
+    report = deps_mod.analyze_dependencies(tmp_path, concurrency=3)
+    assert [p["name"] for p in report["packages"]] == ["alpha", "mid", "zeta"]
+    assert report["summary"]["outdated_total"] == 3
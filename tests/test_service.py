@@ -0,0 +1,177 @@
+import json
+import threading
+
+import pytest
+from typer.testing import CliRunner
+
+from repo_miner import service as service_mod
+from repo_miner.activity import analyze_activity
+from repo_miner.cli import app
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def served(tmp_path):
+    """Serviço em um socket Unix, sem rede, atendendo em uma thread."""
+    svc = service_mod.AnalysisService(workers=2, index_dir=tmp_path / "index")
+    address = ("unix", str(tmp_path / "s.sock"))
+    server = service_mod.make_server(address, svc)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield svc, address
+    server.shutdown()
+    server.server_close()
+    svc.close()
+
+
+def test_parse_address():
+    assert service_mod.parse_address("unix:/tmp/x.sock") == ("unix", "/tmp/x.sock")
+    assert service_mod.parse_address("/tmp/x.sock") == ("unix", "/tmp/x.sock")
+    assert service_mod.parse_address("localhost:8765") == ("tcp", ("localhost", 8765))
+    assert service_mod.parse_address("http://127.0.0.1:8765/") == ("tcp", ("127.0.0.1", 8765))
+
+
+def test_activity_job_matches_local_and_reuses_result(served, git_repo, git_commit):
+    svc, address = served
+    expected = analyze_activity(str(git_repo), since_days=365, backend="git")
+    got = service_mod.run_remote(address, "activity", {"repo": str(git_repo), "since_days": 365})
+    assert got == expected
+
+    service_mod.run_remote(address, "activity", {"repo": str(git_repo), "since_days": 365})
+    assert svc.counters["result_hits"] == 1
+
+    # commit novo muda o HEAD: o resultado guardado não vale mais
+    git_commit(git_repo, "novo.txt", "n", 1, email="d@example.com")
+    got = service_mod.run_remote(address, "activity", {"repo": str(git_repo), "since_days": 365})
+    assert got["commits_total"] == expected["commits_total"] + 1
+    assert svc.counters["result_hits"] == 1
+
+
+def test_deps_job_tracks_manifest_changes(served, tmp_path):
+    _, address = served
+    project = tmp_path / "proj"
+    project.mkdir()
+    (project / "requirements.txt").write_text("requests==2.0.0\n", encoding="utf-8")
+    params = {"repo": str(project), "offline": True}
+    first = service_mod.run_remote(address, "deps", params)
+    assert [p["name"] for p in first["packages"]] == ["requests"]
+
+    (project / "requirements.txt").write_text("requests==2.0.0\nrich==13.0.0\n", encoding="utf-8")
+    second = service_mod.run_remote(address, "deps", params)
+    assert sorted(p["name"] for p in second["packages"]) == ["requests", "rich"]
+
+
+def test_failed_job_and_bad_request(served, tmp_path):
+    _, address = served
+    with pytest.raises(RuntimeError, match="repositório"):
+        service_mod.run_remote(address, "activity", {"repo": str(tmp_path / "nada")})
+    status, body = service_mod.request(address, "POST", "/jobs", {"kind": "outro", "params": {"repo": "."}})
+    assert status == 400 and "inválido" in body["error"]
+    status, body = service_mod.request(address, "GET", "/health")
+    assert status == 200 and body["failed"] == 1
+
+
+def _raw_post(address, payload: bytes, length=None, token=None):
+    conn = service_mod._UnixConnection(address[1], timeout=5)
+    try:
+        conn.putrequest("POST", "/jobs")
+        conn.putheader("Content-Length", str(len(payload) if length is None else length))
+        if token:
+            conn.putheader("Authorization", f"Bearer {token}")
+        conn.endheaders(payload)
+        r = conn.getresponse()
+        return r.status, json.loads(r.read() or b"{}")
+    finally:
+        conn.close()
+
+
+def test_malformed_requests_get_400(served):
+    _, address = served
+    assert _raw_post(address, b"[]")[0] == 400
+    assert _raw_post(address, b"{nao e json")[0] == 400
+    assert _raw_post(address, b"", length=10 ** 9)[0] == 413
+    for body in ({"kind": "activity", "params": {"repo": "."}, "timeout": "x"}, {"kind": "activity", "params": ["."]}):
+        status, reply = service_mod.request(address, "POST", "/jobs", body)
+        assert status == 400, reply
+
+
+def test_cli_delegates_to_server(served, git_repo, tmp_path):
+    svc, (_, sock) = served
+    out = tmp_path / "a.json"
+    result = runner.invoke(app, ["activity", str(git_repo), "--server", sock, "--json-out", str(out)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(out.read_text(encoding="utf-8"))["commits_total"] == 6
+    assert svc.counters["jobs"] == 1
+
+    result = runner.invoke(app, ["activity", str(git_repo), "--server", sock, "--windows", "30"])
+    assert result.exit_code == 1
+    assert "--windows não é suportado com --server" in result.output
+    assert svc.counters["jobs"] == 1
+
+
+@pytest.mark.parametrize("args, option", [
+    (["activity", ".", "--all-refs"], "--all-refs"),
+    (["activity", ".", "--backend", "git"], "--backend"),
+    (["deps", ".", "--db", "x.db"], "--db"),
+    (["deps", ".", "--pypi-api", "simple"], "--pypi-api"),
+    (["deps", ".", "--no-cache"], "--no-cache"),
+    (["analyze", ".", "--concurrency", "2"], "--concurrency"),
+    (["analyze", ".", "--osv-ttl", "60"], "--osv-ttl"),
+])
+def test_cli_rejects_options_the_server_ignores(tmp_path, args, option):
+    # a recusa acontece antes de qualquer conexão com o serviço
+    result = runner.invoke(app, args + ["--server", str(tmp_path / "ausente.sock")])
+    assert result.exit_code == 1
+    assert f"{option} não é suportado com --server" in result.output
+
+
+def test_cli_reports_unreachable_server(tmp_path, git_repo):
+    result = runner.invoke(app, ["activity", str(git_repo), "--server", str(tmp_path / "ausente.sock")])
+    assert result.exit_code == 1
+    assert "Serviço indisponível" in result.output
+
+
+def test_token_is_required_on_every_route(tmp_path, monkeypatch):
+    svc = service_mod.AnalysisService(workers=1, index_dir=tmp_path / "index")
+    address = ("unix", str(tmp_path / "t.sock"))
+    server = service_mod.make_server(address, svc, token="segredo")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        monkeypatch.delenv(service_mod.TOKEN_ENV, raising=False)
+        assert service_mod.request(address, "GET", "/health")[0] == 401
+        assert service_mod.request(address, "POST", "/shutdown", {}, token="errado")[0] == 401
+        # sem token, o corpo nunca é interpretado: 401, e não 400/413
+        assert _raw_post(address, b"{nao e json")[0] == 401
+        assert _raw_post(address, b"", length=10 ** 9)[0] == 401
+        assert service_mod.request(address, "GET", "/health", token="segredo")[0] == 200
+        monkeypatch.setenv(service_mod.TOKEN_ENV, "segredo")
+        assert service_mod.request(address, "GET", "/health")[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+        svc.close()
+
+
+def test_non_loopback_host_requires_token(tmp_path):
+    svc = service_mod.AnalysisService(workers=1, index_dir=tmp_path / "index")
+    try:
+        with pytest.raises(RuntimeError, match=service_mod.TOKEN_ENV):
+            service_mod.make_server(("tcp", ("0.0.0.0", 0)), svc)
+        service_mod.make_server(("tcp", ("127.0.0.1", 0)), svc).server_close()
+        service_mod.make_server(("tcp", ("0.0.0.0", 0)), svc, token="segredo").server_close()
+    finally:
+        svc.close()
+
+
+def test_wait_gives_up_after_timeout(served, monkeypatch):
+    svc, address = served
+    release = threading.Event()
+    monkeypatch.setattr(svc, "_activity", lambda repo, since_days=365: release.wait(5) and {})
+    status, body = service_mod.request(
+        address, "POST", "/jobs", {"kind": "activity", "params": {"repo": "."}, "timeout": 0.05}, timeout=5
+    )
+    release.set()
+    assert status == 504 and body["status"] in ("pending", "running")
+    assert "não terminou" in body["error"]
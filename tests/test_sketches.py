@@ -0,0 +1,51 @@
+from collections import Counter
+import random
+
+import pytest
+
+from repo_miner.sketches import HyperLogLog, SpaceSaving
+
+
+def test_hyperloglog_small_counts_are_exact():
+    hll = HyperLogLog()
+    for i in range(50):
+        hll.add(f"autor{i % 20}@x")
+    assert len(hll) == 20
+
+
+def test_hyperloglog_error_within_bound():
+    hll = HyperLogLog(precision=12)
+    for i in range(100_000):
+        hll.add(f"autor{i}@x")
+    # erro padrão ~1,6%; 5% equivale a ~3 desvios
+    assert abs(len(hll) - 100_000) / 100_000 < 0.05
+
+
+def test_hyperloglog_rejects_bad_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=2)
+
+
+def test_space_saving_exact_below_capacity():
+    sketch = SpaceSaving(capacity=10)
+    items = ["a"] * 5 + ["b"] * 3 + ["c"]
+    for item in items:
+        sketch.add(item)
+    assert sketch.top(2) == [("a", 5), ("b", 3)]
+    assert sketch.estimate("c") == 1
+    assert sketch.estimate("zz") == 0
+
+
+def test_space_saving_overestimate_bounded():
+    rng = random.Random(7)
+    stream = [f"a{min(int(rng.paretovariate(1.2)), 500)}" for _ in range(20_000)]
+    sketch = SpaceSaving(capacity=64)
+    for item in stream:
+        sketch.add(item)
+    exact = Counter(stream)
+    bound = len(stream) / 64
+    for item, est in sketch.counts.items():
+        assert exact[item] <= est <= exact[item] + bound
+    # todo item com frequência acima de N/capacity está na tabela
+    assert {i for i, c in exact.items() if c > bound} <= set(sketch.counts)
+    assert [a for a, _ in sketch.top(3)] == [a for a, _ in exact.most_common(3)]
@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from repo_miner.stages import StageTimeout, run_stages
+
+
+def test_stages_overlap_and_report_timings():
+    def slow(value):
+        def stage():
+            time.sleep(0.3)
+            return value
+        return stage
+
+    start = time.perf_counter()
+    results, timings = run_stages({"a": slow(1), "b": slow(2)})
+    elapsed = time.perf_counter() - start
+
+    assert results == {"a": 1, "b": 2}
+    assert set(timings) == {"a", "b"}
+    assert all(t >= 0.3 for t in timings.values())
+    # tempo total ~ o da etapa mais lenta, não a soma
+    assert elapsed < 0.55
+
+
+def test_stage_error_is_raised():
+    def boom():
+        raise ValueError("falhou")
+
+    with pytest.raises(ValueError, match="falhou"):
+        run_stages({"ok": lambda: 1, "boom": boom})
+
+
+def test_shared_deadline():
+    with pytest.raises(StageTimeout) as exc:
+        run_stages({"rapida": lambda: 1, "lenta": lambda: time.sleep(2)}, timeout=0.2)
+    assert exc.value.pending == ["lenta"]
@@ -0,0 +1,41 @@
+"""Orçamento de inicialização da CLI, medido com ``python -X importtime``."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+# carregados só quando o comando precisa de fato (backend pydriller, rede)
+HEAVY = ("pydriller", "git", "requests", "urllib3")
+# tempo próprio somado dos módulos do pacote; ~50 ms em uma máquina comum
+OWN_BUDGET_US = 250_000
+
+
+def _import_times(args, cwd):
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    proc = subprocess.run(
+        # mesmo ponto de entrada do script ``repo-miner``
+        [sys.executable, "-X", "importtime", "-c", "from repo_miner.cli import app; app(prog_name='repo-miner')", *args],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+@pytest.mark.parametrize("args", [["--help"], ["deps", ".", "--offline"], ["activity", ".", "--backend", "git"]])
+def test_cli_startup_skips_heavy_imports(args, git_repo):
+    (git_repo / "requirements.txt").write_text("requests==2.0.0\n", encoding="utf-8")
+    modules = _import_times(args, git_repo)
+    assert "repo_miner.cli" in modules
+    loaded = sorted(m for m in modules if m.split(".")[0] in HEAVY)
+    assert not loaded, f"importados sem necessidade: {loaded}"
+    own = sum(us for m, us in modules.items() if m.startswith("repo_miner"))
+    assert own < OWN_BUDGET_US, f"módulos do repo_miner levaram {own / 1000:.0f} ms para importar"
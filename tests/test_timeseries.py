@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from repo_miner import activity as activity_mod
+from repo_miner import timeseries
+
+
+def _records(now):
+    base = now - timedelta(days=400)
+    offsets = [0, 3, 3, 10, 45, 46, 120, 200, 201, 330, 360, 371, 385, 390, 399]
+    return [
+        activity_mod.CommitRecord(str(i), base + timedelta(days=d, hours=i), f"a{i % 4}@x", i % 3 == 0)
+        for i, d in enumerate(offsets)
+    ]
+
+
+def test_windows_match_separate_aggregation():
+    now = datetime(2024, 6, 15, 12, tzinfo=timezone.utc)
+    records = _records(now)
+    # fora de ordem de propósito: a ordenação é refeita na montagem dos arrays
+    history = timeseries.CommitArrays(reversed(records))
+    result = timeseries.window_metrics(history, now, [30, 90, 365])
+    for days in (30, 90, 365):
+        cutoff = now - timedelta(days=days)
+        expected = activity_mod.aggregate_activity([r for r in records if r.committed_at >= cutoff], now)
+        got = result[str(days)]
+        for key in got:
+            assert got[key] == expected[key], (days, key)
+
+
+def test_monthly_series_buckets():
+    now = datetime(2024, 6, 15, 12, tzinfo=timezone.utc)
+    records = _records(now)
+    history = timeseries.CommitArrays(records)
+    since = now - timedelta(days=90)
+    rows = timeseries.series_metrics(history, since, now, "monthly")
+    assert [r["period"] for r in rows] == ["2024-03", "2024-04", "2024-05", "2024-06"]
+    assert sum(r["commits_total"] for r in rows) == sum(1 for r in records if r.committed_at >= since)
+    for row in rows:
+        year, month = map(int, row["period"].split("-"))
+        bucket = [r for r in records if r.committed_at >= since and (r.committed_at.year, r.committed_at.month) == (year, month)]
+        expected = activity_mod.aggregate_activity(bucket, now)
+        assert row["commits_total"] == expected["commits_total"]
+        assert row["authors_total"] == expected["authors_total"]
+        assert row["median_days_between_commits"] == expected["median_days_between_commits"]
+
+
+def test_weekly_labels_are_iso_weeks():
+    now = datetime(2024, 1, 10, tzinfo=timezone.utc)
+    history = timeseries.CommitArrays([])
+    rows = timeseries.series_metrics(history, now - timedelta(days=14), now, "weekly")
+    assert [r["period"] for r in rows] == ["2023-W52", "2024-W01", "2024-W02"]
+    assert all(r["commits_total"] == 0 for r in rows)
+
+
+def test_single_traversal_on_real_repo(git_repo, monkeypatch):
+    calls = []
+    original = activity_mod.BACKENDS["git"]
+    monkeypatch.setitem(activity_mod.BACKENDS, "git", lambda *a: calls.append(a) or original(*a))
+    result = timeseries.analyze_activity_windows(str(git_repo), windows=[7, 30], series="monthly", backend="git")
+    assert len(calls) == 1
+    assert result["windows"]["30"]["commits_total"] == 5
+    assert result["windows"]["7"]["commits_total"] == 2
+    assert result["windows"]["30"]["merge_commits"] == 1
+    assert sum(r["commits_total"] for r in result["series"]) == 6
@@ -0,0 +1,142 @@
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from repo_miner import deps as deps_mod
+from repo_miner import osv
+from repo_miner import transitive
+
+
+def _project(name, versions, requires_latest, latest=None):
+    return {
+        "info": {"name": name, "version": latest or versions[-1], "requires_dist": requires_latest},
+        "releases": {v: [{"filename": f"{name}-{v}.tar.gz", "yanked": False}] for v in versions},
+    }
+
+
+# web 2.1 -> core<2, db ; db -> core>=1.0 ; core -> web>=2 (ciclo) ; web 1.0 (antiga) -> legacy
+PYPI = {
+    deps_mod.PYPI_BASE.format(name="web"): _project("Web", ["1.0", "2.0", "2.1", "3.0rc1"], ["core<2", "db", "pytest ; extra == 'test'"], latest="2.1"),
+    deps_mod.PYPI_BASE.format(name="db"): _project("db", ["0.9", "1.0"], ["core (>=1.0)"]),
+    deps_mod.PYPI_BASE.format(name="core"): _project("core", ["1.0", "1.5", "2.0"], ["web>=2 ; python_version >= '3.8'"]),
+    deps_mod.PYPI_RELEASE_BASE.format(name="core", version="1.5"): {"info": {"requires_dist": ["web>=2"]}},
+    deps_mod.PYPI_RELEASE_BASE.format(name="web", version="1.0"): {"info": {"requires_dist": ["legacy"]}},
+}
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200 if data is not None else 404
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = Counter()
+
+    def get(self, url, timeout=None, headers=None):
+        self.calls[url] += 1
+        return FakeResponse(PYPI.get(url))
+
+
+def test_parse_requires_dist():
+    reqs = transitive.parse_requires_dist([
+        "Requests (>=2.0,<3)",
+        "urllib3<3,>=1.21.1",
+        "colorama ; sys_platform == 'win32'",
+        "pytest>=7 ; extra == 'test'",
+        "foo @ https://example.com/foo.tar.gz",
+        "zope.interface[docs]",
+    ])
+    assert reqs == [("requests", ">=2.0,<3"), ("urllib3", "<3,>=1.21.1"), ("colorama", ""), ("zope-interface", "")]
+
+
+def test_expand_breadth_first_with_dedup_and_cycles():
+    client = FakeClient()
+    store = transitive.MetadataStore(client)
+    with ThreadPoolExecutor(4) as pool:
+        graph = transitive.expand([("Web", None), ("db", "1.0")], store, pool)
+    data = graph.to_dict()
+    assert data["roots"] == ["web==2.1", "db==1.0"]
+    assert data["adjacency"]["web==2.1"] == ["core==1.5", "db==1.0"]
+    assert data["adjacency"]["db==1.0"] == ["core==2.0"]  # cada aresta leva à maior versão que atende
+    assert data["adjacency"]["core==1.5"] == data["adjacency"]["core==2.0"] == ["web==2.1"]
+    assert data["depth"] == {"web==2.1": 0, "db==1.0": 0, "core==1.5": 1, "core==2.0": 1}
+    # cada projeto e cada release é buscado uma única vez, mesmo com várias threads
+    assert max(client.calls.values()) == 1
+
+
+def test_expand_respects_max_depth_and_unknown_packages():
+    store = transitive.MetadataStore(FakeClient())
+    graph = transitive.expand([("web", "1.0"), ("missing", None)], store, max_depth=1)
+    data = graph.to_dict()
+    assert data["depth"] == {"web==1.0": 0, "missing": 0, "legacy": 1}
+    assert "legacy" not in data["adjacency"]
+    assert data["edges_total"] == 1
+
+
+def test_analyze_dependencies_transitive(monkeypatch, tmp_path):
+    (tmp_path / "requirements.txt").write_text("web==2.1\n", encoding="utf-8")
+    monkeypatch.setattr(transitive.MetadataStore, "_get", lambda self, url: PYPI.get(url))
+    monkeypatch.setattr(
+        osv, "lookup",
+        lambda pairs, **kwargs: {p: ([{"id": "OSV-1"}] if p == ("core", "1.5") else []) for p in pairs},
+    )
+    report = deps_mod.analyze_dependencies(tmp_path, cache=None, transitive=True, max_depth=1)
+    rows = {(p["name"], p["current_version"]): p for p in report["packages"]}
+    assert {k: r["depth"] for k, r in rows.items()} == {("web", "2.1"): 0, ("core", "1.5"): 1, ("db", "1.0"): 1}
+    assert rows[("core", "1.5")]["vulnerabilities"] == [{"id": "OSV-1"}]
+    assert rows[("core", "1.5")]["latest_version"] == "2.0" and rows[("core", "1.5")]["is_outdated"] is True
+    assert report["summary"] == {"packages_total": 3, "outdated_total": 1, "vulnerable_total": 1, "unknown_total": 0}
+    assert report["graph"]["adjacency"] == {"web==2.1": ["core==1.5", "db==1.0"]}
+
+
+def test_cli_transitive_graph_out(monkeypatch, tmp_path):
+    from typer.testing import CliRunner
+
+    from repo_miner.cli import app
+
+    (tmp_path / "requirements.txt").write_text("db==1.0\n", encoding="utf-8")
+    monkeypatch.setattr(transitive.MetadataStore, "_get", lambda self, url: PYPI.get(url))
+    monkeypatch.setattr(osv, "lookup", lambda pairs, **kwargs: {p: [] for p in pairs})
+    graph_out, ndjson_out = tmp_path / "g.json", tmp_path / "p.ndjson"
+    result = CliRunner().invoke(app, [
+        "deps", str(tmp_path), "--transitive", "--no-cache", "--graph-out", str(graph_out), "--ndjson-out", str(ndjson_out),
+    ])
+    assert result.exit_code == 0, result.output
+    graph = json.loads(graph_out.read_text(encoding="utf-8"))
+    assert graph["roots"] == ["db==1.0"] and graph["nodes_total"] == 4
+    assert len(ndjson_out.read_text(encoding="utf-8").splitlines()) == 4
+
+    result = CliRunner().invoke(app, ["deps", str(tmp_path), "--transitive", "--offline"])
+    assert result.exit_code == 1 and "--offline" in result.output
+
+
+def test_transitive_pypi_failure_is_not_reported_clean(monkeypatch, tmp_path):
+    from typer.testing import CliRunner
+
+    from repo_miner import resolver as resolver_mod
+    from repo_miner.cli import app
+
+    class FailingClient(FakeClient):
+        # o PyPI responde 503 para "web" (mesmo depois das retentativas) e 404 para "ghost"
+        def get(self, url, timeout=None, headers=None):
+            if url == deps_mod.PYPI_BASE.format(name="web"):
+                return type("R", (), {"status_code": 503, "json": lambda self: {}})()
+            return super().get(url, timeout, headers)
+
+    (tmp_path / "requirements.txt").write_text("web==2.1\nghost\n", encoding="utf-8")
+    monkeypatch.setattr(resolver_mod, "HttpClient", lambda **kwargs: FailingClient())
+    monkeypatch.setattr(osv, "lookup", lambda pairs, **kwargs: {p: [] for p in pairs})
+    report = deps_mod.analyze_dependencies(tmp_path, cache=None, transitive=True, max_depth=1)
+    rows = {p["name"]: p for p in report["packages"]}
+    assert "503" in rows["web"]["error"] and rows["web"]["latest_version"] is None
+    # inexistente no PyPI (404) não é falha de consulta
+    assert rows["ghost"]["error"] is None
+    assert report["summary"]["unknown_total"] == 1
+
+    result = CliRunner().invoke(app, ["deps", str(tmp_path), "--transitive", "--no-cache"])
+    assert result.exit_code == 2, result.output
@@ -0,0 +1,133 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from repo_miner import transport as transport_mod
+from repo_miner.transport import AdaptiveLimiter, HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failures = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        remaining = self.failures.get(self.path, 0)
+        if remaining:
+            self.failures[self.path] = remaining - 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path, "pad": "x" * 2000}).encode("utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    Handler.failures = {}
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_keep_alive_reuses_connections_and_counts_bytes(server):
+    client = HttpClient(max_per_host=2)
+    for i in range(5):
+        r = client.get(f"{server}/p{i}", timeout=5)
+        assert r.json()["path"] == f"/p{i}"
+    stats = client.stats.snapshot()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    # corpo comprimido: menos bytes na rede do que depois de descomprimido
+    assert 0 < stats["bytes_received"] < stats["bytes_decoded"]
+
+
+def test_retries_transient_status(server, monkeypatch):
+    monkeypatch.setattr(transport_mod.time, "sleep", lambda s: None)
+    Handler.failures = {"/flaky": 2}
+    client = HttpClient(retries=3)
+    r = client.get(f"{server}/flaky", timeout=5)
+    assert r.status_code == 200
+    assert client.stats.snapshot()["retries"] == 2
+
+
+def test_gives_up_after_retries(server, monkeypatch):
+    monkeypatch.setattr(transport_mod.time, "sleep", lambda s: None)
+    Handler.failures = {"/down": 10}
+    client = HttpClient(retries=2)
+    r = client.get(f"{server}/down", timeout=5)
+    assert r.status_code == 503
+    assert client.stats.snapshot()["requests"] == 3
+
+
+def test_retries_connection_errors(monkeypatch):
+    monkeypatch.setattr(transport_mod.time, "sleep", lambda s: None)
+    client = HttpClient(retries=1)
+    with pytest.raises(transport_mod.requests.ConnectionError):
+        client.get("http://127.0.0.1:9/", timeout=1)
+    stats = client.stats.snapshot()
+    assert stats["errors"] == 2 and stats["retries"] == 1
+
+
+def test_backoff_has_jitter_and_honours_retry_after():
+    client = HttpClient(backoff=1.0, max_backoff=4.0)
+    delays = {client._delay(3) for _ in range(20)}
+    assert len(delays) > 1 and all(0 <= d <= 4.0 for d in delays)
+    resp = type("R", (), {"headers": {"Retry-After": "2"}})()
+    assert client._delay(0, resp) == 2.0
+
+
+def test_limiter_shrinks_on_throttle_and_recovers():
+    limiter = AdaptiveLimiter(limit=8)
+    limiter.observe(429)
+    assert limiter.limit == 4
+    limiter.observe(503)
+    assert limiter.limit == 2
+    for _ in range(2):
+        limiter.observe(200)
+    assert limiter.limit == 3
+    for _ in range(100):
+        limiter.observe(200)
+    assert limiter.limit == 8
+
+
+def test_limiter_bounds_in_flight_requests():
+    limiter = AdaptiveLimiter(limit=3)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def work():
+        with limiter:
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.01)
+            with lock:
+                state["active"] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert state["peak"] <= 3
@@ -0,0 +1,60 @@
+import random
+
+from repo_miner import deps, versions
+
+
+def test_pep440_ordering():
+    ordered = [
+        "1.0.dev0", "1.0a1", "1.0a2.dev1", "1.0a2", "1.0b1", "1.0rc1", "1.0", "1.0+abc", "1.0+5",
+        "1.0.post1.dev0", "1.0.post1", "1.1", "2.4", "2.31", "2024.1", "1!0.1",
+    ]
+    shuffled = ordered[:]
+    random.Random(3).shuffle(shuffled)
+    assert sorted(shuffled, key=versions.sort_key) == ordered
+
+
+def test_equivalent_spellings():
+    assert versions.sort_key("1.0") == versions.sort_key("1.0.0")
+    assert versions.sort_key("1.0-alpha.1") == versions.sort_key("1.0a1")
+    assert versions.sort_key("1.0-1") == versions.sort_key("1.0.post1")
+    assert versions.sort_key("v2.0RC1") == versions.sort_key("2.0rc1")
+    assert str(versions.parse("1.0-preview2")) == "1.0rc2"
+
+
+def test_prerelease_classification():
+    for v in ("1.0a1", "2.0rc1", "1.0.dev3", "3.0b2.post1"):
+        assert versions.is_prerelease(v), v
+    # a detecção antiga por substring marcava estas como pré-release
+    for v in ("2.31", "1.0.post1", "2024.1", "1.0+abc"):
+        assert not versions.is_prerelease(v), v
+
+
+def test_latest_stable_and_invalid_versions():
+    assert versions.latest_stable(["2.4", "2.31", "3.0rc1", "2.31.post1", "nonsense"]) == "2.31.post1"
+    assert versions.latest_stable(["1.0a1"]) is None
+    assert versions.parse("nonsense") is None
+    assert versions.sort_key("nonsense") < versions.sort_key("0.0.1")
+
+
+def test_parse_is_cached():
+    assert versions.parse("7.1.2") is versions.parse("7.1.2")
+
+
+def test_outdated_uses_pep440():
+    by_name = {"requests": {"name": "requests", "version": "2.4"}, "rich": {"name": "rich", "version": "13.0.post1"}}
+    report = deps.build_report(by_name, {"requests": "2.31", "rich": "13.0"}, {})
+    outdated = {p["name"]: p["is_outdated"] for p in report["packages"]}
+    assert outdated == {"requests": True, "rich": False}
+
+
+def test_specifiers():
+    assert versions.satisfies("2.31.0", ">=2.0,<3")
+    assert not versions.satisfies("3.0", ">=2.0,<3")
+    assert not versions.satisfies("3.0rc1", "<3")  # pré-releases da própria versão ficam de fora
+    assert not versions.satisfies("1.7.post1", ">1.7")
+    assert versions.satisfies("2.2.5", "~=2.2.1") and not versions.satisfies("2.3", "~=2.2.1")
+    assert versions.satisfies("1.2.9", "==1.2.*") and versions.satisfies("1.3", "!=1.2.*")
+    assert versions.satisfies("1.0+local", "==1.0") and not versions.satisfies("1.0", "!=1.0.0")
+    assert versions.latest_matching(["1.0", "2.0", "3.0a1"]) == "2.0"
+    assert versions.latest_matching(["1.0", "3.0a1"], ">=2") == "3.0a1"
+    assert versions.latest_matching(["1.0"], ">=2") is None
@@ -0,0 +1,125 @@
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from repo_miner import deps as deps_mod
+from repo_miner.cli import app
+from repo_miner.vulndb import VulnDB, import_osv_zip
+
+ADVISORIES = [
+    {
+        "id": "PYSEC-1",
+        "summary": "requests leaks headers",
+        "aliases": ["CVE-2023-1"],
+        "affected": [{
+            "package": {"ecosystem": "PyPI", "name": "Requests"},
+            "ranges": [{"type": "ECOSYSTEM", "events": [{"introduced": "0"}, {"fixed": "2.31.0"}]}],
+            "versions": ["2.30.0"],
+        }],
+    },
+    {
+        "id": "GHSA-xxxx",
+        "summary": "range only",
+        "affected": [{
+            "package": {"ecosystem": "PyPI", "name": "flask"},
+            "ranges": [{"type": "ECOSYSTEM", "events": [{"introduced": "2.0.0"}, {"last_affected": "2.2.0"}]}],
+        }],
+    },
+    {
+        "id": "GHSA-npm",
+        "affected": [{"package": {"ecosystem": "npm", "name": "left-pad"}, "versions": ["1.0.0"]}],
+    },
+    {
+        "id": "PYSEC-withdrawn",
+        "withdrawn": "2024-01-01T00:00:00Z",
+        "affected": [{"package": {"ecosystem": "PyPI", "name": "requests"}, "versions": ["2.30.0"]}],
+    },
+]
+
+
+@pytest.fixture
+def osv_zip(tmp_path: Path) -> Path:
+    path = tmp_path / "all.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for adv in ADVISORIES:
+            zf.writestr(f"{adv['id']}.json", json.dumps(adv))
+    return path
+
+
+@pytest.fixture
+def snapshot(tmp_path: Path) -> Path:
+    path = tmp_path / "pypi.json"
+    path.write_text(json.dumps({
+        "requests": ["2.29.0", "2.30.0", "2.31.0", "2.32.0rc1"],
+        "Flask": ["1.1.0", "2.1.0", "3.0.0"],
+    }), encoding="utf-8")
+    return path
+
+
+def test_import_and_query(tmp_path, osv_zip, snapshot):
+    db_path = tmp_path / "db.sqlite3"
+    stats = import_osv_zip(osv_zip, db_path, pypi_snapshot=snapshot)
+    assert stats["vulns"] == 2
+
+    db = VulnDB(db_path)
+    assert db.latest_version("requests") == "2.31.0"
+    assert db.latest_version("flask") == "3.0.0"
+    # versão listada explicitamente e versão coberta só pelo intervalo (pré-expandida)
+    assert [v["id"] for v in db.vulnerabilities("requests", "2.30.0")] == ["PYSEC-1"]
+    assert [v["id"] for v in db.vulnerabilities("requests", "2.29.0")] == ["PYSEC-1"]
+    assert db.vulnerabilities("requests", "2.31.0") == []
+    # fora do snapshot: avaliado pelos intervalos
+    assert [v["id"] for v in db.vulnerabilities("flask", "2.2.0")] == ["GHSA-xxxx"]
+    assert db.vulnerabilities("flask", "2.3.0") == []
+    assert db.vulnerabilities("left-pad", "1.0.0") == []
+    assert db.vulnerabilities("requests", "2.30.0")[0]["aliases"] == ["CVE-2023-1"]
+
+
+def test_indexed_versions_skip_the_range_scan(tmp_path, osv_zip, snapshot, monkeypatch):
+    from repo_miner import vulndb as vulndb_mod
+
+    db_path = tmp_path / "db.sqlite3"
+    import_osv_zip(osv_zip, db_path, pypi_snapshot=snapshot)
+    calls = []
+    real = vulndb_mod._safe_in_range
+    monkeypatch.setattr(vulndb_mod, "_safe_in_range", lambda *args: calls.append(args) or real(*args))
+    db = VulnDB(db_path)
+    assert [v["id"] for v in db.vulnerabilities("flask", "2.1.0")] == ["GHSA-xxxx"]
+    assert db.vulnerabilities("requests", "2.31.0") == []
+    assert calls == []
+    assert [v["id"] for v in db.vulnerabilities("flask", "2.2.0")] == ["GHSA-xxxx"]  # fora do snapshot
+    assert len(calls) == 1
+
+
+def test_analyze_dependencies_uses_local_db(tmp_path, osv_zip, snapshot, monkeypatch):
+    db_path = tmp_path / "db.sqlite3"
+    import_osv_zip(osv_zip, db_path, pypi_snapshot=snapshot)
+    (tmp_path / "requirements.txt").write_text("requests==2.30.0\nflask==3.0.0\n", encoding="utf-8")
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("não deveria acessar a rede")
+
+    monkeypatch.setattr(deps_mod.transport, "get_client", no_network)
+    report = deps_mod.analyze_dependencies(tmp_path, offline=True, vulndb=VulnDB(db_path))
+    by_name = {p["name"]: p for p in report["packages"]}
+    assert by_name["requests"]["latest_version"] == "2.31.0"
+    assert by_name["requests"]["is_outdated"] is True
+    assert by_name["requests"]["vulnerabilities"][0]["id"] == "PYSEC-1"
+    assert by_name["flask"]["vulnerabilities"] == []
+    assert report["summary"] == {"packages_total": 2, "outdated_total": 1, "vulnerable_total": 1, "unknown_total": 0}
+
+
+def test_cli_db_import_then_offline_deps(tmp_path, osv_zip, snapshot):
+    runner = CliRunner()
+    result = runner.invoke(app, ["db", "import", "--osv-zip", str(osv_zip), "--pypi-snapshot", str(snapshot)])
+    assert result.exit_code == 0, result.stdout
+
+    (tmp_path / "requirements.txt").write_text("requests==2.30.0\n", encoding="utf-8")
+    out = tmp_path / "deps.json"
+    result = runner.invoke(app, ["deps", str(tmp_path), "--offline", "--json-out", str(out)])
+    assert result.exit_code == 0
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["summary"]["vulnerable_total"] == 1